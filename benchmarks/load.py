@@ -0,0 +1,375 @@
+"""
+Load test replaying a corpus against an extractor, in-process or over HTTP.
+
+    python -m benchmarks.load --target inprocess --concurrency 8
+    python -m benchmarks.load --target server --qps 50
+    python -m benchmarks.load --target http://127.0.0.1:8080 --corpus texts.txt
+
+"inprocess" and "server" use the stub pipeline with the tiny synthetic
+segmenter (the latter behind a local SrlServer), any URL is treated as a
+running `srl-toolkit serve`. Every target is loaded twice, first with a cold
+cache, then with a warm one; for URLs the cache cannot be cleared, so the
+first pass is as cold as the server's cache happens to be.
+
+With --qps requests are sent on a fixed schedule (open loop) and latency is
+counted from the scheduled time, so queueing delays are included. Otherwise
+--concurrency clients send requests back to back (closed loop).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from srl_toolkit import metrics
+from srl_toolkit.clause_segmenter import ClauseSegmenterProcessor
+from srl_toolkit.conllu_reader import parse_conllu, sentence_annotation
+from srl_toolkit.server import SrlServer
+
+from .synthetic import (
+    StubParser,
+    StubPipeline,
+    stub_clause_extractor,
+    synthetic_conllu,
+    train_segmenter,
+)
+
+
+def read_rss(pid: int | None = None) -> int:
+    """
+    Resident set size of the process in bytes. Falls back to the peak RSS of
+    this process where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    def __init__(self, pid: int | None = None, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        start = time.monotonic()
+        while True:
+            self.samples.append((time.monotonic() - start, read_rss(self.pid)))
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.samples.append((self.samples[-1][0], read_rss(self.pid)))
+        return False
+
+    def report(self) -> dict:
+        values = [rss / 2**20 for _, rss in self.samples]
+        return {
+            "start_mb": values[0],
+            "max_mb": max(values),
+            "end_mb": values[-1],
+            "samples": [
+                [round(t, 3), round(rss / 2**20, 2)] for t, rss in self.samples
+            ],
+        }
+
+
+def parse_cache_requests(exposition: str) -> dict[str, dict[str, float]]:
+    """
+    Reads srl_cache_requests_total from the Prometheus text format
+    """
+    counts = {}
+    pattern = re.compile(
+        r'^srl_cache_requests_total\{component="([^"]*)",result="(\w+)"\} (\S+)$'
+    )
+    for line in exposition.splitlines():
+        match = pattern.match(line)
+        if match:
+            component, result, value = match.groups()
+            counts.setdefault(component, {})[result] = float(value)
+    return counts
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+class InProcessTarget:
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.component = extractor.classname
+
+    def __call__(self, text: str):
+        return self.extractor(text)
+
+    def metrics(self) -> str:
+        return metrics.REGISTRY.render()
+
+    def clear_cache(self) -> bool:
+        self.extractor.cache.clear()
+        return True
+
+
+class HttpTarget:
+    def __init__(
+        self,
+        base_url: str,
+        endpoint: str = "/clauses",
+        component: str = "ClauseExtractor",
+        timeout: float = 60.0,
+        clear_cache: Callable[[], None] | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.endpoint = endpoint
+        self.component = component
+        self.timeout = timeout
+        self._clear_cache = clear_cache
+
+    def __call__(self, text: str):
+        request = urllib.request.Request(
+            self.base_url + self.endpoint,
+            data=json.dumps({"text": text}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def metrics(self) -> str:
+        try:
+            with urllib.request.urlopen(
+                self.base_url + "/metrics", timeout=self.timeout
+            ) as response:
+                return response.read().decode("utf-8")
+        except OSError:
+            return ""
+
+    def clear_cache(self) -> bool:
+        if self._clear_cache is None:
+            return False
+        self._clear_cache()
+        return True
+
+
+def _closed_loop(target, texts: list[str], concurrency: int) -> list[tuple]:
+    results = []
+    lock = threading.Lock()
+    iterator = iter(texts)
+
+    def client():
+        while True:
+            with lock:
+                text = next(iterator, None)
+            if text is None:
+                return
+            _t1 = time.perf_counter()
+            try:
+                target(text)
+                ok = True
+            except Exception:
+                ok = False
+            with lock:
+                results.append((time.perf_counter() - _t1, ok))
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _open_loop(target, texts: list[str], qps: float, concurrency: int) -> list:
+    def call(text: str, scheduled: float):
+        try:
+            target(text)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - scheduled, ok
+
+    futures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for i, text in enumerate(texts):
+            scheduled = start + i / qps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(call, text, scheduled))
+    return [future.result() for future in futures]
+
+
+def run_load(
+    target,
+    texts: list[str],
+    qps: float | None = None,
+    concurrency: int = 8,
+    rss_pid: int | None = None,
+    rss_interval: float = 0.5,
+) -> dict:
+    """
+    Sends the texts to the target, returns throughput, latency percentiles,
+    cache hit ratio and RSS over time
+    """
+    before = parse_cache_requests(target.metrics()).get(target.component, {})
+    with RssSampler(rss_pid, rss_interval) as rss:
+        _t1 = time.perf_counter()
+        if qps:
+            results = _open_loop(target, texts, qps, concurrency)
+        else:
+            results = _closed_loop(target, texts, concurrency)
+        duration = time.perf_counter() - _t1
+    after = parse_cache_requests(target.metrics()).get(target.component, {})
+
+    hits = after.get("hit", 0) - before.get("hit", 0)
+    misses = after.get("miss", 0) - before.get("miss", 0)
+    latencies = [latency * 1000 for latency, ok in results if ok]
+    report = {
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "duration_s": duration,
+        "throughput_rps": len(results) / duration if duration else 0.0,
+        "cache_hit_ratio": hits / (hits + misses) if hits + misses else None,
+        "rss": rss.report(),
+    }
+    if latencies:
+        report["latency_ms"] = {
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies),
+            "mean": statistics.mean(latencies),
+        }
+    return report
+
+
+def cold_and_warm(target, texts: list[str], **kwargs) -> dict:
+    cleared = target.clear_cache()
+    cold = run_load(target, texts, **kwargs)
+    warm = run_load(target, texts, **kwargs)
+    return {"cache_cleared": cleared, "cold": cold, "warm": warm}
+
+
+def make_corpus(unique: list[str], n_requests: int, seed: int = 0) -> list[str]:
+    """
+    Draws n_requests texts from the unique ones, so that texts repeat within
+    a run as in real traffic
+    """
+    rng = random.Random(seed)
+    return [rng.choice(unique) for _ in range(n_requests)]
+
+
+def _stub_extractor(workdir: str, n_unique: int):
+    model_path = train_segmenter(os.path.join(workdir, "segmenter.cbm"))
+    data, _ = synthetic_conllu(n_unique, seed=1)
+    sentences = list(parse_conllu(data))
+    pipeline = StubPipeline(StubParser(sentences), ClauseSegmenterProcessor(model_path))
+    extractor = stub_clause_extractor(pipeline, os.path.join(workdir, "cache"))
+    return extractor, [sentence_annotation(x)["text"] for x in sentences]
+
+
+def _print_report(name: str, report: dict):
+    latency = report.get("latency_ms", {})
+    hit_ratio = report["cache_hit_ratio"]
+    print(
+        f"{name:5} {report['requests']:6d} req  {report['errors']:4d} err  "
+        f"{report['throughput_rps']:8.1f} req/s  "
+        f"p50 {latency.get('p50', 0):8.2f}  p95 {latency.get('p95', 0):8.2f}  "
+        f"p99 {latency.get('p99', 0):8.2f} ms  "
+        f"hit {'-' if hit_ratio is None else f'{hit_ratio:.2f}'}  "
+        f"rss max {report['rss']['max_mb']:.0f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--target", default="inprocess", help="inprocess, server or a base URL"
+    )
+    parser.add_argument("--endpoint", default="/clauses")
+    parser.add_argument("--corpus", help="Texts, one per line (URL targets only)")
+    parser.add_argument("--unique", type=int, default=50, help="Synthetic texts")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--qps", type=float, help="Open loop at this rate")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pid", type=int, help="Process to sample RSS of")
+    parser.add_argument("--rss-interval", type=float, default=0.5)
+    parser.add_argument("-o", "--output", help="Write the report to a JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        http_server = None
+        if args.target in ("inprocess", "server"):
+            if args.corpus:
+                parser.error("the stub pipeline only knows the synthetic texts")
+            extractor, unique = _stub_extractor(workdir, args.unique)
+            if args.target == "inprocess":
+                target = InProcessTarget(extractor)
+            else:
+                srl_server = SrlServer(
+                    clause_extractor=extractor, n_threads=args.concurrency
+                )
+                http_server = srl_server.make_http_server(port=0)
+                threading.Thread(target=http_server.serve_forever, daemon=True).start()
+                target = HttpTarget(
+                    f"http://127.0.0.1:{http_server.server_address[1]}",
+                    args.endpoint,
+                    clear_cache=extractor.cache.clear,
+                )
+        else:
+            if args.corpus:
+                with open(args.corpus, encoding="utf-8") as f:
+                    unique = [line.strip() for line in f if line.strip()]
+            else:
+                data, _ = synthetic_conllu(args.unique, seed=1)
+                unique = [sentence_annotation(x)["text"] for x in parse_conllu(data)]
+            target = HttpTarget(args.target, args.endpoint)
+
+        try:
+            report = cold_and_warm(
+                target,
+                make_corpus(unique, args.requests),
+                qps=args.qps,
+                concurrency=args.concurrency,
+                rss_pid=args.pid,
+                rss_interval=args.rss_interval,
+            )
+        finally:
+            if http_server is not None:
+                http_server.shutdown()
+                http_server.server_close()
+
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    _print_report("cold", report["cold"])
+    _print_report("warm", report["warm"])
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Offline microbenchmarks. Real UDPipe and CatBoost models are replaced with
+synthetic parsed sentences and a tiny segmenter trained on them, so the suite
+runs anywhere without the files under resources/.
+
+    python -m benchmarks.run -o results.json
+    python -m benchmarks.run -o new.json --compare results.json
+
+Every benchmark is timed per call at several input sizes; with --compare the
+medians are compared to a previous run and the exit code is 1 if any of them
+got slower than --threshold times.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+
+from srl_toolkit.clause_segmenter import ClauseSegmenterProcessor
+from srl_toolkit.clause_segmenter.feature_extractor import FeatureExtractor
+from srl_toolkit.conllu_reader import parse_conllu, sentence_annotation
+from srl_toolkit.labeler import SrlLabeler
+from srl_toolkit.pa_extractor import ArgumentExtractor
+from srl_toolkit.ruleset import Rule, Ruleset
+from srl_toolkit.store import StoreReader, StoreWriter
+
+from .synthetic import (
+    StubParser,
+    StubPipeline,
+    document_annotation,
+    stub_clause_extractor,
+    synthetic_conllu,
+    train_segmenter,
+)
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, sizes: list):
+    """
+    Registers a benchmark. The decorated function gets the context and a size
+    (or another parameter) and returns the callable to time.
+    """
+
+    def decorator(setup: Callable):
+        BENCHMARKS[name] = (setup, sizes)
+        return setup
+
+    return decorator
+
+
+class Context:
+    def __init__(self, workdir: str, model_path: str | None = None):
+        self.workdir = workdir
+        self.model_path = model_path or train_segmenter(
+            os.path.join(workdir, "segmenter.cbm")
+        )
+        self._sentences = {}
+        self._segmenter = None
+
+    def sentences(self, n: int, seed: int = 1) -> list:
+        if (n, seed) not in self._sentences:
+            data, _ = synthetic_conllu(n, seed=seed)
+            self._sentences[n, seed] = list(parse_conllu(data))
+        return self._sentences[n, seed]
+
+    @property
+    def segmenter(self) -> ClauseSegmenterProcessor:
+        if self._segmenter is None:
+            self._segmenter = ClauseSegmenterProcessor(self.model_path)
+        return self._segmenter
+
+    def predicate_arguments(self, n: int) -> list[dict]:
+        result = []
+        extractor = ArgumentExtractor()
+        for sentence in self.sentences(n):
+            annotation = sentence_annotation(sentence)
+            result.append(
+                {
+                    "predicate_arguments": extractor.predicate_arguments(
+                        annotation["tokens"],
+                        annotation["postag"][0],
+                        annotation["morph"][0],
+                        annotation["lemma"][0],
+                        annotation["syntax_dep_tree"][0],
+                    )
+                }
+            )
+        return result
+
+
+@benchmark("feature_extractor", sizes=[1, 10, 50])
+def bench_feature_extractor(ctx: Context, n: int):
+    sentences = ctx.sentences(n)
+    extractor = FeatureExtractor()
+    return lambda: extractor(sentences)
+
+
+@benchmark("build_discourse_units", sizes=[10, 100, 1000])
+def bench_build_discourse_units(ctx: Context, n: int):
+    annotation = document_annotation(ctx.sentences(n))
+    numbers = ctx.segmenter._model.predict(
+        ctx.segmenter._feature_extractor(ctx.sentences(n))
+    )
+    numbers = np.argwhere(np.array(numbers) == 1)[:, 0]
+    return lambda: ClauseSegmenterProcessor._build_discourse_units(
+        None, annotation["text"], annotation["tokens"], numbers
+    )
+
+
+@benchmark("clause_segmenter", sizes=[1, 10, 50])
+def bench_clause_segmenter(ctx: Context, n: int):
+    annotation = document_annotation(ctx.sentences(n))
+    segmenter = ctx.segmenter
+    return lambda: segmenter(
+        annotation["text"],
+        annotation["tokens"],
+        annotation["sentences"],
+        annotation["lemma"],
+        annotation["morph"],
+        annotation["postag"],
+        annotation["syntax_dep_tree"],
+    )
+
+
+@benchmark("argument_extractor", sizes=[1, 10, 100])
+def bench_argument_extractor(ctx: Context, n: int):
+    annotations = [sentence_annotation(x) for x in ctx.sentences(n)]
+    extractor = ArgumentExtractor()
+
+    def run():
+        for annotation in annotations:
+            extractor.predicate_arguments(
+                annotation["tokens"],
+                annotation["postag"][0],
+                annotation["morph"][0],
+                annotation["lemma"][0],
+                annotation["syntax_dep_tree"][0],
+            )
+
+    return run
+
+
+@benchmark("ruleset", sizes=[10, 100, 1000])
+def bench_ruleset(ctx: Context, n: int):
+    pas = ctx.predicate_arguments(n)
+    rulesets = [
+        Ruleset(
+            predicate_rule=Rule(pattern={"lemma": lemma}),
+            argument_rules={
+                "агенс": [Rule(pattern={"Case": "Nom", "postag": "NOUN"})],
+                "пациенс": [Rule(pattern={"Case": "Acc"})],
+                "локатив": [Rule(pattern={"preposition": ["в", "на"]})],
+            },
+        )
+        for lemma in ["мыть", "читать", "видеть", "строить", "любить", "искать"]
+    ]
+    labeler = SrlLabeler(rulesets)
+    return lambda: [labeler(x) for x in pas]
+
+
+@benchmark("cache_hit", sizes=[10, 100])
+def bench_cache_hit(ctx: Context, n: int):
+    sentences = ctx.sentences(n)
+    extractor = stub_clause_extractor(
+        StubPipeline(StubParser(sentences), ctx.segmenter),
+        tempfile.mkdtemp(dir=ctx.workdir),
+    )
+    texts = [sentence_annotation(x)["text"] for x in sentences]
+    for text in texts:
+        extractor(text)
+    return lambda: [extractor(text) for text in texts]
+
+
+@benchmark("cache_miss", sizes=[1, 10])
+def bench_cache_miss(ctx: Context, n: int):
+    sentences = ctx.sentences(n)
+    extractor = stub_clause_extractor(
+        StubPipeline(StubParser(sentences), ctx.segmenter),
+        tempfile.mkdtemp(dir=ctx.workdir),
+    )
+    texts = [sentence_annotation(x)["text"] for x in sentences]
+
+    def run():
+        extractor.cache.clear()
+        for text in texts:
+            extractor(text)
+
+    return run
+
+
+@benchmark("cache_roundtrip", sizes=[10, 100, 1000])
+def bench_cache_roundtrip(ctx: Context, n: int):
+    extractor = stub_clause_extractor(None, tempfile.mkdtemp(dir=ctx.workdir))
+    value = {"clauses": ["Мама мыла раму, ", "а папа курил."]}
+    counter = iter(range(sys.maxsize))
+
+    def run():
+        keys = [extractor._cache_key(str(next(counter))) for _ in range(n)]
+        for key in keys:
+            extractor.cache[key] = value
+        for key in keys:
+            extractor.cache.get(key)
+
+    return run
+
+
+@benchmark("store_roundtrip", sizes=[10, 100, 1000])
+def bench_store_roundtrip(ctx: Context, n: int):
+    clauses = ctx.predicate_arguments(n)
+
+    def run():
+        path = tempfile.mkdtemp(dir=ctx.workdir)
+        with StoreWriter(path) as writer:
+            writer.extend(clauses)
+        for _ in StoreReader(path):
+            pass
+
+    return run
+
+
+@benchmark(
+    "import",
+    sizes=[
+        "srl_toolkit.extractor",
+        "srl_toolkit.labeler",
+        "srl_toolkit.cli",
+        "srl_toolkit.clause_segmenter",
+    ],
+)
+def bench_import(ctx: Context, module: str):
+    """
+    Startup of a fresh interpreter importing the module, as paid by every CLI
+    invocation and spawned worker
+    """
+    command = [sys.executable, "-c", f"import {module}"]
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return lambda: subprocess.run(command, cwd=cwd, check=True)
+
+
+def measure(fn: Callable, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """
+    Times fn, calling it `number` times per repeat, where number is chosen so
+    that a repeat takes at least min_time. Returns seconds per call.
+    """
+    _t1 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - _t1
+    number = max(1, int(min_time / elapsed)) if elapsed > 0 else 1000
+    timings = []
+    for _ in range(repeat):
+        _t1 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - _t1) / number)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "mean": statistics.mean(timings),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    ctx: Context,
+    pattern: str | None = None,
+    repeat: int = 5,
+    min_time: float = 0.05,
+    quick: bool = False,
+) -> dict:
+    results = {}
+    for name, (setup, sizes) in BENCHMARKS.items():
+        for size in sizes[:2] if quick else sizes:
+            key = f"{name}[{size}]"
+            if pattern and not re.search(pattern, key):
+                continue
+            results[key] = measure(setup(ctx, size), repeat, min_time)
+            print(f"{key:32} {results[key]['median'] * 1000:10.3f} ms", flush=True)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict, threshold: float = 1.2) -> list[str]:
+    """
+    Prints the ratio of new to old medians, returns the slower benchmarks
+    """
+    regressions = []
+    for key, result in new["results"].items():
+        if key not in old["results"]:
+            continue
+        ratio = result["median"] / old["results"][key]["median"]
+        marker = ""
+        if ratio > threshold:
+            regressions.append(key)
+            marker = "  SLOWER"
+        elif ratio < 1 / threshold:
+            marker = "  faster"
+        print(f"{key:32} {ratio:6.2f}x{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-o", "--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("-k", "--pattern", help="Only run matching benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--quick", action="store_true", help="Two smallest sizes")
+    parser.add_argument("--model", help="Segmenter .cbm instead of training one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = Context(workdir, args.model)
+        results = run_benchmarks(
+            ctx, args.pattern, args.repeat, args.min_time, args.quick
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {baseline['meta'].get('commit')}:")
+        if compare(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Stand-ins for the real models: a generator of synthetic parsed Russian
+sentences, a stub parser replaying their annotations and a tiny CatBoost
+segmenter trained on them
+"""
+from __future__ import annotations
+
+import os
+import random
+
+import numpy as np
+import pandas as pd
+from isanlp.annotation import Sentence, Token
+
+from srl_toolkit.clause_segmenter import ClauseSegmenterProcessor
+from srl_toolkit.clause_segmenter.feature_extractor import FeatureExtractor
+from srl_toolkit.conllu_reader import parse_conllu, sentence_annotation
+from srl_toolkit.extractor import ClauseExtractor
+
+NOUNS = [
+    ("мама", "Anim", "Fem"),
+    ("папа", "Anim", "Masc"),
+    ("кот", "Anim", "Masc"),
+    ("рама", "Inan", "Fem"),
+    ("стол", "Inan", "Masc"),
+    ("окно", "Inan", "Neut"),
+    ("книга", "Inan", "Fem"),
+    ("город", "Inan", "Masc"),
+]
+VERBS = ["мыть", "читать", "видеть", "строить", "любить", "искать"]
+ADJECTIVES = ["новый", "старый", "большой", "красный"]
+PREPOSITIONS = [("в", "Loc"), ("на", "Loc"), ("из", "Gen"), ("к", "Dat")]
+CONJUNCTIONS = ["а", "и", "но"]
+
+
+def _noun(rng, case: str) -> tuple[str, str, str, str]:
+    lemma, animacy, gender = rng.choice(NOUNS)
+    feats = f"Animacy={animacy}|Case={case}|Gender={gender}|Number=Sing"
+    return lemma, lemma, "NOUN", feats
+
+
+def _clause(rng, first: bool) -> tuple[list[tuple], int]:
+    """
+    Returns words of one clause as (form, lemma, upos, feats, head, deprel)
+    with heads as indices inside the clause, and the index of the predicate
+    (whose head is left as None)
+    """
+    words = []
+    if not first:
+        conjunction = rng.choice(CONJUNCTIONS)
+        words.append((",", ",", "PUNCT", "_", "predicate", "punct"))
+        words.append((conjunction, conjunction, "CCONJ", "_", "predicate", "cc"))
+    words.append((*_noun(rng, "Nom"), "predicate", "nsubj"))
+    predicate = len(words)
+    verb = rng.choice(VERBS)
+    feats = "Aspect=Imp|Mood=Ind|Number=Sing|Tense=Past|VerbForm=Fin|Voice=Act"
+    words.append((verb, verb, "VERB", feats, None, "root" if first else "conj"))
+    if rng.random() < 0.5:
+        adjective = rng.choice(ADJECTIVES)
+        words.append((adjective, adjective, "ADJ", "Case=Acc", "next", "amod"))
+    words.append((*_noun(rng, "Acc"), "predicate", "obj"))
+    if rng.random() < 0.5:
+        preposition, case = rng.choice(PREPOSITIONS)
+        words.append((preposition, preposition, "ADP", "_", "next", "case"))
+        words.append((*_noun(rng, case), "predicate", "obl"))
+
+    resolved = []
+    for i, (form, lemma, upos, feats, head, deprel) in enumerate(words):
+        head = {"predicate": predicate, "next": i + 1}.get(head)
+        resolved.append((form, lemma, upos, feats, head, deprel))
+    return resolved, predicate
+
+
+def synthetic_conllu(
+    n_sentences: int, clauses_per_sentence: int = 3, seed: int = 0
+) -> tuple[str, list[list[int]]]:
+    """
+    Generates CoNLL-U with n_sentences sentences of clauses_per_sentence
+    clauses each. Returns the CoNLL-U text and, for every sentence, the
+    indices of the words starting a clause.
+    """
+    rng = random.Random(seed)
+    lines = []
+    boundaries = []
+    for sentence_id in range(n_sentences):
+        words = []
+        starts = []
+        root = None
+        for clause_id in range(clauses_per_sentence):
+            offset = len(words)
+            clause, predicate = _clause(rng, clause_id == 0)
+            # the comma stays with the previous clause, as in the real segmenter
+            starts.append(offset if clause_id == 0 else offset + 1)
+            for form, lemma, upos, feats, head, deprel in clause:
+                if head is None:
+                    head = 0 if root is None else root
+                else:
+                    head += offset + 1
+                words.append([form, lemma, upos, feats, head, deprel, "_"])
+            if root is None:
+                root = predicate + 1
+        words.append([".", ".", "PUNCT", "_", root, "punct", "_"])
+        words[0][0] = words[0][0].capitalize()
+        for word, next_word in zip(words, words[1:]):
+            if next_word[2] == "PUNCT":
+                word[6] = "SpaceAfter=No"
+
+        text = "".join(w[0] + ("" if w[6] != "_" else " ") for w in words).strip()
+        lines.append(f"# sent_id = {sentence_id + 1}")
+        lines.append(f"# text = {text}")
+        for i, word in enumerate(words):
+            form, lemma, upos, feats, head, deprel, misc = word
+            lines.append(
+                f"{i + 1}\t{form}\t{lemma}\t{upos}\t_\t{feats}\t{head}\t{deprel}\t_\t{misc}"
+            )
+        lines.append("")
+        boundaries.append(starts)
+    return "\n".join(lines) + "\n", boundaries
+
+
+def train_segmenter(path: str, n_sentences: int = 50, seed: int = 0) -> str:
+    """
+    Trains a tiny CatBoost clause segmenter on synthetic sentences and saves
+    it to path, unless it already exists
+    """
+    if os.path.exists(path):
+        return path
+    import catboost
+
+    data, boundaries = synthetic_conllu(n_sentences, seed=seed)
+    sentences = list(parse_conllu(data))
+    features = FeatureExtractor()(sentences)
+    labels = np.zeros(len(features), dtype=int)
+    position = 0
+    for sentence, starts in zip(sentences, boundaries):
+        labels[[position + start for start in starts]] = 1
+        position += len(sentence)
+
+    cat_features = [
+        i
+        for i, column in enumerate(features.columns)
+        if not pd.api.types.is_numeric_dtype(features[column])
+    ]
+    model = catboost.CatBoostClassifier(
+        iterations=30,
+        depth=4,
+        verbose=False,
+        random_seed=seed,
+        thread_count=1,
+        allow_writing_files=False,
+    )
+    model.fit(features.values, labels, cat_features=cat_features)
+    model.save_model(path)
+    return path
+
+
+def document_annotation(sentences) -> dict:
+    """
+    Joins sentences from parse_conllu into one isanlp-style document
+    annotation, as UDPipe would produce for the whole text
+    """
+    document = {
+        "text": "",
+        "tokens": [],
+        "sentences": [],
+        "lemma": [],
+        "morph": [],
+        "postag": [],
+        "syntax_dep_tree": [],
+    }
+    for sentence in sentences:
+        annotation = sentence_annotation(sentence)
+        if document["text"]:
+            document["text"] += " "
+        offset = len(document["text"])
+        document["text"] += annotation["text"]
+        begin = len(document["tokens"])
+        document["tokens"] += [
+            Token(t.text, t.begin + offset, t.end + offset)
+            for t in annotation["tokens"]
+        ]
+        document["sentences"].append(Sentence(begin, len(document["tokens"])))
+        for key in ("lemma", "morph", "postag", "syntax_dep_tree"):
+            document[key] += annotation[key]
+    return document
+
+
+class StubParser:
+    """
+    Replays recorded annotations of the synthetic sentences instead of
+    running UDPipe and Mystem. Returns the same fields as the real pipeline
+    before the segmenter.
+    """
+
+    def __init__(self, sentences):
+        self.annotations = {}
+        for sentence in sentences:
+            annotation = sentence_annotation(sentence)
+            self.annotations[annotation["text"]] = annotation
+
+    def __call__(self, text: str) -> dict:
+        return self.annotations[text]
+
+
+class StubPipeline:
+    """
+    Stub parser followed by the real ClauseSegmenterProcessor
+    """
+
+    def __init__(self, parser: StubParser, segmenter: ClauseSegmenterProcessor):
+        self.parser = parser
+        self.segmenter = segmenter
+
+    def __call__(self, text: str) -> dict:
+        annotation = self.parser(text)
+        clauses = self.segmenter(
+            annotation["text"],
+            annotation["tokens"],
+            annotation["sentences"],
+            annotation["lemma"],
+            annotation["morph"],
+            annotation["postag"],
+            annotation["syntax_dep_tree"],
+        )
+        return {"tokens": annotation["tokens"], "clauses": clauses}
+
+
+def stub_clause_extractor(
+    pipeline: StubPipeline, cache_dir: str, sentence_cache: bool = False
+) -> ClauseExtractor:
+    """
+    ClauseExtractor running the stub pipeline, with the real cache
+    """
+    extractor = ClauseExtractor.__new__(ClauseExtractor)
+    super(ClauseExtractor, extractor).__init__(cache_dir)
+    extractor.morphology = "mystem"
+    extractor.sentence_cache = sentence_cache
+    extractor.output = "text"
+    extractor.pipeline = pipeline
+    return extractor
@@ -0,0 +1,92 @@
+"""
+Compares clause segmentation with Mystem morphology against the UDPipe-only
+mode on a held-out set.
+
+The held-out set is a JSONL file with one document per line:
+    {"text": "...", "clauses": ["...", "..."]}
+Clause boundaries are compared as character offsets of clause starts.
+"""
+import argparse
+import json
+import logging
+import tempfile
+import time
+
+from rich.logging import RichHandler
+
+from srl_toolkit.extractor import ClauseExtractor
+
+logging.basicConfig(
+    level="INFO",
+    format="%(message)s",
+    datefmt="[%X]",
+    handlers=[RichHandler(rich_tracebacks=True)],
+)
+
+logger = logging.getLogger(__name__)
+
+
+def boundaries(text: str, clauses: list[str]) -> set[int]:
+    result = set()
+    position = 0
+    for clause in clauses:
+        start = text.find(clause.strip(), position)
+        if start == -1:
+            continue
+        result.add(start)
+        position = start + len(clause.strip())
+    return result
+
+
+def f1(gold: set[int], predicted: set[int]) -> tuple[float, float, float]:
+    tp = len(gold & predicted)
+    precision = tp / len(predicted) if predicted else 0.0
+    recall = tp / len(gold) if gold else 0.0
+    f = 2 * precision * recall / (precision + recall) if tp else 0.0
+    return precision, recall, f
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("heldout", help="JSONL file with text and gold clauses")
+    parser.add_argument(
+        "--udpipe-path", default="./resources/russian-syntagrus-ud-2.5-191206.udpipe"
+    )
+    parser.add_argument("--cb-path", default="./resources/catboost_model.cbm")
+    args = parser.parse_args()
+
+    with open(args.heldout) as f:
+        documents = [json.loads(line) for line in f if line.strip()]
+
+    scores = {}
+    predictions = {}
+    for mode in ClauseExtractor.MORPHOLOGY_MODES:
+        extractor = ClauseExtractor(
+            udpipe_path=args.udpipe_path,
+            cb_path=args.cb_path,
+            cache_dir=tempfile.mkdtemp(),
+            morphology=mode,
+        )
+        gold, predicted = set(), set()
+        predictions[mode] = []
+        _t1 = time.time()
+        for i, doc in enumerate(documents):
+            clauses = extractor(doc["text"])["clauses"]
+            doc_predicted = boundaries(doc["text"], clauses)
+            predictions[mode].append(doc_predicted)
+            gold |= {(i, x) for x in boundaries(doc["text"], doc["clauses"])}
+            predicted |= {(i, x) for x in doc_predicted}
+        elapsed = time.time() - _t1
+        scores[mode] = (*f1(gold, predicted), elapsed / max(len(documents), 1))
+
+    for mode, (precision, recall, f, latency) in scores.items():
+        logger.info(
+            f"{mode:>7}: P={precision:.4f} R={recall:.4f} F1={f:.4f} "
+            f"latency={latency * 1000:.1f} ms/doc"
+        )
+
+    agreement = f1(
+        {(i, x) for i, doc in enumerate(predictions["mystem"]) for x in doc},
+        {(i, x) for i, doc in enumerate(predictions["udpipe"]) for x in doc},
+    )
+    logger.info(f"Boundary agreement between modes: F1={agreement[2]:.4f}")
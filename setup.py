@@ -12,6 +12,9 @@ with Path('requirements.txt').open() as requirements_txt:
 setup(
     name='srl_toolkit',
     version='0.1',
-    packages=["srl_toolkit"],
+    packages=find_packages(include=["srl_toolkit", "srl_toolkit.*"]),
     install_requires=install_requires,
+    entry_points={
+        "console_scripts": ["srl-toolkit=srl_toolkit.cli:main"],
+    },
 )
\ No newline at end of file
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent awaits for the same key into one computation.
+    Cancelling an awaiter does not affect the others; the computation itself
+    is cancelled only when every awaiter of it has been cancelled.
+    """
+
+    def __init__(self):
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._waiters: dict[asyncio.Future, int] = {}
+
+    def get(self, key: Hashable) -> asyncio.Future | None:
+        return self._inflight.get((asyncio.get_running_loop(), key))
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable]) -> asyncio.Future:
+        """
+        Starts the computation for the key, unless one is already in flight
+        """
+        future = self.get(key)
+        if future is not None:
+            return future
+        _key = (asyncio.get_running_loop(), key)
+        future = asyncio.ensure_future(factory())
+        self._inflight[_key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(_key, None))
+        return future
+
+    async def wait(self, future: asyncio.Future):
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._waiters[future] == 1 and not future.done():
+                future.cancel()
+            raise
+        finally:
+            self._waiters[future] -= 1
+            if not self._waiters[future]:
+                del self._waiters[future]
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable]):
+        return await self.wait(self.start(key, factory))
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import collections
+import gc
+import json
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+from srl_toolkit.ruleset import Ruleset
+
+from .cache import open_cache
+from .extractor import ClauseExtractor, PredicateArgumentExtractor
+from .labeler import CascadeLabeler, NeuralLabeler, SrlLabeler
+
+logger = logging.getLogger(__name__)
+
+
+def load_rulesets(path: str) -> list[Ruleset]:
+    """
+    Loads rulesets from a JSON file with a list of Ruleset.to_dict() objects
+    """
+    with open(path) as f:
+        return [Ruleset.from_dict(data) for data in json.load(f)]
+
+
+class Annotator:
+    """
+    Full annotation of a document: clause extraction, predicate-argument
+    extraction and (optionally) role labeling with rules and/or a neural model.
+    """
+
+    def __init__(
+        self,
+        udpipe_path: str,
+        cb_path: str,
+        rulesets_path: str | None = None,
+        neural_model: str | None = None,
+        cache_dir: str = "~/.cache/srl_toolkit",
+        morphology: str = "mystem",
+        lazy: bool = False,
+        cache_shards: int | None = None,
+        cache_size_limit: int | None = None,
+        cache_eviction_policy: str | None = None,
+        cache_ttl: float | None = None,
+    ):
+        """
+        :param lazy: load the models on first use or on warmup() instead of in
+            the constructor
+        :param cache_shards: shard the cache shared by all components over
+            this many SQLite files, for many processes writing to it. Defaults
+            to the layout of an existing cache, or to 1.
+        :param cache_size_limit: cache size in bytes before eviction starts
+        :param cache_eviction_policy: one of cache.EVICTION_POLICIES
+        :param cache_ttl: seconds after which cached results expire
+        """
+        self.cache = open_cache(
+            cache_dir,
+            shards=cache_shards,
+            size_limit=cache_size_limit,
+            eviction_policy=cache_eviction_policy,
+        )
+        self.clause_extractor = ClauseExtractor(
+            udpipe_path=udpipe_path,
+            cb_path=cb_path,
+            cache_dir=self.cache,
+            morphology=morphology,
+            lazy=lazy,
+            cache_ttl=cache_ttl,
+        )
+        self.pa_extractor = PredicateArgumentExtractor(
+            udpipe_path=udpipe_path,
+            cache_dir=self.cache,
+            lazy=lazy,
+            cache_ttl=cache_ttl,
+        )
+        self.srl_labeler = (
+            SrlLabeler(load_rulesets(rulesets_path)) if rulesets_path else None
+        )
+        self.neural_labeler = (
+            NeuralLabeler(
+                neural_model,
+                good_lemmas=None,
+                cache_dir=self.cache,
+                lazy=lazy,
+                cache_ttl=cache_ttl,
+            )
+            if neural_model
+            else None
+        )
+        self.cascade_labeler = (
+            CascadeLabeler(self.pa_extractor, self.srl_labeler, self.neural_labeler)
+            if self.srl_labeler and self.neural_labeler
+            else None
+        )
+
+    def __call__(self, text: str) -> dict[str, any]:
+        clauses = self.clause_extractor(text)["clauses"]
+        result = [
+            {
+                "text": clause,
+                "predicate_arguments": self.pa_extractor(clause)["predicate_arguments"],
+            }
+            for clause in clauses
+        ]
+        if self.cascade_labeler is not None:
+            for item, labeled in zip(result, self.cascade_labeler(clauses)):
+                item["source"] = labeled["source"]
+                item["labels"] = labeled["labels"]
+        elif self.srl_labeler is not None:
+            for item in result:
+                item["labeled"] = self.srl_labeler(item)["labeled"]
+        elif self.neural_labeler is not None:
+            for item, labeled in zip(result, self.neural_labeler(clauses)):
+                item["predictions"] = labeled["predictions"]
+        return {"clauses": result}
+
+    @property
+    def _components(self) -> list:
+        return [
+            x
+            for x in (self.clause_extractor, self.pa_extractor, self.neural_labeler)
+            if x is not None
+        ]
+
+    def warmup(self, background: bool = False) -> list[threading.Thread]:
+        """
+        Loads the models of all components, concurrently in daemon threads if
+        background is True. Returns the threads.
+        """
+        threads = [
+            component.warmup(background=background) for component in self._components
+        ]
+        return [thread for thread in threads if thread is not None]
+
+    def before_fork(self):
+        for component in self._components:
+            component.before_fork()
+
+    def after_fork(self):
+        for component in self._components:
+            component.after_fork()
+
+
+_annotator: Annotator | None = None
+
+
+def _init_worker(annotator_kwargs: dict[str, any]):
+    global _annotator
+    _annotator = Annotator(**annotator_kwargs)
+
+
+def _init_forked_worker(ready):
+    _annotator.after_fork()
+    ready.put(os.getpid())
+
+
+def _prefork_pool(
+    annotator_kwargs: dict[str, any], processes: int, ready_timeout: float
+) -> mp.pool.Pool:
+    """
+    Loads the models once in the parent and forks the workers, which share
+    the read-only model memory copy-on-write (torch weights are moved to
+    shared memory). Returns once every worker has signalled readiness.
+    """
+    global _annotator
+    _t1 = time.time()
+    _annotator = Annotator(**annotator_kwargs)
+    _annotator.before_fork()
+    logger.info(f"Loaded models in {time.time() - _t1:.2f} seconds, forking workers")
+    # keep objects loaded so far out of the cyclic GC, whose bookkeeping writes
+    # would otherwise copy their pages in every worker
+    gc.freeze()
+
+    ctx = mp.get_context("fork")
+    ready = ctx.Queue()
+    pool = ctx.Pool(processes, initializer=_init_forked_worker, initargs=(ready,))
+    deadline = time.time() + ready_timeout
+    for _ in range(processes):
+        try:
+            ready.get(timeout=max(deadline - time.time(), 0))
+        except Exception:
+            pool.terminate()
+            raise RuntimeError(f"Workers were not ready in {ready_timeout} seconds")
+    logger.info(f"{processes} workers ready in {time.time() - _t1:.2f} seconds")
+    return pool
+
+
+def _annotate(record: dict[str, any], text_field: str = "text") -> dict[str, any]:
+    return {**record, "annotation": _annotator(record[text_field])}
+
+
+def _prewarm(record: dict[str, any], text_field: str = "text"):
+    _annotator(record[text_field])
+
+
+def annotate_stream(
+    records: Iterable[dict[str, any]],
+    annotator_kwargs: dict[str, any],
+    processes: int = 1,
+    max_pending: int | None = None,
+    text_field: str = "text",
+    prefork: bool = False,
+    ready_timeout: float = 600.0,
+) -> Iterator[dict[str, any]]:
+    """
+    Annotates a stream of records in a pool of worker processes, each loading
+    the models once (or sharing the parent's models with prefork=True).
+    Results are yielded in input order; at most max_pending records are in
+    flight, so memory stays bounded for arbitrarily long inputs.
+    """
+    return _map_records(
+        _annotate,
+        records,
+        annotator_kwargs,
+        processes,
+        max_pending,
+        text_field,
+        prefork,
+        ready_timeout,
+    )
+
+
+def prewarm(
+    texts: Iterable[str],
+    annotator_kwargs: dict[str, any],
+    processes: int = 1,
+    max_pending: int | None = None,
+    prefork: bool = False,
+    ready_timeout: float = 600.0,
+) -> int:
+    """
+    Runs the full annotation over the texts in a pool of worker processes
+    only to fill the caches; results are not sent back to the parent. Returns
+    the number of texts processed.
+    """
+    n_texts = 0
+    for _ in _map_records(
+        _prewarm,
+        ({"text": text} for text in texts),
+        annotator_kwargs,
+        processes,
+        max_pending,
+        "text",
+        prefork,
+        ready_timeout,
+    ):
+        n_texts += 1
+        if n_texts % 1000 == 0:
+            logger.info(f"Prewarmed {n_texts} texts")
+    return n_texts
+
+
+def _map_records(
+    task: Callable,
+    records: Iterable[dict[str, any]],
+    annotator_kwargs: dict[str, any],
+    processes: int,
+    max_pending: int | None,
+    text_field: str,
+    prefork: bool,
+    ready_timeout: float,
+) -> Iterator:
+    if processes <= 0:
+        _init_worker(annotator_kwargs)
+        for record in records:
+            yield task(record, text_field)
+        return
+
+    max_pending = max_pending or processes * 4
+    if prefork:
+        pool = _prefork_pool(annotator_kwargs, processes, ready_timeout)
+    else:
+        pool = mp.Pool(
+            processes, initializer=_init_worker, initargs=(annotator_kwargs,)
+        )
+    with pool:
+        pending = collections.deque()
+        for record in records:
+            pending.append(pool.apply_async(task, (record, text_field)))
+            if len(pending) >= max_pending:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
@@ -0,0 +1,163 @@
+"""
+Opening, sharding and snapshots of the result caches
+"""
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import pickle
+import time
+from contextlib import nullcontext
+
+from diskcache import Cache, FanoutCache
+
+logger = logging.getLogger(__name__)
+
+EVICTION_POLICIES = (
+    "least-recently-stored",
+    "least-recently-used",
+    "least-frequently-used",
+    "none",
+)
+SNAPSHOT_FORMAT = "srl-toolkit-cache"
+SNAPSHOT_VERSION = 1
+
+
+def shard_count(directory: str) -> int | None:
+    """
+    Number of shards of the cache in the directory, 1 for a plain Cache and
+    None if there is no cache yet
+    """
+    directory = os.path.expanduser(directory)
+    if not os.path.isdir(directory):
+        return None
+    shards = [
+        name
+        for name in os.listdir(directory)
+        if len(name) == 3
+        and name.isdigit()
+        and os.path.exists(os.path.join(directory, name, "cache.db"))
+    ]
+    if shards:
+        return len(shards)
+    if os.path.exists(os.path.join(directory, "cache.db")):
+        return 1
+    return None
+
+
+def open_cache(
+    directory: str,
+    shards: int | None = None,
+    size_limit: int | None = None,
+    eviction_policy: str | None = None,
+) -> Cache | FanoutCache:
+    """
+    Opens a Cache, or a FanoutCache of `shards` SQLite files when several
+    processes write to it, so that writers mostly lock different files.
+
+    :param shards: defaults to the layout of the existing cache, or to 1 for
+        a new one. Keys are assigned to shards by the shard count, so a
+        different count than the existing one raises ValueError.
+    :param size_limit: bytes kept before the least valuable entries are
+        evicted (across all shards), diskcache defaults to 1 GB
+    :param eviction_policy: one of EVICTION_POLICIES, "none" never evicts
+    """
+    existing = shard_count(directory)
+    if shards is None:
+        shards = existing or 1
+    elif existing is not None and existing != shards:
+        raise ValueError(
+            f"The cache in {directory} has {existing} shard(s), not {shards}; "
+            "move entries between layouts with export_snapshot/import_snapshot"
+        )
+    if eviction_policy is not None and eviction_policy not in EVICTION_POLICIES:
+        raise ValueError(
+            f"Unknown eviction policy {eviction_policy!r}, "
+            f"expected one of {EVICTION_POLICIES}"
+        )
+    settings = {}
+    if size_limit is not None:
+        settings["size_limit"] = size_limit
+    if eviction_policy is not None:
+        settings["eviction_policy"] = eviction_policy
+    if shards > 1:
+        return FanoutCache(directory, shards=shards, **settings)
+    return Cache(directory, **settings)
+
+
+def as_cache(cache: str | Cache | FanoutCache) -> Cache | FanoutCache:
+    """
+    Returns the cache itself, or opens the cache in the given directory
+    """
+    if isinstance(cache, (Cache, FanoutCache)):
+        return cache
+    return open_cache(cache)
+
+
+def transaction(cache: Cache | FanoutCache):
+    """
+    Groups the reads or writes made in the block into one SQLite transaction
+    of a Cache. FanoutCache.transact() would lock every shard at once, so on
+    a FanoutCache the operations run one by one instead.
+    """
+    if isinstance(cache, FanoutCache):
+        return nullcontext()
+    return cache.transact()
+
+
+def export_snapshot(cache: Cache | FanoutCache, path: str) -> int:
+    """
+    Writes all live entries with their expiration times to a gzipped pickle
+    stream, which import_snapshot() loads into a cache of any shard count.
+    Returns the number of entries written.
+    """
+    n_entries = 0
+    with gzip.open(path, "wb") as f:
+        pickle.dump({"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION}, f)
+        for key in cache:
+            value, expire_time = cache.get(key, expire_time=True)
+            if value is None:
+                continue
+            pickle.dump((key, value, expire_time), f)
+            n_entries += 1
+        pickle.dump(None, f)
+    logger.info(f"Exported {n_entries} cache entries to {path}")
+    return n_entries
+
+
+def import_snapshot(
+    cache: Cache | FanoutCache, path: str, expire: float | None = None
+) -> int:
+    """
+    Loads a snapshot written by export_snapshot() into the cache, skipping
+    entries that have expired since. Returns the number of entries stored.
+
+    :param expire: seconds after which the imported entries expire at the
+        latest, entries expiring sooner keep their expiration time
+    """
+    n_entries = 0
+    with gzip.open(path, "rb") as f:
+        header = pickle.load(f)
+        if (
+            not isinstance(header, dict)
+            or header.get("format") != SNAPSHOT_FORMAT
+            or header.get("version") != SNAPSHOT_VERSION
+        ):
+            raise ValueError(f"{path} is not a cache snapshot")
+        while True:
+            entry = pickle.load(f)
+            if entry is None:
+                break
+            key, value, expire_time = entry
+            remaining = expire
+            if expire_time is not None:
+                remaining = expire_time - time.time()
+                if remaining <= 0:
+                    continue
+                if expire is not None:
+                    remaining = min(remaining, expire)
+            cache.set(key, value, expire=remaining, retry=True)
+            n_entries += 1
+    logger.info(f"Imported {n_entries} cache entries from {path}")
+    return n_entries
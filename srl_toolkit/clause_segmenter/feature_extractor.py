@@ -143,7 +143,6 @@ class FeatureExtractor:
         ]
 
     def __call__(self, sentences):
-        self.sentences = sentences
         df = self.to_dataframe(sentences)
         features = FeatureExtractor.process_dataframe(df, self._all_features)
         # features = FeatureExtractor._add_ancestor_features(features, 2,
@@ -346,13 +345,13 @@ class FeatureExtractor:
 
         return dataframe
 
-    def _func_anc(self, d):
+    def _func_anc(self, d, sentences):
         features = FeatureExtractor._add_ancestor_features(
             d,
             2,
             self.ancestor_categorical_features,
             self.ancestor_other_features,
-            self.sentences,
+            sentences,
         )
         return features
 
@@ -363,7 +362,7 @@ class FeatureExtractor:
         # features = FeatureExtractor._add_ancestor_features(features, 2,
         #                                                    self.ancestor_categorical_features,
         #                                                    self.ancestor_other_features,
-        #                                                    self.sentences)
+        #                                                    sentences)
         return features
 
     @staticmethod
@@ -1,8 +1,13 @@
+import itertools
+
 import conllu
 import numpy as np
 from isanlp import PipelineCommon
 from isanlp.annotation_rst import DiscourseUnit
 
+from .. import metrics
+from ..conllu_reader import iter_conllu, sentence_annotation
+from ..profiling import span
 from .catboost_clf import CatBoostClf
 from .feature_extractor import FeatureExtractor
 
@@ -104,16 +109,28 @@ class AnnotationCONLLConverter:
 
 
 class ClauseSegmenterProcessor:
-    def __init__(self, model_path):
+    OUTPUT_MODES = ("units", "spans")
+
+    def __init__(self, model_path, output: str = "units"):
+        """
+        :param output: "units" returns DiscourseUnits with their text, "spans"
+            returns (first token, last token + 1, begin, end) tuples without
+            copying any text
+        """
+        if output not in self.OUTPUT_MODES:
+            raise ValueError(
+                f"Unknown output mode {output!r}, expected one of {self.OUTPUT_MODES}"
+            )
+        self.output = output
         self._model_path = model_path
         self._conll_converter = AnnotationCONLLConverter()
         self._feature_extractor = FeatureExtractor()
         self._model = CatBoostClf(model_path)
 
     @staticmethod
-    def for_pipeline(model_path: str):
+    def for_pipeline(model_path: str, output: str = "units"):
         pipeline = (
-            ClauseSegmenterProcessor(model_path=model_path),
+            ClauseSegmenterProcessor(model_path=model_path, output=output),
             [
                 "text",
                 "tokens",
@@ -149,15 +166,59 @@ class ClauseSegmenterProcessor:
             "syntax_dep_tree": annot_syntax_dep_tree,
         }
 
-        converted_annot = ""
-        for line in self._conll_converter(doc_id="0", annotation=annot):
-            converted_annot += line + "\n"
+        with span("clause_segmenter.conll"):
+            converted_annot = ""
+            for line in self._conll_converter(doc_id="0", annotation=annot):
+                converted_annot += line + "\n"
 
-        sentences = conllu.parse(converted_annot)
-        features = self._feature_extractor(sentences)
-        predictions = np.argwhere(np.array(self._model.predict(features)) == 1)[:, 0]
+            sentences = conllu.parse(converted_annot)
+        with span("clause_segmenter.features", sentences=len(sentences)):
+            features = self._feature_extractor(sentences)
+        with span("clause_segmenter.catboost", words=len(features)):
+            labels = self._model.predict(features)
+        predictions = np.argwhere(np.array(labels) == 1)[:, 0]
+        self._count(len(sentences), len(annot_tokens))
+        if self.output == "spans":
+            return self._clause_spans(annot_tokens, predictions)
         return self._build_discourse_units(annot_text, annot_tokens, predictions)
 
+    def from_conllu(self, source, batch_size: int = 64):
+        """
+        Segments pre-parsed CoNLL-U sentences (a file path or file object) into
+        clauses without running a parser. Sentences are read lazily and
+        classified in batches of batch_size, yields {"text", "clauses"} per
+        sentence.
+        """
+        sentences = (x for x in iter_conllu(source) if len(x))
+        while True:
+            batch = list(itertools.islice(sentences, batch_size))
+            if not batch:
+                return
+            with span("clause_segmenter.features", sentences=len(batch)):
+                features = self._feature_extractor(batch)
+            with span("clause_segmenter.catboost", words=len(features)):
+                labels = np.array(self._model.predict(features))
+            self._count(len(batch), len(features))
+            position = 0
+            for sentence in batch:
+                annotation = sentence_annotation(sentence)
+                predictions = labels[position : position + len(sentence)]
+                position += len(sentence)
+                yield {
+                    "text": annotation["text"],
+                    "clauses": self._build_discourse_units(
+                        annotation["text"],
+                        annotation["tokens"],
+                        np.argwhere(predictions == 1)[:, 0],
+                    ),
+                }
+
+    @staticmethod
+    def _count(n_sentences: int, n_tokens: int):
+        metrics.TEXTS.inc(component="ClauseSegmenterProcessor")
+        metrics.BATCH_SIZE.observe(n_sentences, component="ClauseSegmenterProcessor")
+        metrics.TOKENS.inc(n_tokens, component="ClauseSegmenterProcessor")
+
     @staticmethod
     def _convert_annot(annot):
         _conll_converter = AnnotationCONLLConverter()
@@ -166,6 +227,26 @@ class ClauseSegmenterProcessor:
             converted_annot += line + "\n"
         return converted_annot
 
+    @staticmethod
+    def _clause_spans(tokens, numbers) -> list[tuple[int, int, int, int]]:
+        """
+        :param list tokens: isanlp.annotation.Token
+        :param numbers: positions of tokens predicted as EDU left boundaries (beginners)
+        :return: (first token, last token + 1, begin, end) of every clause, a
+            clause ends where the next one begins and the last one at the end
+            of the last token, as in _build_discourse_units
+        """
+        spans = []
+        for i, first in enumerate(numbers):
+            if i + 1 < len(numbers):
+                last = int(numbers[i + 1])
+                end = tokens[last].begin
+            else:
+                last = len(tokens)
+                end = tokens[-1].end
+            spans.append((int(first), last, tokens[first].begin, end))
+        return spans
+
     def _build_discourse_units(self, text, tokens, numbers):
         """
         :param text: original text
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import os
+from typing import Iterator
+
+import click
+
+from . import metrics
+from .annotator import Annotator, annotate_stream, prewarm
+from .cache import (
+    EVICTION_POLICIES,
+    export_snapshot,
+    import_snapshot,
+    open_cache,
+    shard_count,
+)
+from .server import SrlServer
+
+logger = logging.getLogger(__name__)
+
+
+def _read_records(path: str, input_format: str, text_field: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if input_format == "jsonl":
+                yield json.loads(line)
+            else:
+                yield {text_field: line.rstrip("\n")}
+
+
+def _load_checkpoint(path: str) -> dict[str, int]:
+    if not os.path.exists(path):
+        return {"done": 0, "offset": 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path: str, done: int, offset: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"done": done, "offset": offset}, f)
+    os.replace(tmp_path, path)
+
+
+def _cache_options(command):
+    options = [
+        click.option("--cache-dir", default="~/.cache/srl_toolkit"),
+        click.option(
+            "--cache-shards",
+            type=int,
+            help="SQLite files to spread the cache over, for many writer "
+            "processes. Defaults to the layout of an existing cache, or to 1.",
+        ),
+        click.option(
+            "--cache-size-mb",
+            type=int,
+            help="Evict entries above this size, 1024 MB by default.",
+        ),
+        click.option("--cache-eviction", type=click.Choice(EVICTION_POLICIES)),
+        click.option("--cache-ttl", type=float, help="Expire results after seconds."),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _cache_kwargs(
+    cache_dir: str,
+    cache_shards: int | None,
+    cache_size_mb: int | None,
+    cache_eviction: str | None,
+    cache_ttl: float | None,
+) -> dict:
+    return {
+        "cache_dir": cache_dir,
+        "cache_shards": cache_shards,
+        "cache_size_limit": cache_size_mb * 2**20 if cache_size_mb else None,
+        "cache_eviction_policy": cache_eviction,
+        "cache_ttl": cache_ttl,
+    }
+
+
+def _read_texts(path: str, input_format: str | None, text_field: str) -> Iterator[str]:
+    if input_format is None:
+        input_format = "jsonl" if path.endswith(".jsonl") else "text"
+    for record in _read_records(path, input_format, text_field):
+        yield record[text_field]
+
+
+@click.group()
+@click.option("-v", "--verbose", is_flag=True, help="Enable debug logging.")
+def main(verbose: bool):
+    """Semantic role labeling toolkit for Russian."""
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO)
+
+
+@main.command()
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_path", type=click.Path(dir_okay=False))
+@click.option("--udpipe-path", required=True, type=click.Path(exists=True))
+@click.option("--cb-path", required=True, type=click.Path(exists=True))
+@click.option("--rulesets", "rulesets_path", type=click.Path(exists=True))
+@click.option("--neural-model", help="Name or path of the token classification model.")
+@click.option("--morphology", type=click.Choice(["mystem", "udpipe"]), default="mystem")
+@_cache_options
+@click.option(
+    "--input-format",
+    type=click.Choice(["jsonl", "text"]),
+    default=None,
+    help="Defaults to jsonl for *.jsonl files and to one document per line otherwise.",
+)
+@click.option("--text-field", default="text", help="Text field of JSONL records.")
+@click.option("-j", "--workers", default=os.cpu_count(), show_default=True)
+@click.option(
+    "--max-pending", type=int, help="Records in flight, 4 per worker by default."
+)
+@click.option(
+    "--prefork/--no-prefork",
+    default=False,
+    help="Load the models once and fork workers that share them.",
+)
+@click.option("--checkpoint-every", default=1000, show_default=True)
+@click.option("--resume/--no-resume", default=True, show_default=True)
+def annotate(
+    input_path: str,
+    output_path: str,
+    udpipe_path: str,
+    cb_path: str,
+    rulesets_path: str | None,
+    neural_model: str | None,
+    morphology: str,
+    cache_dir: str,
+    cache_shards: int | None,
+    cache_size_mb: int | None,
+    cache_eviction: str | None,
+    cache_ttl: float | None,
+    input_format: str | None,
+    text_field: str,
+    workers: int,
+    max_pending: int | None,
+    prefork: bool,
+    checkpoint_every: int,
+    resume: bool,
+):
+    """Annotate a corpus and write the results as JSONL in input order."""
+    if input_format is None:
+        input_format = "jsonl" if input_path.endswith(".jsonl") else "text"
+
+    checkpoint_path = f"{output_path}.checkpoint"
+    checkpoint = (
+        _load_checkpoint(checkpoint_path) if resume else {"done": 0, "offset": 0}
+    )
+    if checkpoint["done"] and not os.path.exists(output_path):
+        logger.warning(f"{output_path} is missing, starting from the beginning")
+        checkpoint = {"done": 0, "offset": 0}
+    if checkpoint["done"]:
+        logger.info(f"Resuming after {checkpoint['done']} records")
+
+    records = itertools.islice(
+        _read_records(input_path, input_format, text_field), checkpoint["done"], None
+    )
+    annotator_kwargs = {
+        "udpipe_path": udpipe_path,
+        "cb_path": cb_path,
+        "rulesets_path": rulesets_path,
+        "neural_model": neural_model,
+        "morphology": morphology,
+        **_cache_kwargs(
+            cache_dir, cache_shards, cache_size_mb, cache_eviction, cache_ttl
+        ),
+    }
+
+    done = checkpoint["done"]
+    mode = "r+" if checkpoint["offset"] else "w"
+    with open(output_path, mode, encoding="utf-8") as out:
+        out.seek(checkpoint["offset"])
+        out.truncate()
+        for result in annotate_stream(
+            records,
+            annotator_kwargs,
+            processes=workers,
+            max_pending=max_pending,
+            text_field=text_field,
+            prefork=prefork,
+        ):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            done += 1
+            if done % checkpoint_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+                _save_checkpoint(checkpoint_path, done, out.tell())
+                logger.info(f"Annotated {done} records")
+        out.flush()
+        _save_checkpoint(checkpoint_path, done, out.tell())
+    logger.info(f"Done, annotated {done} records")
+
+
+@main.command()
+@click.option("--udpipe-path", required=True, type=click.Path(exists=True))
+@click.option("--cb-path", required=True, type=click.Path(exists=True))
+@click.option("--rulesets", "rulesets_path", type=click.Path(exists=True))
+@click.option(
+    "--neural-model",
+    type=click.Path(exists=True),
+    help="Local directory of the token classification model.",
+)
+@click.option("--morphology", type=click.Choice(["mystem", "udpipe"]), default="mystem")
+@_cache_options
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8080, show_default=True)
+@click.option("--max-batch", default=32, show_default=True)
+@click.option("--max-wait-ms", default=5.0, show_default=True)
+@click.option(
+    "--max-queue",
+    default=1024,
+    show_default=True,
+    help="Requests waiting per endpoint before new ones are rejected with 503.",
+)
+@click.option("--threads", default=4, show_default=True)
+@click.option(
+    "--request-timeout",
+    default=60.0,
+    show_default=True,
+    help="Seconds a request may wait before it is answered with 504.",
+)
+@click.option(
+    "--stage-latencies/--no-stage-latencies",
+    default=False,
+    help="Export per-stage latency histograms on /metrics.",
+)
+def serve(
+    udpipe_path: str,
+    cb_path: str,
+    rulesets_path: str | None,
+    neural_model: str | None,
+    morphology: str,
+    cache_dir: str,
+    cache_shards: int | None,
+    cache_size_mb: int | None,
+    cache_eviction: str | None,
+    cache_ttl: float | None,
+    host: str,
+    port: int,
+    max_batch: int,
+    max_wait_ms: float,
+    max_queue: int,
+    threads: int,
+    request_timeout: float,
+    stage_latencies: bool,
+):
+    """Serve the extractors and labelers over local HTTP with micro-batching."""
+    # never reach out to the model hub, everything is loaded from local files
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    if stage_latencies:
+        metrics.record_stage_latencies()
+
+    annotator = Annotator(
+        udpipe_path=udpipe_path,
+        cb_path=cb_path,
+        rulesets_path=rulesets_path,
+        neural_model=neural_model,
+        morphology=morphology,
+        lazy=True,
+        **_cache_kwargs(
+            cache_dir, cache_shards, cache_size_mb, cache_eviction, cache_ttl
+        ),
+    )
+    # bind the port right away, requests arriving meanwhile wait for the models
+    annotator.warmup(background=True)
+    server = SrlServer(
+        clause_extractor=annotator.clause_extractor,
+        pa_extractor=annotator.pa_extractor,
+        srl_labeler=annotator.srl_labeler,
+        neural_labeler=annotator.neural_labeler,
+        max_batch=max_batch,
+        max_wait=max_wait_ms / 1000,
+        max_queue=max_queue,
+        n_threads=threads,
+        request_timeout=request_timeout,
+    )
+    server.serve_forever(host, port)
+
+
+@main.group()
+def cache():
+    """Prewarm the result cache and move it between nodes."""
+
+
+@cache.command(name="prewarm")
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--udpipe-path", required=True, type=click.Path(exists=True))
+@click.option("--cb-path", required=True, type=click.Path(exists=True))
+@click.option("--neural-model", help="Name or path of the token classification model.")
+@click.option("--morphology", type=click.Choice(["mystem", "udpipe"]), default="mystem")
+@_cache_options
+@click.option(
+    "--input-format",
+    type=click.Choice(["jsonl", "text"]),
+    default=None,
+    help="Defaults to jsonl for *.jsonl files and to one document per line otherwise.",
+)
+@click.option("--text-field", default="text", help="Text field of JSONL records.")
+@click.option("-j", "--workers", default=os.cpu_count(), show_default=True)
+@click.option(
+    "--prefork/--no-prefork",
+    default=False,
+    help="Load the models once and fork workers that share them.",
+)
+def cache_prewarm(
+    input_path: str,
+    udpipe_path: str,
+    cb_path: str,
+    neural_model: str | None,
+    morphology: str,
+    cache_dir: str,
+    cache_shards: int | None,
+    cache_size_mb: int | None,
+    cache_eviction: str | None,
+    cache_ttl: float | None,
+    input_format: str | None,
+    text_field: str,
+    workers: int,
+    prefork: bool,
+):
+    """Fill the cache with the results for a corpus in parallel workers."""
+    annotator_kwargs = {
+        "udpipe_path": udpipe_path,
+        "cb_path": cb_path,
+        "neural_model": neural_model,
+        "morphology": morphology,
+        **_cache_kwargs(
+            cache_dir, cache_shards, cache_size_mb, cache_eviction, cache_ttl
+        ),
+    }
+    n_texts = prewarm(
+        _read_texts(input_path, input_format, text_field),
+        annotator_kwargs,
+        processes=workers,
+        prefork=prefork,
+    )
+    logger.info(f"Done, prewarmed the cache with {n_texts} texts")
+
+
+@cache.command(name="export")
+@click.argument("snapshot_path", type=click.Path(dir_okay=False))
+@click.option("--cache-dir", default="~/.cache/srl_toolkit")
+@click.option("--cache-shards", type=int, help="Defaults to the existing layout.")
+def cache_export(snapshot_path: str, cache_dir: str, cache_shards: int | None):
+    """Write the cache entries to a snapshot file."""
+    if shard_count(cache_dir) is None:
+        raise click.ClickException(f"No cache in {cache_dir}")
+    try:
+        cache = open_cache(cache_dir, shards=cache_shards)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    export_snapshot(cache, snapshot_path)
+
+
+@cache.command(name="import")
+@click.argument("snapshot_path", type=click.Path(exists=True, dir_okay=False))
+@_cache_options
+def cache_import(
+    snapshot_path: str,
+    cache_dir: str,
+    cache_shards: int | None,
+    cache_size_mb: int | None,
+    cache_eviction: str | None,
+    cache_ttl: float | None,
+):
+    """Load a snapshot into a cache of any shard count."""
+    kwargs = _cache_kwargs(
+        cache_dir, cache_shards, cache_size_mb, cache_eviction, cache_ttl
+    )
+    try:
+        cache = open_cache(
+            cache_dir,
+            shards=cache_shards,
+            size_limit=kwargs["cache_size_limit"],
+            eviction_policy=cache_eviction,
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    import_snapshot(cache, snapshot_path, expire=cache_ttl)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import io
+from typing import Iterator, TextIO
+
+import conllu
+from isanlp.annotation import Sentence, Token, WordSynt
+
+
+def iter_conllu(source: str | TextIO) -> Iterator[conllu.TokenList]:
+    """
+    Lazily reads pre-parsed sentences from a CoNLL-U file path or file object.
+    Multiword tokens and empty nodes are dropped, root heads are set to -1 as in
+    the CoNLL-U produced by AnnotationCONLLConverter.
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as f:
+            yield from iter_conllu(f)
+        return
+
+    for sentence in conllu.parse_incr(source):
+        words = conllu.TokenList(
+            [token for token in sentence if isinstance(token["id"], int)],
+            metadata=sentence.metadata,
+        )
+        for token in words:
+            if not token["head"]:
+                token["head"] = -1
+        yield words
+
+
+def parse_conllu(data: str) -> Iterator[conllu.TokenList]:
+    """
+    Same as iter_conllu for CoNLL-U passed as a string
+    """
+    return iter_conllu(io.StringIO(data))
+
+
+def _token_offsets(sentence: conllu.TokenList) -> tuple[str, list[Token]]:
+    """
+    Aligns word forms to the sentence text from the "# text" comment. Without
+    the comment (or if the forms do not match it) the text is rebuilt from the
+    forms and SpaceAfter=No marks.
+    """
+    text = sentence.metadata.get("text")
+    if text is not None:
+        tokens = []
+        position = 0
+        for word in sentence:
+            begin = text.find(word["form"], position)
+            if begin == -1:
+                break
+            position = begin + len(word["form"])
+            tokens.append(Token(word["form"], begin, position))
+        else:
+            return text, tokens
+
+    parts = []
+    tokens = []
+    position = 0
+    for word in sentence:
+        tokens.append(Token(word["form"], position, position + len(word["form"])))
+        parts.append(word["form"])
+        position += len(word["form"])
+        if (word["misc"] or {}).get("SpaceAfter") != "No":
+            parts.append(" ")
+            position += 1
+    return "".join(parts).rstrip(), tokens
+
+
+def sentence_annotation(sentence: conllu.TokenList) -> dict[str, any]:
+    """
+    Converts a sentence from iter_conllu into the isanlp-style annotation
+    produced by ProcessorUDPipe for a single-sentence text
+    """
+    text, tokens = _token_offsets(sentence)
+    return {
+        "text": text,
+        "tokens": tokens,
+        "sentences": [Sentence(0, len(tokens))],
+        "lemma": [[word["lemma"] for word in sentence]],
+        "postag": [[word["upos"] for word in sentence]],
+        "morph": [[dict(word["feats"] or {}) for word in sentence]],
+        "syntax_dep_tree": [
+            [
+                WordSynt(word["head"] - 1 if word["head"] > 0 else -1, word["deprel"])
+                for word in sentence
+            ]
+        ],
+    }
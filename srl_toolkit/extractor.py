@@ -1,67 +1,324 @@
 from __future__ import annotations
 
+import asyncio
+import bisect
+import itertools
 import logging
+import threading
 import time
 from abc import ABC, abstractmethod
-from ast import arg
-from asyncio.log import logger
-
-from diskcache import Cache
-from isanlp.pipeline_common import PipelineCommon
-from isanlp.processor_udpipe import ProcessorUDPipe
-from isanlp.ru.converter_mystem_to_ud import ConverterMystemToUd
-from isanlp.ru.processor_mystem import ProcessorMystem
-from rich import inspect
-from xxhash import xxh64
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
 
-from srl_toolkit.ruleset import Rule, Ruleset
+import razdel
+from isanlp.annotation_rst import DiscourseUnit
+from xxhash import xxh64
 
-from .clause_segmenter import ClauseSegmenterProcessor
-from .pa_extractor import ArgumentExtractor, PredicateExtractor
+from . import metrics
+from .aio import SingleFlight
+from .cache import as_cache, transaction
+from .mystem_pool import MystemPool, ProcessorMystemPool
+from .pa_extractor import ArgumentExtractor, PredicateArguments
+from .profiling import ProfiledProcessor, span
 
 logger = logging.getLogger(__name__)
 
 
+def _processor_mystem():
+    from isanlp.ru.processor_mystem import ProcessorMystem
+
+    return ProcessorMystem(delay_init=False)
+
+
+def _char_spans(clauses: list) -> list[tuple[int, int]]:
+    """
+    (begin, end) of the clauses returned by ClauseSegmenterProcessor in either
+    output mode
+    """
+    return [
+        (x[2], x[3]) if isinstance(x, tuple) else (x.start, x.start + len(x.text))
+        for x in clauses
+    ]
+
+
+class ClauseTexts(Sequence):
+    """
+    Texts of clauses given by character spans, sliced from the document only
+    when accessed
+    """
+
+    def __init__(self, text: str, spans: list[tuple[int, int]]):
+        self.text = text
+        self.spans = spans
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        begin, end = self.spans[i]
+        return self.text[begin:end]
+
+    def __repr__(self):
+        return f"ClauseTexts({list(self)!r})"
+
+
+class SerializedProcessor:
+    """
+    Wraps a pipeline processor that is not safe to call from several threads
+    at once. Calls to the same stage are serialized, while different stages
+    of the pipeline can still run concurrently for different texts.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self.processor(*args, **kwargs)
+
+
 class CachedExtractor(ABC):
-    def __init__(self, cache_dir: str = "~/.cache/srl_toolkit"):
-        self.cache = Cache(cache_dir)
+    ASYNC_WORKERS = 4
+    # bumped when the format of cached values changes, so that old entries
+    # are not read back
+    CACHE_VERSION = 1
+    # extractors with models to load set this to False until warmup()
+    _loaded = True
+    cache_ttl = None
+
+    def __init__(
+        self, cache_dir: str = "~/.cache/srl_toolkit", cache_ttl: float | None = None
+    ):
+        """
+        :param cache_dir: cache directory, or a Cache or FanoutCache opened with
+            cache.open_cache() and possibly shared with other extractors
+        :param cache_ttl: seconds after which cached results expire
+        """
+        self.cache = as_cache(cache_dir)
+        self.cache_ttl = cache_ttl
+        self._async_executor = None
+        self._single_flight = SingleFlight()
+        self._load_lock = threading.Lock()
+        metrics.track_cache(self.cache)
 
     @property
     def classname(self) -> str:
         return self.__class__.__name__
 
+    @property
+    def cache_prefix(self) -> str:
+        return self.classname
+
+    def before_fork(self):
+        """
+        Loads the models and closes the cache connection, so that forked
+        workers share the models and open their own cache connections
+        """
+        self.warmup()
+        self.cache.close()
+
+    def after_fork(self):
+        pass
+
+    def _load(self):
+        """
+        Loads the models, called once before the first extraction when the
+        extractor was created with lazy=True
+        """
+
+    def warmup(self, background: bool = False) -> threading.Thread | None:
+        """
+        Loads the models now instead of on first use. With background=True
+        they are loaded in a daemon thread, which is returned; extractions
+        started meanwhile wait for it to finish.
+        """
+        if background:
+            thread = threading.Thread(
+                target=self.warmup, name=f"{self.classname}.warmup", daemon=True
+            )
+            thread.start()
+            return thread
+        if self._loaded:
+            return None
+        with self._load_lock:
+            if not self._loaded:
+                _t1 = time.time()
+                with span(f"{self.classname}.load"):
+                    self._load()
+                self._loaded = True
+                _t2 = time.time() - _t1
+                logger.debug(f"Loaded models for {self.classname} in {_t2:.2f} seconds")
+        return None
+
     @abstractmethod
     def _extract(self, text: str) -> dict:
         pass
 
-    def __call__(self, text: str) -> dict:
-        key: str = f"{self.classname}:{text}"
-        key: bytes = xxh64(key).digest()
-        if key in self.cache:
-            return self.cache[key]
-        else:
+    def _cache_key(self, text: str) -> bytes:
+        prefix = self.cache_prefix
+        if self.CACHE_VERSION > 1:
+            prefix = f"{prefix}:v{self.CACHE_VERSION}"
+        key: str = f"{prefix}:{text}"
+        return xxh64(key).digest()
+
+    def _from_cache(self, value, text: str) -> dict:
+        """
+        Builds the result from a cached value, which is the result itself
+        unless the extractor caches a more compact form
+        """
+        return value
+
+    def _extract_and_store(self, key: bytes, text: str) -> dict:
+        self.warmup()
+        with span(f"{self.classname}.extract", chars=len(text)):
             result = self._extract(text)
-            self.cache[key] = result
-            return result
+        with span(f"{self.classname}.cache_set"):
+            self.cache.set(key, result, expire=self.cache_ttl)
+        return result
+
+    def _count(self, hit: bool):
+        metrics.TEXTS.inc(component=self.classname)
+        metrics.CACHE_REQUESTS.inc(
+            component=self.classname, result="hit" if hit else "miss"
+        )
+
+    def __call__(self, text: str) -> dict:
+        key = self._cache_key(text)
+        with span(f"{self.classname}.cache_get"):
+            result = self.cache.get(key)
+        self._count(result is not None)
+        if result is None:
+            result = self._extract_and_store(key, text)
+        return self._from_cache(result, text)
+
+    async def aextract(self, text: str) -> dict:
+        """
+        Asynchronous variant of __call__. The cache lookup runs in the loop's
+        default executor and extraction in a bounded executor of ASYNC_WORKERS
+        threads; concurrent awaits for the same text share one extraction.
+        """
+        key = self._cache_key(text)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, self.cache.get, key)
+        self._count(result is not None)
+        if result is None:
+            if self._async_executor is None:
+                self._async_executor = ThreadPoolExecutor(self.ASYNC_WORKERS)
+            result = await self._single_flight.run(
+                key,
+                lambda: loop.run_in_executor(
+                    self._async_executor, self._extract_and_store, key, text
+                ),
+            )
+        return self._from_cache(result, text)
+
+    def extract_many(self, texts: list[str], n_threads: int = 4) -> list[dict]:
+        """
+        Extracts from the texts in a thread pool. Native stages (UDPipe,
+        CatBoost) release the GIL, so work on different texts overlaps.
+        """
+        if n_threads <= 1:
+            return [self(text) for text in texts]
+        with ThreadPoolExecutor(n_threads) as executor:
+            return list(executor.map(self, texts))
 
 
 class ClauseExtractor(CachedExtractor):
+    MORPHOLOGY_MODES = ("mystem", "udpipe")
+    OUTPUT_MODES = ("text", "spans")
+    # clauses are cached as character spans instead of texts
+    CACHE_VERSION = 2
+    SENTENCE_SEPARATOR = "\n\n"
+
     def __init__(
         self,
         udpipe_path: str,
         cb_path: str,
         cache_dir: str = "~/.cache/srl_toolkit",
+        mystem_pool: MystemPool | None = None,
+        morphology: str = "mystem",
+        sentence_cache: bool = False,
+        lazy: bool = False,
+        output: str = "text",
+        cache_ttl: float | None = None,
     ):
-        super().__init__(cache_dir)
+        """
+        :param morphology: "mystem" re-tags UDPipe tokens with Mystem and converts
+            its tags to UD, "udpipe" feeds UDPipe's own UPOS and features to the
+            segmenter without running Mystem at all
+        :param sentence_cache: segment documents sentence by sentence and cache
+            every sentence, so that documents sharing sentences reuse the results
+        :param lazy: load UDPipe, Mystem and the segmenter on the first cache
+            miss (or on warmup()) instead of in the constructor
+        :param output: "text" returns {"clauses": [str]}, "spans" returns
+            {"spans": [(begin, end)], "clauses": ClauseTexts} whose texts are
+            sliced from the document only when accessed
+        """
+        if morphology not in self.MORPHOLOGY_MODES:
+            raise ValueError(
+                f"Unknown morphology mode {morphology!r}, "
+                f"expected one of {self.MORPHOLOGY_MODES}"
+            )
+        if output not in self.OUTPUT_MODES:
+            raise ValueError(
+                f"Unknown output mode {output!r}, expected one of {self.OUTPUT_MODES}"
+            )
+        super().__init__(cache_dir, cache_ttl)
+        self.morphology = morphology
+        self.output = output
+        self.sentence_cache = sentence_cache
+        self.udpipe_path = udpipe_path
+        self.cb_path = cb_path
+        self._mystem_pool = mystem_pool
+        self._inherited = []
+        self._loaded = False
+        if not lazy:
+            self.warmup()
+
+    def _load(self):
+        from isanlp.pipeline_common import PipelineCommon
+        from isanlp.processor_udpipe import ProcessorUDPipe
+        from isanlp.ru.converter_mystem_to_ud import ConverterMystemToUd
+
+        from .clause_segmenter import ClauseSegmenterProcessor
+
+        udpipe_path = self.udpipe_path
+        mystem_pool = self._mystem_pool
         _t1 = time.time()
-        model, inputs, outputs = ClauseSegmenterProcessor.for_pipeline(cb_path)
+        model, inputs, outputs = ClauseSegmenterProcessor.for_pipeline(
+            self.cb_path, output="spans"
+        )
         _t2 = time.time() - _t1
         logger.debug(f"Loaded model for {self.classname} in {_t2:.2f} seconds")
         _t1 = time.time()
-        self.pipeline = PipelineCommon(
-            [
+        if self.morphology == "udpipe":
+            processors = [
                 (
-                    ProcessorUDPipe(udpipe_path),
+                    ProfiledProcessor(
+                        SerializedProcessor(ProcessorUDPipe(udpipe_path)), "udpipe"
+                    ),
+                    ["text"],
+                    {
+                        "sentences": "sentences",
+                        "tokens": "tokens",
+                        "lemma": "lemma",
+                        "syntax_dep_tree": "syntax_dep_tree",
+                        "postag": "postag",
+                        "morph": "morph",
+                    },
+                ),
+            ]
+        else:
+            processors = [
+                (
+                    ProfiledProcessor(
+                        SerializedProcessor(ProcessorUDPipe(udpipe_path)), "udpipe"
+                    ),
                     ["text"],
                     {
                         "sentences": "sentences",
@@ -72,40 +329,361 @@ class ClauseExtractor(CachedExtractor):
                     },
                 ),
                 (
-                    ProcessorMystem(delay_init=False),
+                    ProfiledProcessor(
+                        ProcessorMystemPool(mystem_pool)
+                        if mystem_pool is not None
+                        else SerializedProcessor(_processor_mystem()),
+                        "mystem",
+                    ),
                     ["tokens", "sentences"],
                     {"postag": "postag"},
                 ),
                 (
-                    ConverterMystemToUd(),
+                    ProfiledProcessor(ConverterMystemToUd(), "mystem_to_ud"),
                     ["postag"],
                     {"morph": "morph", "postag": "postag"},
                 ),
-                (model, inputs, outputs),
             ]
-        )
+        self._processors = processors + [
+            (ProfiledProcessor(model, "clause_segmenter"), inputs, outputs)
+        ]
+        self.pipeline = PipelineCommon(self._processors)
         _t2 = time.time() - _t1
         logger.debug(f"Loaded pipeline for {self.classname} in {_t2:.2f} seconds")
 
-    def _extract(self, text: str) -> dict:
+    @property
+    def _morphology_prefix(self) -> str:
+        if self.morphology == "mystem":
+            return self.classname
+        return f"{self.classname}:{self.morphology}"
+
+    @property
+    def cache_prefix(self) -> str:
+        # sentence by sentence segmentation can split clauses differently
+        if self.sentence_cache:
+            return f"{self._morphology_prefix}:sentences"
+        return self._morphology_prefix
+
+    def after_fork(self):
+        """
+        Starts a fresh Mystem subprocess in a forked worker. The inherited one
+        belongs to the parent process and is kept referenced, so that it is not
+        terminated by the child.
+        """
+        from isanlp.pipeline_common import PipelineCommon
+
+        if self.morphology != "mystem" or not self._loaded:
+            return
+        if self._mystem_pool is not None:
+            self._mystem_pool.reset()
+            return
+        processor, inputs, outputs = self._processors[1]
+        self._inherited.append(processor)
+        self._processors[1] = (
+            ProfiledProcessor(SerializedProcessor(_processor_mystem()), "mystem"),
+            inputs,
+            outputs,
+        )
+        self.pipeline = PipelineCommon(self._processors)
+
+    def _extract(self, text: str) -> bytes:
+        """
+        Returns the character spans of the clauses packed as int32 pairs,
+        which the cache stores as they are, without pickling
+        """
+        if self.sentence_cache:
+            spans = _char_spans(list(self.iter_clauses(text)))
+        else:
+            spans = _char_spans(self.pipeline(text)["clauses"])
+        return array("i", itertools.chain.from_iterable(spans)).tobytes()
+
+    def _from_cache(self, value: bytes, text: str) -> dict:
+        packed = array("i")
+        packed.frombytes(value)
+        spans = list(zip(packed[::2], packed[1::2]))
+        if self.output == "spans":
+            return {"spans": spans, "clauses": ClauseTexts(text, spans)}
+        return {"clauses": [text[begin:end] for begin, end in spans]}
+
+    def _segment(self, text: str) -> tuple[list[int], int | None]:
+        """
+        Segments a text fragment, returns character offsets of clause starts
+        and the end offset of its last token (None if it has no tokens)
+        """
+        self.warmup()
         result = self.pipeline(text)
-        clauses = [x.text for x in result["clauses"]]
-        return {"clauses": clauses}
+        if not result["tokens"]:
+            return [], None
+        spans = _char_spans(result["clauses"])
+        return [begin for begin, _ in spans], result["tokens"][-1].end
+
+    def _segment_joined(
+        self, sentences: list[str]
+    ) -> list[tuple[list[int], int | None]]:
+        """
+        Segments several sentences in one pipeline call. They are joined with
+        blank lines, which UDPipe treats as sentence boundaries, and clause
+        starts and token ends are split back by their offsets.
+        """
+        if len(sentences) == 1:
+            return [self._segment(sentences[0])]
+        self.warmup()
+        offsets = list(
+            itertools.accumulate(
+                (len(x) + len(self.SENTENCE_SEPARATOR) for x in sentences[:-1]),
+                initial=0,
+            )
+        )
+        result = self.pipeline(self.SENTENCE_SEPARATOR.join(sentences))
+        starts = [begin for begin, _ in _char_spans(result["clauses"])]
+        token_ends = [token.end for token in result["tokens"]]
+
+        results = []
+        for offset, sentence in zip(offsets, sentences):
+            end = offset + len(sentence)
+            sentence_starts = starts[
+                bisect.bisect_left(starts, offset) : bisect.bisect_left(starts, end)
+            ]
+            last = bisect.bisect_right(token_ends, end)
+            if last and token_ends[last - 1] > offset:
+                tokens_end = token_ends[last - 1] - offset
+            else:
+                tokens_end = None
+            results.append(([x - offset for x in sentence_starts], tokens_end))
+        return results
+
+    def _segment_sentences(
+        self, sentences: list[str]
+    ) -> list[tuple[list[int], int | None]]:
+        """
+        Looks all sentences up in the cache at once and segments the missing
+        ones together in a single pipeline call
+        """
+        keys = [
+            xxh64(f"{self._morphology_prefix}:sentence:{sentence}").digest()
+            for sentence in sentences
+        ]
+        with span(f"{self.classname}.sentence_cache_get", sentences=len(keys)):
+            with transaction(self.cache):
+                results = [self.cache.get(key) for key in keys]
+        n_misses = results.count(None)
+        component = f"{self.classname}:sentence"
+        metrics.CACHE_REQUESTS.inc(
+            len(keys) - n_misses, component=component, result="hit"
+        )
+        metrics.CACHE_REQUESTS.inc(n_misses, component=component, result="miss")
+        missing = {}
+        for i, result in enumerate(results):
+            if result is None:
+                missing.setdefault(sentences[i], []).append(i)
+        if missing:
+            segmented = self._segment_joined(list(missing))
+            with transaction(self.cache):
+                for idxs, result in zip(missing.values(), segmented):
+                    self.cache.set(keys[idxs[0]], result, expire=self.cache_ttl)
+            for idxs, result in zip(missing.values(), segmented):
+                for i in idxs:
+                    results[i] = result
+        return results
+
+    def _segment_window(
+        self, text: str, sentences: list[tuple[int, int]]
+    ) -> list[tuple[int, list[int], int | None]]:
+        """
+        Segments a window of sentences, returns (offset, clause starts, tokens
+        end) for every segmented fragment
+        """
+        if self.sentence_cache:
+            results = self._segment_sentences([text[s:e] for s, e in sentences])
+            return [(start, *result) for (start, _), result in zip(sentences, results)]
+        start, end = sentences[0][0], sentences[-1][1]
+        return [(start, *self._segment(text[start:end]))]
+
+    @staticmethod
+    def _sentence_windows(
+        text: str, window_sentences: int
+    ) -> Iterator[list[tuple[int, int]]]:
+        window = []
+        for sentence in razdel.sentenize(text):
+            window.append((sentence.start, sentence.stop))
+            if len(window) == window_sentences:
+                yield window
+                window = []
+        if window:
+            yield window
+
+    @staticmethod
+    def _assemble(
+        text: str, segments: Iterable[tuple[int, list[int], int | None]]
+    ) -> Iterator[DiscourseUnit]:
+        """
+        Builds clauses with offsets in the whole text from segmented fragments.
+        A clause ends right before the next one starts, the last one at the
+        last token, as in ClauseSegmenterProcessor._build_discourse_units.
+        """
+        clause_id = 0
+        pending_start = None
+        last_end = None
+        for offset, starts, tokens_end in segments:
+            if tokens_end is None:
+                continue
+            for start in starts:
+                start += offset
+                if pending_start is not None:
+                    yield DiscourseUnit(
+                        clause_id,
+                        start=pending_start,
+                        end=start - 1,
+                        text=text[pending_start:start],
+                        relation="elementary",
+                        nuclearity="_",
+                    )
+                    clause_id += 1
+                pending_start = start
+            last_end = tokens_end + offset
+
+        if pending_start is not None:
+            yield DiscourseUnit(
+                clause_id,
+                start=pending_start,
+                end=last_end,
+                text=text[pending_start:last_end],
+                relation="elementary",
+                nuclearity="_",
+            )
+
+    def iter_clauses(
+        self, text: str, window_sentences: int = 32
+    ) -> Iterator[DiscourseUnit]:
+        """
+        Segments the text window by window (window_sentences sentences each)
+        and yields clauses with offsets in the whole text as soon as they are
+        complete. Only one window is annotated at a time, so memory stays
+        bounded for texts of any length. Segmentation features are computed
+        within a sentence, so the result matches segmenting the whole text
+        when razdel, which splits the windows, and UDPipe agree on sentence
+        boundaries. Where razdel splits a sentence that UDPipe keeps whole
+        (e.g. around abbreviations or quotes), the fragments are parsed
+        separately and a clause may start at razdel's boundary.
+        """
+        segments = (
+            segment
+            for window in self._sentence_windows(text, window_sentences)
+            for segment in self._segment_window(text, window)
+        )
+        return self._assemble(text, segments)
+
+    def segment_document(
+        self, text: str
+    ) -> list[tuple[int, int, list[int], int | None]]:
+        """
+        Segments the text sentence by sentence (through the sentence cache),
+        returns (start, end, clause starts, tokens end) per sentence with clause
+        starts and tokens end relative to the sentence start. The result can
+        be updated after edits with update_segments.
+        """
+        spans = [(x.start, x.stop) for x in razdel.sentenize(text)]
+        results = self._segment_sentences([text[s:e] for s, e in spans])
+        return [(s, e, *result) for (s, e), result in zip(spans, results)]
+
+    def update_segments(
+        self,
+        text: str,
+        segments: list[tuple[int, int, list[int], int | None]],
+        start: int,
+        end: int,
+        replacement: str,
+    ) -> tuple[str, list[tuple[int, int, list[int], int | None]]]:
+        """
+        Applies an edit replacing text[start:end] with replacement and returns
+        the new text and its segments. Only the sentences touched by the edit
+        and their immediate neighbours (whose sentence boundaries may move) are
+        re-split and re-segmented; segmentation features never cross sentence
+        boundaries, so all other sentences are reused with shifted offsets.
+        """
+        new_text = text[:start] + replacement + text[end:]
+        delta = len(replacement) - (end - start)
+        if not segments:
+            return new_text, self.segment_document(new_text)
+
+        ends = [x[1] for x in segments]
+        starts = [x[0] for x in segments]
+        lo = max(bisect.bisect_left(ends, start) - 1, 0)
+        hi = min(bisect.bisect_right(starts, end), len(segments) - 1)
+        region_start = segments[lo][0] if lo > 0 else 0
+        region_end = segments[hi][1] if hi < len(segments) - 1 else len(text)
+
+        region = new_text[region_start : region_end + delta]
+        spans = [
+            (x.start + region_start, x.stop + region_start)
+            for x in razdel.sentenize(region)
+        ]
+        results = self._segment_sentences([new_text[s:e] for s, e in spans])
+        updated = [(s, e, *result) for (s, e), result in zip(spans, results)]
+        shifted = [
+            (s + delta, e + delta, clause_starts, tokens_end)
+            for s, e, clause_starts, tokens_end in segments[hi + 1 :]
+        ]
+        return new_text, segments[:lo] + updated + shifted
+
+    def clauses_from_segments(
+        self, text: str, segments: list[tuple[int, int, list[int], int | None]]
+    ) -> list[DiscourseUnit]:
+        return list(
+            self._assemble(
+                text,
+                (
+                    (s, clause_starts, tokens_end)
+                    for s, _, clause_starts, tokens_end in segments
+                ),
+            )
+        )
 
 
 class PredicateArgumentExtractor(CachedExtractor):
+    OUTPUT_MODES = ("dict", "records")
+    # structures are cached as PredicateArguments records instead of dicts
+    CACHE_VERSION = 2
+
     def __init__(
         self,
         udpipe_path: str,
         prepostion_search_radius: int = 3,
         cache_dir: str = "~/.cache/srl_toolkit",
+        lazy: bool = False,
+        output: str = "dict",
+        cache_ttl: float | None = None,
     ):
-        super().__init__(cache_dir)
-        _t1 = time.time()
+        """
+        :param lazy: load UDPipe on the first cache miss (or on warmup())
+            instead of in the constructor
+        :param output: "dict" returns the structures as dicts, "records" as
+            PredicateArguments, which are converted with to_dicts() on demand
+        """
+        if output not in self.OUTPUT_MODES:
+            raise ValueError(
+                f"Unknown output mode {output!r}, expected one of {self.OUTPUT_MODES}"
+            )
+        super().__init__(cache_dir, cache_ttl)
+        self.output = output
+        self.udpipe_path = udpipe_path
+        self.argument_extractor = ArgumentExtractor()
+        self.prepostion_search_radius = prepostion_search_radius
+        self._loaded = False
+        if not lazy:
+            self.warmup()
+
+    def _load(self):
+        from isanlp.pipeline_common import PipelineCommon
+        from isanlp.processor_udpipe import ProcessorUDPipe
+
         self.pipeline = PipelineCommon(
             [
                 (
-                    ProcessorUDPipe(udpipe_path),
+                    ProfiledProcessor(
+                        SerializedProcessor(ProcessorUDPipe(self.udpipe_path)),
+                        "udpipe",
+                    ),
                     ["text"],
                     {
                         "tokens": "tokens",
@@ -117,66 +695,19 @@ class PredicateArgumentExtractor(CachedExtractor):
                 )
             ]
         )
-        self.predicate_extractor = PredicateExtractor()
-        self.argument_extractor = ArgumentExtractor()
-        _t2 = time.time() - _t1
-        logger.debug(f"Loaded pipeline for {self.classname} in {_t2:.2f} seconds")
-        self.prepostion_search_radius = prepostion_search_radius
-
-    def __get_preposition(self, word_idx: int, tokens, syntax_dep_tree, postag):
-        for i in range(1, self.prepostion_search_radius + 1):
-            if (
-                word_idx - i >= 0
-                and syntax_dep_tree[word_idx - i].parent == word_idx
-                and postag[word_idx - i] == "ADP"
-            ):
-                return tokens[word_idx - i].text.lower()
-        return None
 
-    def _extract(self, text: str) -> dict:
+    def _extract(self, text: str) -> PredicateArguments:
         parse = self.pipeline(text)
-        predicates = [
-            (parse["tokens"][idx].text, idx)
-            for idx in self.predicate_extractor(parse["postag"][0])
-        ]
-        result = []
-        for predicate, position in predicates:
-            arguments = self.argument_extractor(
-                position,
-                parse["postag"][0],
-                parse["morph"][0],
-                parse["lemma"][0],
-                parse["syntax_dep_tree"][0],
-            )
-            _arguments = []
-            for idx in arguments:
-                word = {
-                    "text": parse["tokens"][idx].text,
-                    "lemma": parse["lemma"][0][idx],
-                    "morph": parse["morph"][0][idx],
-                    "postag": parse["postag"][0][idx],
-                }
-                # search for prepositions
-                word["preposition"] = self.__get_preposition(
-                    idx,
-                    parse["tokens"],
-                    parse["syntax_dep_tree"][0],
-                    parse["postag"][0],
-                )
-
-                _arguments.append(word)
-            predicate_dict = {
-                "text": predicate,
-                "lemma": parse["lemma"][0][position],
-                "morph": parse["morph"][0][position],
-                "postag": parse["postag"][0][position],
-            }
-            predicate_dict["preposition"] = self.__get_preposition(
-                position,
-                parse["tokens"],
-                parse["syntax_dep_tree"][0],
-                parse["postag"][0],
-            )
-            result.append({"predicate": predicate_dict, "arguments": _arguments})
+        return self.argument_extractor.predicate_argument_records(
+            parse["tokens"],
+            parse["postag"][0],
+            parse["morph"][0],
+            parse["lemma"][0],
+            parse["syntax_dep_tree"][0],
+            self.prepostion_search_radius,
+        )
 
-        return {"predicate_arguments": result}
+    def _from_cache(self, value: PredicateArguments, text: str) -> dict:
+        if self.output == "records":
+            return {"predicate_arguments": value}
+        return {"predicate_arguments": value.to_dicts()}
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from .extractor import ClauseExtractor, PredicateArgumentExtractor
+
+
+def text_diff(old: str, new: str) -> tuple[int, int, str]:
+    """
+    Returns a single edit (start, end, replacement) turning old into new,
+    found by stripping the common prefix and suffix
+    """
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and old[len(old) - suffix - 1] == new[len(new) - suffix - 1]
+    ):
+        suffix += 1
+    return prefix, len(old) - suffix, new[prefix : len(new) - suffix]
+
+
+class IncrementalDocument:
+    """
+    Keeps the annotation of a document under editing. After every edit only
+    the affected sentences are re-segmented and predicate-argument structures
+    are extracted only for clauses that did not exist before.
+    """
+
+    def __init__(
+        self,
+        clause_extractor: ClauseExtractor,
+        pa_extractor: PredicateArgumentExtractor | None = None,
+        text: str = "",
+    ):
+        self.clause_extractor = clause_extractor
+        self.pa_extractor = pa_extractor
+        self.text = text
+        self.segments = clause_extractor.segment_document(text)
+        self._predicate_arguments = {}
+        self.result = self._build()
+
+    def _build(self) -> dict[str, any]:
+        clauses = []
+        predicate_arguments = {}
+        for unit in self.clause_extractor.clauses_from_segments(
+            self.text, self.segments
+        ):
+            clause = {"text": unit.text, "start": unit.start, "end": unit.end}
+            if self.pa_extractor is not None:
+                if unit.text not in predicate_arguments:
+                    previous = self._predicate_arguments.get(unit.text)
+                    predicate_arguments[unit.text] = (
+                        previous
+                        if previous is not None
+                        else self.pa_extractor(unit.text)["predicate_arguments"]
+                    )
+                clause["predicate_arguments"] = predicate_arguments[unit.text]
+            clauses.append(clause)
+        self._predicate_arguments = predicate_arguments
+        return {"text": self.text, "clauses": clauses}
+
+    def edit(self, start: int, end: int, replacement: str) -> dict[str, any]:
+        """
+        Replaces text[start:end] with replacement, returns the updated result
+        """
+        self.text, self.segments = self.clause_extractor.update_segments(
+            self.text, self.segments, start, end, replacement
+        )
+        self.result = self._build()
+        return self.result
+
+    def update(self, new_text: str) -> dict[str, any]:
+        """
+        Updates the document to new_text, re-annotating only what changed
+        """
+        return self.edit(*text_diff(self.text, new_text))
@@ -0,0 +1,234 @@
+"""
+Inverted index over labeled SRL output. Predicate lemmas, roles, argument
+lemmas and prepositions are mapped to sorted posting lists on two levels:
+
+- clauses: a clause is posted under every term occurring anywhere in it
+- edges: every predicate-argument pair is posted under the predicate lemma
+  and under the role, lemma and preposition of its argument, so that a query
+  matches only when a single argument satisfies all of its terms
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from array import array
+from typing import Iterable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("predicate", "role", "argument", "preposition")
+LEVELS = ("clause", "edge")
+
+
+def _edges(clause: dict) -> Iterator[tuple[str | None, dict]]:
+    """
+    Yields (predicate lemma, terms of the argument) for every
+    predicate-argument pair of a labeled clause. SrlLabeler structures are
+    read from "labeled" or "predicate_arguments" (as dicts or
+    PredicateArgument records), NeuralLabeler ones from
+    "predictions", where lowercased word forms stand in for lemmas.
+    """
+    if "predictions" in clause:
+        predictions = clause["predictions"]
+        for predicate in predictions.get("predicate", []):
+            for role, arguments in predictions.items():
+                if role == "predicate":
+                    continue
+                for argument in arguments:
+                    yield predicate["text"].lower(), {
+                        "role": role,
+                        "argument": argument["text"].lower(),
+                    }
+        return
+
+    for pa in clause.get("labeled", clause.get("predicate_arguments", [])):
+        if not isinstance(pa, dict):
+            pa = pa.to_dict()
+        lemma = pa["predicate"]["lemma"]
+        if not pa["arguments"]:
+            yield lemma, {}
+        for argument in pa["arguments"]:
+            yield lemma, {
+                "role": argument.get("role"),
+                "argument": argument["lemma"],
+                "preposition": argument.get("preposition"),
+            }
+
+
+class SrlIndex:
+    """
+    Clause and edge ids are assigned in the order clauses are added, so an
+    index built alongside a StoreWriter uses the same clause ids as the store.
+    Clauses can be appended to a loaded index, save() rewrites it.
+    """
+
+    def __init__(self):
+        self._terms = {level: {} for level in LEVELS}
+        self._saved = {level: np.zeros(0, dtype="<u4") for level in LEVELS}
+        self._new = {level: {} for level in LEVELS}
+        self._edge_clauses = array("I")
+        self._saved_edge_clauses = np.zeros(0, dtype="<u4")
+        self.n_clauses = 0
+
+    def __len__(self) -> int:
+        return self.n_clauses
+
+    @property
+    def n_edges(self) -> int:
+        return len(self._saved_edge_clauses) + len(self._edge_clauses)
+
+    def _post(self, level: str, term: tuple[str, str], posting: int):
+        postings = self._new[level].get(term)
+        if postings is None:
+            postings = self._new[level][term] = array("I")
+        postings.append(posting)
+
+    def add(self, clause: dict) -> int:
+        """
+        Indexes a labeled clause, returns its id
+        """
+        clause_id = self.n_clauses
+        terms = set()
+        for lemma, argument in _edges(clause):
+            edge_terms = {("predicate", lemma)}
+            edge_terms.update(
+                (field, value) for field, value in argument.items() if value is not None
+            )
+            edge_id = self.n_edges
+            self._edge_clauses.append(clause_id)
+            for term in edge_terms:
+                self._post("edge", term, edge_id)
+            terms |= edge_terms
+        for term in terms:
+            self._post("clause", term, clause_id)
+        self.n_clauses += 1
+        return clause_id
+
+    def extend(self, clauses: Iterable[dict]):
+        for clause in clauses:
+            self.add(clause)
+
+    def postings(self, level: str, field: str, value: str) -> np.ndarray:
+        """
+        Sorted ids of the clauses or edges posted under the term
+        """
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field {field!r}, expected one of {FIELDS}")
+        term = (field, value)
+        start, length = self._terms[level].get(term, (0, 0))
+        saved = self._saved[level][start : start + length]
+        new = self._new[level].get(term)
+        if new is None:
+            return np.asarray(saved)
+        return np.concatenate([saved, np.frombuffer(new, dtype=np.uint32)])
+
+    @staticmethod
+    def _intersect(postings: list[np.ndarray]) -> np.ndarray:
+        postings = sorted(postings, key=len)
+        result = postings[0]
+        for other in postings[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, other, assume_unique=True)
+        return result
+
+    def clauses(self, **terms: str) -> np.ndarray:
+        """
+        Ids of the clauses containing all the terms anywhere, e.g.
+        clauses(predicate="мыть", role="агенс")
+        """
+        if not terms:
+            return np.arange(self.n_clauses, dtype=np.uint32)
+        return self._intersect(
+            [self.postings("clause", field, value) for field, value in terms.items()]
+        )
+
+    def search(self, **terms: str) -> np.ndarray:
+        """
+        Ids of the clauses with a predicate-argument pair matching all the
+        terms, e.g. search(predicate="мыть", role="локатив", preposition="на")
+        finds clauses where a локатив argument of мыть itself has "на"
+        """
+        if not terms:
+            return self.clauses()
+        edges = self._intersect(
+            [self.postings("edge", field, value) for field, value in terms.items()]
+        )
+        edge_clauses = np.concatenate(
+            [self._saved_edge_clauses, np.frombuffer(self._edge_clauses, np.uint32)]
+        )
+        return np.unique(edge_clauses[edges])
+
+    def save(self, path: str):
+        """
+        Writes the index to a directory: postings of both levels concatenated
+        in <level>.bin, the clause of every edge in edge_clauses.bin and the
+        term offsets in terms.json, which is replaced last
+        """
+        os.makedirs(path, exist_ok=True)
+        terms = {}
+        for level in LEVELS:
+            keys = set(self._terms[level]) | set(self._new[level])
+            offsets = {}
+            chunks = []
+            position = 0
+            for term in sorted(keys):
+                postings = self.postings(level, *term)
+                offsets["\t".join(term)] = [position, len(postings)]
+                chunks.append(postings.astype("<u4"))
+                position += len(postings)
+            terms[level] = offsets
+            data = np.concatenate(chunks) if chunks else np.zeros(0, dtype="<u4")
+            _write(os.path.join(path, f"{level}.bin"), data.tobytes())
+        edge_clauses = np.concatenate(
+            [self._saved_edge_clauses, np.frombuffer(self._edge_clauses, np.uint32)]
+        )
+        _write(
+            os.path.join(path, "edge_clauses.bin"), edge_clauses.astype("<u4").tobytes()
+        )
+        _write(
+            os.path.join(path, "terms.json"),
+            json.dumps({"n_clauses": self.n_clauses, "terms": terms}).encode("utf-8"),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> SrlIndex:
+        """
+        Opens an index written by save(), posting lists are memory-mapped
+        """
+        with open(os.path.join(path, "terms.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls()
+        index.n_clauses = meta["n_clauses"]
+        for level in LEVELS:
+            index._terms[level] = {
+                tuple(key.split("\t", 1)): tuple(value)
+                for key, value in meta["terms"][level].items()
+            }
+            index._saved[level] = _load_array(os.path.join(path, f"{level}.bin"))
+        index._saved_edge_clauses = _load_array(os.path.join(path, "edge_clauses.bin"))
+        return index
+
+    @classmethod
+    def from_store(cls, reader) -> SrlIndex:
+        """
+        Indexes all clauses of a StoreReader, ids match the store's
+        """
+        index = cls()
+        index.extend(reader)
+        return index
+
+
+def _write(path: str, data: bytes):
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(data)
+    os.replace(f"{path}.tmp", path)
+
+
+def _load_array(path: str) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype="<u4")
+    return np.memmap(path, dtype="<u4", mode="r")
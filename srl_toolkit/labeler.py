@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
 
 import razdel
-import transformers as tr
 from pymystem3 import Mystem
+from xxhash import xxh64
 
+from srl_toolkit import metrics
+from srl_toolkit.aio import SingleFlight
+from srl_toolkit.cache import as_cache, transaction
+from srl_toolkit.mystem_pool import MystemPool
+from srl_toolkit.pa_extractor import PredicateArgument
+from srl_toolkit.profiling import profiled, span
 from srl_toolkit.ruleset import Rule, Ruleset
 
 
@@ -13,13 +23,18 @@ class SrlLabeler:
     def __init__(self, rulesets: list[Ruleset]) -> None:
         self.rulesets = rulesets
 
+    @profiled("SrlLabeler")
     def __call__(self, pas: dict[str, any]) -> dict[str, any]:
         """
         Applies the rulesets to the predicate-argument pairs.
         """
-        _pas = pas["predicate_arguments"].copy()
+        _pas = list(pas["predicate_arguments"])
+        metrics.TEXTS.inc(component=self.__class__.__name__)
+        metrics.BATCH_SIZE.observe(len(_pas), component=self.__class__.__name__)
         result = []
         for pa in _pas:
+            if isinstance(pa, PredicateArgument):
+                pa = pa.to_dict()
             labeled_pa = pa.copy()
             for ruleset in self.rulesets:
                 labeled_pa, applied = ruleset(pa)
@@ -30,12 +45,238 @@ class SrlLabeler:
 
 
 class NeuralLabeler:
-    def __init__(self, model_name: str, good_lemmas: list[str]) -> None:
+    ASYNC_WORKERS = 2
+
+    def __init__(
+        self,
+        model_name: str,
+        good_lemmas: list[str],
+        revision: str | None = None,
+        cache_dir: str = "~/.cache/srl_toolkit",
+        max_length: int | None = None,
+        stride: int = 32,
+        batch_size: int = 16,
+        mystem_pool: MystemPool | None = None,
+        lazy: bool = False,
+        cache_ttl: float | None = None,
+    ) -> None:
+        """
+        :param cache_dir: cache directory, or an opened Cache or FanoutCache
+        :param lazy: import transformers, load the model and start Mystem on
+            the first clause missing from the cache (or on warmup()) instead
+            of in the constructor
+        :param cache_ttl: seconds after which cached labels expire
+        """
+        self.pipeline = None
+        self.window_tokenizer = None
+        self.max_length = max_length
+        self.window_length = max_length
+        self.stride = stride
+        self.batch_size = batch_size
+        self.model_name = model_name
+        self.revision = revision
+        self.good_lemmas = good_lemmas
+        self.mystem = None
+        self.mystem_pool = mystem_pool
+        self._forward_lock = threading.Lock()
+        self._tokenizer_lock = threading.Lock()
+        self._mystem_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self.cache = as_cache(cache_dir)
+        self.cache_ttl = cache_ttl
+        self._async_executor = None
+        self._single_flight = SingleFlight()
+        metrics.track_cache(self.cache)
+        if not lazy:
+            self.warmup()
+
+    @property
+    def classname(self) -> str:
+        return self.__class__.__name__
+
+    def _load(self):
+        import transformers as tr
+
         self.pipeline = tr.pipeline(
-            "token-classification", model=model_name, aggregation_strategy="simple"
+            "token-classification",
+            model=self.model_name,
+            revision=self.revision,
+            aggregation_strategy="simple",
         )
-        self.good_lemmas = good_lemmas
-        self.mystem = Mystem(entire_input=False)
+        # window planning runs in other threads than the pipeline, and fast
+        # tokenizers cannot be used from two threads at once
+        self.window_tokenizer = tr.AutoTokenizer.from_pretrained(
+            self.model_name, revision=self.revision
+        )
+        if self.max_length is None:
+            self.window_length = min(
+                self.pipeline.tokenizer.model_max_length,
+                self.pipeline.model.config.max_position_embeddings,
+            )
+        if self.mystem_pool is None:
+            self.mystem = Mystem(entire_input=False)
+
+    def warmup(self, background: bool = False) -> threading.Thread | None:
+        """
+        Loads the model now instead of on first use. With background=True it
+        is loaded in a daemon thread, which is returned; labeling started
+        meanwhile waits for it to finish.
+        """
+        if background:
+            thread = threading.Thread(
+                target=self.warmup, name=f"{self.classname}.warmup", daemon=True
+            )
+            thread.start()
+            return thread
+        if self._loaded:
+            return None
+        with self._load_lock:
+            if not self._loaded:
+                with span(f"{self.classname}.load"):
+                    self._load()
+                self._loaded = True
+        return None
+
+    def before_fork(self):
+        """
+        Loads the model, moves its weights to shared memory and closes the
+        cache connection, so that forked workers share the model and open
+        their own cache connections
+        """
+        self.warmup()
+        self.pipeline.model.share_memory()
+        self.cache.close()
+
+    def after_fork(self):
+        if self.mystem_pool is not None:
+            self.mystem_pool.reset()
+        elif self._loaded:
+            self._inherited_mystem = self.mystem
+            self.mystem = Mystem(entire_input=False)
+
+    def _key_prefix(self) -> str:
+        lemmas = ",".join(sorted(self.good_lemmas)) if self.good_lemmas else ""
+        return (
+            f"{self.classname}:{self.model_name}:{self.revision}:{lemmas}"
+            f":{self.max_length}:{self.stride}"
+        )
+
+    def _cache_keys(self, clauses: list[str]) -> list[bytes]:
+        prefix = self._key_prefix()
+        return [xxh64(f"{prefix}:{clause}").digest() for clause in clauses]
+
+    def _lookup(self, keys: list[bytes]) -> list[dict[str, any] | None]:
+        with transaction(self.cache):
+            return [self.cache.get(key) for key in keys]
+
+    @staticmethod
+    def _word_pieces(tokenizer, text: str, limit: int) -> list[tuple[int, int, int]]:
+        """
+        (start, stop, n_tokens) of the words of the text. Words longer than
+        limit tokens are bisected until every piece fits into a window.
+        """
+        words = list(razdel.tokenize(text))
+        lengths = tokenizer([word.text for word in words], add_special_tokens=False)[
+            "input_ids"
+        ]
+        pieces = []
+        for word, ids in zip(words, lengths):
+            pending = [(word.start, word.stop, max(len(ids), 1))]
+            while pending:
+                start, stop, n_tokens = pending.pop()
+                if n_tokens <= limit or stop - start == 1:
+                    pieces.append((start, stop, n_tokens))
+                    continue
+                middle = (start + stop) // 2
+                left, right = tokenizer(
+                    [text[start:middle], text[middle:stop]], add_special_tokens=False
+                )["input_ids"]
+                pending.append((middle, stop, max(len(right), 1)))
+                pending.append((start, middle, max(len(left), 1)))
+        return pieces
+
+    def _plan_windows(self, text: str) -> list[tuple[int, int, int, int]]:
+        """
+        Splits the text into overlapping windows that fit into the model.
+        Returns (start, end, keep_start, keep_end) character spans, where
+        predictions starting inside [keep_start, keep_end) belong to the window.
+        """
+        tokenizer = self.window_tokenizer
+        with self._tokenizer_lock:
+            if len(tokenizer(text)["input_ids"]) <= self.window_length:
+                return [(0, len(text), 0, len(text))]
+            limit = self.window_length - tokenizer.num_special_tokens_to_add()
+            words = self._word_pieces(tokenizer, text, limit)
+        lengths = [n_tokens for _, _, n_tokens in words]
+
+        bounds = []
+        start = 0
+        while start < len(words):
+            end, n_tokens = start, 0
+            while end < len(words) and n_tokens + lengths[end] <= limit:
+                n_tokens += lengths[end]
+                end += 1
+            end = max(end, start + 1)
+            bounds.append((start, end))
+            if end == len(words):
+                break
+            next_start, overlap = end, 0
+            while (
+                next_start > start + 1
+                and overlap + lengths[next_start - 1] <= self.stride
+            ):
+                next_start -= 1
+                overlap += lengths[next_start]
+            start = next_start
+
+        windows = []
+        keep_start = 0
+        for i, (start, end) in enumerate(bounds):
+            if i + 1 < len(bounds):
+                middle = (bounds[i + 1][0] + end) // 2
+                keep_end = words[middle][0]
+            else:
+                keep_end = len(text)
+            windows.append((words[start][0], words[end - 1][1], keep_start, keep_end))
+            keep_start = keep_end
+        return windows
+
+    def _prepare_windows(
+        self, clauses: list[str]
+    ) -> tuple[list[str], list[tuple[int, int, int, int]]]:
+        """
+        Builds model inputs for the clauses, using sliding windows for the ones
+        longer than max_length
+        """
+        texts = []
+        owners = []
+        for i, clause in enumerate(clauses):
+            for start, end, keep_start, keep_end in self._plan_windows(clause):
+                texts.append(clause[start:end])
+                owners.append((i, start, keep_start, keep_end))
+        return texts, owners
+
+    @staticmethod
+    def _merge_windows(
+        n_clauses: int, owners: list[tuple[int, int, int, int]], outputs: list
+    ) -> list[list[dict]]:
+        """
+        Merges window predictions back into clause coordinates
+        """
+        predictions = [[] for _ in range(n_clauses)]
+        for (i, offset, keep_start, keep_end), output in zip(owners, outputs):
+            for prediction in output:
+                start = prediction["start"] + offset
+                if keep_start <= start < keep_end:
+                    predictions[i].append(
+                        {
+                            **prediction,
+                            "start": start,
+                            "end": prediction["end"] + offset,
+                        }
+                    )
+        return predictions
 
     def __map_to_word_idx(
         self, spans: list[tuple[int, int]], start: int, end: int
@@ -73,21 +314,49 @@ class NeuralLabeler:
         else:
             return new_predictions
 
+    def _analyze_words(
+        self, texts: list[str]
+    ) -> list[tuple[list[str], list[tuple[int, int]], list[str]]]:
+        """
+        Splits the texts into words and lemmatizes them
+        """
+        tokenized = []
+        for text in texts:
+            tokenized_text = list(razdel.tokenize(text))
+            tokenized_text = list(
+                filter(lambda x: x.text not in string.punctuation, tokenized_text)
+            )
+            tokenized.append(tokenized_text)
+        _reconstructed_texts = [
+            " ".join(token.text for token in tokenized_text)
+            for tokenized_text in tokenized
+        ]
+        with span("NeuralLabeler.mystem", texts=len(texts)):
+            if self.mystem_pool is not None:
+                lemmas = self.mystem_pool.lemmatize_many(_reconstructed_texts)
+            else:
+                with self._mystem_lock:
+                    lemmas = [
+                        self.mystem.lemmatize(text) for text in _reconstructed_texts
+                    ]
+
+        return [
+            (
+                [token.text for token in tokenized_text],
+                [(token.start, token.stop) for token in tokenized_text],
+                text_lemmas,
+            )
+            for tokenized_text, text_lemmas in zip(tokenized, lemmas)
+        ]
+
     def __postprocess_predictions(
-        self, text: str, predictions: list[dict]
+        self, analysis: tuple, predictions: list[dict]
     ) -> list[dict]:
         """
         Postprocess predictions
         """
         response = {}
-        tokenized_text = list(razdel.tokenize(text))
-        tokenized_text = list(
-            filter(lambda x: x.text not in string.punctuation, tokenized_text)
-        )
-        words = [token.text for token in tokenized_text]
-        spans = [(token.start, token.stop) for token in tokenized_text]
-        _reconstructed_text = " ".join(words)
-        lemmas = self.mystem.lemmatize(_reconstructed_text)
+        words, spans, lemmas = analysis
 
         for prediction in predictions:
             label = prediction["entity_group"].lower()
@@ -114,18 +383,274 @@ class NeuralLabeler:
             )
         return self.__deduplicate_predictions(response)
 
-    def __call__(self, clauses: list[str]) -> list[dict[str, any]]:
-        response = []
-        predictions = self.pipeline(clauses)
-        for i in range(len(clauses)):
+    def _prepare_batch(self, clauses: list[str]) -> dict[str, any]:
+        """
+        CPU-side preparation of a batch: cache lookup, window planning
+        (subword tokenization) and word analysis of the clauses to be labeled.
+        """
+        keys = self._cache_keys(clauses)
+        with span("NeuralLabeler.cache_get", clauses=len(keys)):
+            response = self._lookup(keys)
+
+        misses = {}
+        for i, result in enumerate(response):
+            if result is None:
+                misses.setdefault(clauses[i], []).append(i)
+        n_misses = response.count(None)
+        if misses:
+            self.warmup()
+        metrics.TEXTS.inc(len(clauses), component=self.classname)
+        metrics.BATCH_SIZE.observe(len(clauses), component=self.classname)
+        metrics.CACHE_REQUESTS.inc(
+            len(clauses) - n_misses, component=self.classname, result="hit"
+        )
+        metrics.CACHE_REQUESTS.inc(n_misses, component=self.classname, result="miss")
+
+        with span("NeuralLabeler.windows", clauses=len(misses)):
+            texts, owners = self._prepare_windows(list(misses))
+        return {
+            "keys": keys,
+            "response": response,
+            "misses": misses,
+            "texts": texts,
+            "owners": owners,
+            "analyses": self._analyze_words(list(misses)),
+        }
+
+    def _forward(self, batch: dict[str, any]) -> list:
+        if not batch["texts"]:
+            return []
+        metrics.BATCH_SIZE.observe(
+            len(batch["texts"]), component=f"{self.classname}.forward"
+        )
+        with self._forward_lock:
+            with span("NeuralLabeler.forward", texts=len(batch["texts"])):
+                return self.pipeline(batch["texts"], batch_size=self.batch_size)
 
-            response.append(
+    def _finish_batch(self, batch: dict[str, any], outputs: list) -> list[dict]:
+        """
+        CPU-side post-processing of a batch: mapping predictions to words,
+        deduplication and storing the results in the cache.
+        """
+        misses = batch["misses"]
+        response = batch["response"]
+        predictions = self._merge_windows(len(misses), batch["owners"], outputs)
+        with span("NeuralLabeler.finish", clauses=len(misses)):
+            results = [
                 {
-                    "text": clauses[i],
+                    "text": clause,
                     "predictions": self.__postprocess_predictions(
-                        clauses[i], predictions[i]
+                        batch["analyses"][i], predictions[i]
                     ),
                 }
+                for i, clause in enumerate(misses)
+            ]
+        with span("NeuralLabeler.cache_set", clauses=len(misses)):
+            with transaction(self.cache):
+                for idxs, result in zip(misses.values(), results):
+                    self.cache.set(
+                        batch["keys"][idxs[0]], result, expire=self.cache_ttl
+                    )
+        for idxs, result in zip(misses.values(), results):
+            for idx in idxs:
+                response[idx] = result
+        return response
+
+    def __call__(self, clauses: list[str]) -> list[dict[str, any]]:
+        """
+        Labels the clauses, running the model only on the ones not in the cache.
+        """
+        batch = self._prepare_batch(clauses)
+        return self._finish_batch(batch, self._forward(batch))
+
+    async def alabel(self, clauses: list[str]) -> list[dict[str, any]]:
+        """
+        Asynchronous variant of __call__. The cache lookup runs in the loop's
+        default executor, the clauses that are neither cached nor already being
+        labeled by another awaiter go to the model in one batch in a bounded
+        executor.
+        """
+        loop = asyncio.get_running_loop()
+        keys = self._cache_keys(clauses)
+        response = await loop.run_in_executor(None, self._lookup, keys)
+
+        futures = {}
+        new = {}
+        for clause, key, result in zip(clauses, keys, response):
+            if result is not None or key in futures or key in new:
+                continue
+            future = self._single_flight.get(key)
+            if future is None:
+                new[key] = clause
+            else:
+                futures[key] = future
+
+        if new:
+            if self._async_executor is None:
+                self._async_executor = ThreadPoolExecutor(self.ASYNC_WORKERS)
+            batch = loop.run_in_executor(self._async_executor, self, list(new.values()))
+            for i, key in enumerate(new):
+                futures[key] = self._single_flight.start(
+                    key, lambda i=i: _select(batch, i)
+                )
+
+        for i, key in enumerate(keys):
+            if response[i] is None:
+                response[i] = await self._single_flight.wait(futures[key])
+        return response
+
+    def stream(
+        self, clauses: Iterable[str], batch_size: int | None = None
+    ) -> Iterator[dict[str, any]]:
+        """
+        Labels a stream of clauses batch by batch. Preparation of the next batch
+        and post-processing of the previous one run in worker threads while the
+        current batch is in the model, results are yielded in input order.
+        """
+        batches = _iter_batches(clauses, batch_size or self.batch_size)
+        with ThreadPoolExecutor(1) as prepare, ThreadPoolExecutor(1) as finish:
+            batch = next(batches, None)
+            prepared = prepare.submit(self._prepare_batch, batch) if batch else None
+            finished = None
+            while prepared is not None:
+                current = prepared.result()
+                batch = next(batches, None)
+                prepared = prepare.submit(self._prepare_batch, batch) if batch else None
+                outputs = self._forward(current)
+                if finished is not None:
+                    yield from finished.result()
+                finished = finish.submit(self._finish_batch, current, outputs)
+            if finished is not None:
+                yield from finished.result()
+
+
+async def _select(future: asyncio.Future, i: int):
+    # the batch is shared by the tasks of all its clauses, cancelling one of
+    # them must not cancel it for the others
+    return (await asyncio.shield(future))[i]
+
+
+def _iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class CascadeLabeler:
+    """
+    Labels clauses with the rulesets first and falls back to the neural
+    labeler only for clauses the rules could not cover. For partly covered
+    clauses (coverage below min_coverage) the rule labels are kept and
+    neural labels are added for the words the rules left unlabeled; such
+    clauses get source "mixed".
+    """
+
+    def __init__(
+        self,
+        pa_extractor,
+        srl_labeler: SrlLabeler,
+        neural_labeler: NeuralLabeler,
+        min_coverage: float = 0.0,
+        batch_size: int = 32,
+    ) -> None:
+        self.pa_extractor = pa_extractor
+        self.srl_labeler = srl_labeler
+        self.neural_labeler = neural_labeler
+        self.min_coverage = min_coverage
+        self.batch_size = batch_size
+        self.stats = {"clauses": 0, "rules": 0, "neural": 0, "mixed": 0}
+
+    @staticmethod
+    def _coverage(labeled: list[dict[str, any]]) -> float:
+        """
+        Share of predicates that got at least one role from the rules
+        """
+        if not labeled:
+            return 0.0
+        covered = sum(
+            1
+            for pa in labeled
+            if any(arg.get("role") is not None for arg in pa["arguments"])
+        )
+        return covered / len(labeled)
+
+    @staticmethod
+    def _rule_labels(labeled: list[dict[str, any]]) -> list[dict[str, any]]:
+        labels = []
+        for pa in labeled:
+            roles = [arg for arg in pa["arguments"] if arg.get("role") is not None]
+            if not roles:
+                continue
+            labels.append(
+                {
+                    "label": "predicate",
+                    "text": pa["predicate"]["text"],
+                    "score": None,
+                    "source": "rules",
+                }
             )
+            for arg in roles:
+                labels.append(
+                    {
+                        "label": arg["role"],
+                        "text": arg["text"],
+                        "score": None,
+                        "source": "rules",
+                    }
+                )
+        return labels
+
+    @staticmethod
+    def _neural_labels(predictions: dict[str, list]) -> list[dict[str, any]]:
+        return [
+            {
+                "label": label,
+                "text": prediction["text"],
+                "score": prediction["score"],
+                "source": "neural",
+            }
+            for label, label_predictions in predictions.items()
+            for prediction in label_predictions
+        ]
+
+    def __call__(self, clauses: list[str]) -> list[dict[str, any]]:
+        response = []
+        fallback = []
+        for clause in clauses:
+            labeled = self.srl_labeler(self.pa_extractor(clause))["labeled"]
+            coverage = self._coverage(labeled)
+            item = {
+                "text": clause,
+                "source": "rules",
+                "coverage": coverage,
+                "labels": self._rule_labels(labeled),
+            }
+            if coverage == 0.0 or coverage < self.min_coverage:
+                fallback.append(len(response))
+            response.append(item)
+
+        for i in range(0, len(fallback), self.batch_size):
+            batch = fallback[i : i + self.batch_size]
+            labeled = self.neural_labeler([response[idx]["text"] for idx in batch])
+            for idx, neural in zip(batch, labeled):
+                item = response[idx]
+                neural_labels = self._neural_labels(neural["predictions"])
+                if not item["labels"]:
+                    item["source"] = "neural"
+                    item["labels"] = neural_labels
+                    continue
+                covered = {label["text"] for label in item["labels"]}
+                added = [x for x in neural_labels if x["text"] not in covered]
+                if added:
+                    item["source"] = "mixed"
+                    item["labels"] = item["labels"] + added
 
+        self.stats["clauses"] += len(clauses)
+        for item in response:
+            self.stats[item["source"]] += 1
         return response
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import os
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, any]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            (self.name, dict(zip(self.labelnames, key)), value)
+            for key, value in sorted(values.items())
+        ]
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        for name, labels, value in self._samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._functions = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """
+        Computes the value with fn whenever the metric is exported
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def _samples(self) -> list[tuple[str, dict[str, str], float]]:
+        samples = super()._samples()
+        with self._lock:
+            functions = dict(self._functions)
+        for key, fn in sorted(functions.items()):
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Failed to compute {self.name} for {key}: {e}")
+                continue
+            samples.append((self.name, dict(zip(self.labelnames, key)), value))
+        return samples
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def value(self, **labels) -> dict[str, float]:
+        """
+        Returns count and sum of the observations
+        """
+        state = self._values.get(self._key(labels))
+        if state is None:
+            return {"count": 0, "sum": 0.0}
+        return {"count": state[2], "sum": state[1]}
+
+    def _samples(self) -> list[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = {k: (list(v[0]), v[1], v[2]) for k, v in self._values.items()}
+        samples = []
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append(
+                    (
+                        f"{self.name}_bucket",
+                        {**labels, "le": _format_value(bound)},
+                        cumulative,
+                    )
+                )
+            samples.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, count))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class Registry:
+    """
+    Collection of metrics exported together in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"{name} is already registered as a {metric.TYPE}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(
+        self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Writes the metrics to a file atomically, e.g. for the node exporter
+        textfile collector
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def make_http_server(self, host: str = "127.0.0.1", port: int = 9464):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                data = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464):
+        """
+        Serves GET /metrics from a background thread, returns the server
+        """
+        server = self.make_http_server(host, port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+
+REGISTRY = Registry()
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "srl_cache_requests_total",
+    "Cache lookups by component and result (hit or miss)",
+    ("component", "result"),
+)
+CACHE_BYTES = REGISTRY.gauge(
+    "srl_cache_bytes", "Bytes stored in the cache directory", ("directory",)
+)
+TEXTS = REGISTRY.counter(
+    "srl_texts_total", "Texts (or clauses) processed by component", ("component",)
+)
+TOKENS = REGISTRY.counter(
+    "srl_tokens_total", "Tokens processed by component", ("component",)
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "srl_batch_size", "Batch sizes by component", ("component",), BATCH_BUCKETS
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "srl_stage_latency_seconds",
+    "Latency of pipeline stages, recorded from profiling spans",
+    ("stage",),
+)
+
+
+def _record_latency(record: dict):
+    STAGE_LATENCY.observe(record["wall"], stage=record["name"])
+
+
+def record_stage_latencies(enable: bool = True):
+    """
+    Feeds the latencies of all profiling spans into srl_stage_latency_seconds.
+    Spans are only measured while a sink is registered, so stage latencies
+    are off by default.
+    """
+    if enable and _record_latency not in profiling._sinks:
+        profiling.add_sink(_record_latency)
+    elif not enable and _record_latency in profiling._sinks:
+        profiling.remove_sink(_record_latency)
+
+
+def track_cache(cache):
+    """
+    Exports the size of a diskcache Cache as srl_cache_bytes. The cache is
+    referenced weakly and its size is only computed on export.
+    """
+    ref = weakref.ref(cache)
+
+    def volume() -> int:
+        cache = ref()
+        if cache is None:
+            raise LookupError("The cache was garbage collected")
+        return cache.volume()
+
+    CACHE_BYTES.set_function(volume, directory=cache.directory)
+
+
+def cache_hit_ratio(component: str) -> float | None:
+    hits = CACHE_REQUESTS.value(component=component, result="hit")
+    misses = CACHE_REQUESTS.value(component=component, result="miss")
+    if not hits + misses:
+        return None
+    return hits / (hits + misses)
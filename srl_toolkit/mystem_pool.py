@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pymystem3 import Mystem
+
+logger = logging.getLogger(__name__)
+
+
+class MystemPool:
+    """
+    Pool of persistent Mystem processes. Batches of texts are joined with a
+    delimiter word into a single call and spread across the workers.
+    Crashed workers are restarted transparently.
+
+    Mystem disambiguates words by their neighbours, so joined texts can get
+    other analyses than when analyzed one by one. analyze_many(...,
+    context=False) sends every text to Mystem on its own instead.
+    """
+
+    DELIMITER = "srltoolkitdelimiter"
+
+    def __init__(self, n_workers: int = 2, chunk_size: int = 64, max_retries: int = 1):
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self._inherited = []
+        self._start()
+
+    def _start(self):
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(self.n_workers)
+        self._stats = {"waiting": 0, "busy": 0, "calls": 0, "texts": 0, "restarts": 0}
+        for _ in range(self.n_workers):
+            self._idle.put(self._spawn())
+
+    def reset(self):
+        """
+        Starts fresh workers in a forked child process. Workers inherited from
+        the parent are kept referenced and never closed, as they still serve it.
+        """
+        self._inherited.append(self._idle)
+        self._start()
+
+    @staticmethod
+    def _spawn() -> Mystem:
+        mystem = Mystem(entire_input=False)
+        mystem.start()
+        return mystem
+
+    def _restart(self, mystem: Mystem) -> Mystem:
+        try:
+            mystem.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats["restarts"] += 1
+        return self._spawn()
+
+    def _analyze_chunk(
+        self, texts: list[str], context: bool = True
+    ) -> list[list[dict]]:
+        with self._lock:
+            self._stats["waiting"] += 1
+        mystem = self._idle.get()
+        with self._lock:
+            self._stats["waiting"] -= 1
+            self._stats["busy"] += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if not context:
+                        # one request per text, Mystem sees no neighbours
+                        return [mystem.analyze(text) for text in texts]
+                    analysis = mystem.analyze(f" {self.DELIMITER} ".join(texts))
+                    break
+                except Exception:
+                    if attempt == self.max_retries:
+                        raise
+                    logger.warning("Mystem worker crashed, restarting it")
+                    mystem = self._restart(mystem)
+        finally:
+            self._idle.put(mystem)
+            with self._lock:
+                self._stats["busy"] -= 1
+                self._stats["calls"] += 1
+                self._stats["texts"] += len(texts)
+
+        groups = [[]]
+        for word in analysis:
+            if word["text"] == self.DELIMITER:
+                groups.append([])
+            else:
+                groups[-1].append(word)
+        return groups
+
+    def analyze_many(self, texts: list[str], context: bool = True) -> list[list[dict]]:
+        """
+        Returns Mystem analysis (as in Mystem.analyze) for every text. With
+        context=False the texts are analyzed independently of each other,
+        as by separate Mystem.analyze calls, at one round trip per text.
+        """
+        chunks = [
+            texts[i : i + self.chunk_size]
+            for i in range(0, len(texts), self.chunk_size)
+        ]
+        if len(chunks) == 1:
+            return self._analyze_chunk(chunks[0], context)
+        result = []
+        for groups in self._executor.map(
+            self._analyze_chunk, chunks, [context] * len(chunks)
+        ):
+            result.extend(groups)
+        return result
+
+    def lemmatize_many(self, texts: list[str], context: bool = True) -> list[list[str]]:
+        """
+        Returns lemmas (as in Mystem.lemmatize) for every text
+        """
+        return [
+            [
+                word["analysis"][0]["lex"] if word.get("analysis") else word["text"]
+                for word in analysis
+            ]
+            for analysis in self.analyze_many(texts, context)
+        ]
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns queue depth (callers waiting for a worker), busy and idle
+        workers and call counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = stats.pop("waiting")
+        stats["idle"] = self._idle.qsize()
+        stats["workers"] = self.n_workers
+        return stats
+
+    def close(self):
+        self._executor.shutdown()
+        for _ in range(self.n_workers):
+            self._idle.get().close()
+
+
+class ProcessorMystemPool:
+    """
+    Drop-in replacement for isanlp ProcessorMystem, which analyzes every
+    token on its own. Distinct tokens of the document are analyzed without
+    context across the workers of a MystemPool, so the tags match.
+    """
+
+    def __init__(self, pool: MystemPool):
+        self.pool = pool
+
+    def __call__(self, tokens, sentences):
+        distinct = list(dict.fromkeys(token.text for token in tokens))
+        analyzed = dict(zip(distinct, self.pool.analyze_many(distinct, context=False)))
+        analysis = [analyzed[token.text] for token in tokens]
+        lemmas = []
+        postags = []
+        for sentence in sentences:
+            sentence_lemmas = []
+            sentence_postags = []
+            for token_number in range(sentence.begin, sentence.end):
+                words = [x for x in analysis[token_number] if x.get("analysis")]
+                if words:
+                    sentence_lemmas.append(words[0]["analysis"][0]["lex"])
+                    sentence_postags.append(words[0]["analysis"][0]["gr"])
+                else:
+                    sentence_lemmas.append(tokens[token_number].text.lower())
+                    sentence_postags.append("")
+            lemmas.append(sentence_lemmas)
+            postags.append(sentence_postags)
+        return {"lemma": lemmas, "postag": postags}
@@ -1,3 +1,10 @@
 from .pa_extract import ArgumentExtractor, PredicateExtractor
+from .records import PredicateArgument, PredicateArguments, SentenceTable
 
-__all__ = ["PredicateExtractor", "ArgumentExtractor"]
+__all__ = [
+    "PredicateExtractor",
+    "ArgumentExtractor",
+    "PredicateArgument",
+    "PredicateArguments",
+    "SentenceTable",
+]
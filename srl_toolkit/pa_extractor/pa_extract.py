@@ -1,13 +1,11 @@
-from functools import lru_cache
-
-from isanlp import PipelineCommon
-from isanlp.processor_udpipe import ProcessorUDPipe
-
+from ..conllu_reader import iter_conllu, sentence_annotation
+from ..profiling import span
 from .prep_extract import (
     complex_preposition_child,
     get_children,
     in_complex_preposition,
 )
+from .records import PredicateArguments
 
 
 class PredicateExtractor:
@@ -95,6 +93,94 @@ class ArgumentExtractor:
 
         return result
 
+    def predicate_arguments(
+        self,
+        tokens,
+        postags,
+        morphs,
+        lemmas,
+        syntax_dep_tree,
+        preposition_search_radius=3,
+    ):
+        """Return predicate-argument structures of the sentence as dicts"""
+        return self.predicate_argument_records(
+            tokens,
+            postags,
+            morphs,
+            lemmas,
+            syntax_dep_tree,
+            preposition_search_radius,
+        ).to_dicts()
+
+    def predicate_argument_records(
+        self,
+        tokens,
+        postags,
+        morphs,
+        lemmas,
+        syntax_dep_tree,
+        preposition_search_radius=3,
+    ):
+        """
+        Return predicate-argument structures of the sentence as compact
+        records, every word they mention is stored once in a shared table
+        """
+        result = PredicateArguments()
+        rows = {}
+
+        def row(idx):
+            if idx not in rows:
+                rows[idx] = result.table.append(
+                    idx,
+                    tokens[idx].text,
+                    lemmas[idx],
+                    morphs[idx],
+                    postags[idx],
+                    self._get_preposition(
+                        idx, tokens, syntax_dep_tree, postags, preposition_search_radius
+                    ),
+                )
+            return rows[idx]
+
+        with span("argument_extractor", words=len(postags)):
+            for position in PredicateExtractor()(postags):
+                arguments = self(position, postags, morphs, lemmas, syntax_dep_tree)
+                result.structures.append(
+                    (row(position), tuple(row(x) for x in arguments))
+                )
+        return result
+
+    def from_conllu(self, source, preposition_search_radius=3):
+        """
+        Extracts predicate-argument structures from pre-parsed CoNLL-U sentences
+        (a file path or file object) without running a parser. Sentences are
+        read lazily, yields {"text", "predicate_arguments"} per sentence.
+        """
+        for sentence in iter_conllu(source):
+            annotation = sentence_annotation(sentence)
+            yield {
+                "text": annotation["text"],
+                "predicate_arguments": self.predicate_arguments(
+                    annotation["tokens"],
+                    annotation["postag"][0],
+                    annotation["morph"][0],
+                    annotation["lemma"][0],
+                    annotation["syntax_dep_tree"][0],
+                    preposition_search_radius,
+                ),
+            }
+
+    @staticmethod
+    def _get_preposition(word_idx, tokens, syntax_dep_tree, postags, radius):
+        for i in range(1, radius + 1):
+            if (
+                word_idx - i >= 0
+                and syntax_dep_tree[word_idx - i].parent == word_idx
+                and postags[word_idx - i] == "ADP"
+            ):
+                return tokens[word_idx - i].text.lower()
+        return None
+
     def _get_own_args(self, pred_number, postags, morphs, lemmas, syntax_dep_tree):
 
         arguments = []
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+
+def _pack_morph(morph: dict[str, str]) -> str:
+    return "|".join(f"{key}={value}" for key, value in morph.items())
+
+
+def _unpack_morph(morph: str) -> dict[str, str]:
+    return dict(x.split("=", 1) for x in morph.split("|") if x)
+
+
+class SentenceTable:
+    """
+    Words of a sentence referenced by its predicate-argument structures,
+    stored once per word as parallel columns. tokens holds the index of every
+    row's word in the sentence, morphological features are packed into
+    "Case=Nom|Number=Sing" strings.
+    """
+
+    __slots__ = ("tokens", "texts", "lemmas", "morphs", "postags", "prepositions")
+
+    def __init__(
+        self,
+        tokens: list[int] | None = None,
+        texts: list[str] | None = None,
+        lemmas: list[str] | None = None,
+        morphs: list[str] | None = None,
+        postags: list[str] | None = None,
+        prepositions: list[str | None] | None = None,
+    ):
+        self.tokens = tokens or []
+        self.texts = texts or []
+        self.lemmas = lemmas or []
+        self.morphs = morphs or []
+        self.postags = postags or []
+        self.prepositions = prepositions or []
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __reduce__(self):
+        return self.__class__, (
+            self.tokens,
+            self.texts,
+            self.lemmas,
+            self.morphs,
+            self.postags,
+            self.prepositions,
+        )
+
+    def append(self, token, text, lemma, morph, postag, preposition) -> int:
+        self.tokens.append(token)
+        self.texts.append(text)
+        self.lemmas.append(lemma)
+        self.morphs.append(_pack_morph(morph))
+        self.postags.append(postag)
+        self.prepositions.append(preposition)
+        return len(self.tokens) - 1
+
+    def word(self, row: int) -> dict:
+        return {
+            "text": self.texts[row],
+            "lemma": self.lemmas[row],
+            "morph": _unpack_morph(self.morphs[row]),
+            "postag": self.postags[row],
+            "preposition": self.prepositions[row],
+        }
+
+
+class PredicateArgument:
+    """
+    One predicate and its arguments as rows of a SentenceTable
+    """
+
+    __slots__ = ("table", "predicate", "arguments")
+
+    def __init__(self, table: SentenceTable, predicate: int, arguments: tuple[int]):
+        self.table = table
+        self.predicate = predicate
+        self.arguments = arguments
+
+    @property
+    def lemma(self) -> str:
+        return self.table.lemmas[self.predicate]
+
+    def to_dict(self) -> dict:
+        return {
+            "predicate": self.table.word(self.predicate),
+            "arguments": [self.table.word(x) for x in self.arguments],
+        }
+
+    def __repr__(self):
+        return f"PredicateArgument({self.to_dict()!r})"
+
+
+class PredicateArguments(Sequence):
+    """
+    Predicate-argument structures of a sentence sharing one SentenceTable.
+    Items are PredicateArgument records, to_dicts() converts them to the
+    dicts returned by ArgumentExtractor.predicate_arguments.
+    """
+
+    __slots__ = ("table", "structures")
+
+    def __init__(
+        self,
+        table: SentenceTable | None = None,
+        structures: list[tuple[int, tuple[int]]] | None = None,
+    ):
+        self.table = table if table is not None else SentenceTable()
+        self.structures = structures or []
+
+    def __len__(self) -> int:
+        return len(self.structures)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return PredicateArgument(self.table, *self.structures[i])
+
+    def __reduce__(self):
+        return self.__class__, (self.table, self.structures)
+
+    def __repr__(self):
+        return f"PredicateArguments({self.to_dicts()!r})"
+
+    def to_dicts(self) -> list[dict]:
+        return [x.to_dict() for x in self]
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import collections
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+_sinks: list[Callable[[dict], None]] = []
+_trace_memory = False
+_started_tracemalloc = False
+_local = threading.local()
+
+
+def enabled() -> bool:
+    return bool(_sinks)
+
+
+def add_sink(sink: Callable[[dict], None]):
+    """
+    Registers a sink. A sink is any callable taking a span record:
+    {"name", "start", "wall", "cpu", "thread", "depth", "error", **attrs}
+    plus "peak_memory" when memory tracing is on. Spans are only measured
+    while at least one sink is registered.
+    """
+    _sinks.append(sink)
+
+
+def remove_sink(sink: Callable[[dict], None]):
+    _sinks.remove(sink)
+
+
+def trace_memory(enable: bool = True):
+    """
+    Records the peak of traced memory (in bytes, above the level at span
+    start) for every span. Starts tracemalloc if needed (and stops it again
+    when disabled), which slows Python allocations down considerably. The
+    peak is process-wide, so concurrent spans in other threads contribute
+    to it.
+    """
+    global _trace_memory, _started_tracemalloc
+    _trace_memory = enable
+    if enable and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    elif not enable and _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+@contextlib.contextmanager
+def collect(*sinks: Callable[[dict], None]) -> Iterator:
+    """
+    Registers the sinks for the duration of the block
+    """
+    for sink in sinks:
+        add_sink(sink)
+    try:
+        yield sinks[0] if len(sinks) == 1 else sinks
+    finally:
+        for sink in sinks:
+            remove_sink(sink)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("name", "attrs", "_start", "_wall", "_cpu", "_memory", "peak")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """
+        Adds attributes (e.g. batch size) to the span record
+        """
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault("stack", [])
+        self._memory = None
+        if _trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            # fold the peak reached so far into the enclosing span before reset
+            if stack and stack[-1]._memory is not None:
+                parent = stack[-1]
+                parent.peak = max(parent.peak, peak - parent._memory)
+            tracemalloc.reset_peak()
+            self._memory = current
+            self.peak = 0
+        stack.append(self)
+        self._start = time.time()
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        stack = _local.stack
+        stack.pop()
+        record = {
+            "name": self.name,
+            "start": self._start,
+            "wall": wall,
+            "cpu": cpu,
+            "thread": threading.get_ident(),
+            "depth": len(stack),
+            "error": exc_type is not None,
+            **self.attrs,
+        }
+        if self._memory is not None:
+            peak = tracemalloc.get_traced_memory()[1] - self._memory
+            record["peak_memory"] = max(self.peak, peak)
+        for sink in list(_sinks):
+            try:
+                sink(record)
+            except Exception:
+                logger.exception(f"Profiling sink {sink!r} failed")
+        return False
+
+
+def span(name: str, **attrs):
+    """
+    Measures the enclosed block:
+
+        with span("udpipe", chars=len(text)):
+            ...
+
+    Returns a shared no-op object while no sink is registered.
+    """
+    if not _sinks:
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+
+def profiled(name: str | None = None):
+    """
+    Decorator measuring every call of the function as a span
+    """
+
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return fn(*args, **kwargs)
+            with Span(span_name, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class ProfiledProcessor:
+    """
+    Wraps an isanlp pipeline processor, measuring its calls as spans
+    """
+
+    def __init__(self, processor, name: str):
+        self.processor = processor
+        self.name = name
+
+    def __call__(self, *args, **kwargs):
+        if not _sinks:
+            return self.processor(*args, **kwargs)
+        with Span(self.name, {}):
+            return self.processor(*args, **kwargs)
+
+
+class LogSink:
+    def __init__(self, level: int = logging.DEBUG, logger: logging.Logger = logger):
+        self.level = level
+        self.logger = logger
+
+    def __call__(self, record: dict):
+        message = (
+            f"{'  ' * record['depth']}{record['name']}: "
+            f"wall {record['wall'] * 1000:.2f} ms, cpu {record['cpu'] * 1000:.2f} ms"
+        )
+        if "peak_memory" in record:
+            message += f", peak {record['peak_memory'] / 2**20:.2f} MiB"
+        self.logger.log(self.level, message)
+
+
+class AggregatingSink:
+    """
+    Keeps per-span totals in memory
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = collections.defaultdict(
+                lambda: {
+                    "count": 0,
+                    "errors": 0,
+                    "wall": 0.0,
+                    "cpu": 0.0,
+                    "wall_max": 0.0,
+                    "peak_memory": 0,
+                }
+            )
+
+    def __call__(self, record: dict):
+        with self._lock:
+            stats = self._stats[record["name"]]
+            stats["count"] += 1
+            stats["errors"] += record["error"]
+            stats["wall"] += record["wall"]
+            stats["cpu"] += record["cpu"]
+            stats["wall_max"] = max(stats["wall_max"], record["wall"])
+            stats["peak_memory"] = max(
+                stats["peak_memory"], record.get("peak_memory", 0)
+            )
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """
+        Returns per-span counts, totals and means, sorted by total wall time
+        """
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        for values in stats.values():
+            values["wall_mean"] = values["wall"] / values["count"]
+            values["cpu_mean"] = values["cpu"] / values["count"]
+        return dict(sorted(stats.items(), key=lambda x: -x[1]["wall"]))
+
+
+class JsonTraceSink:
+    """
+    Writes spans as Chrome trace events, viewable in chrome://tracing or
+    Perfetto. Events are appended as they finish, so the file stays usable
+    if the process dies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[\n")
+
+    def __call__(self, record: dict):
+        event = {
+            "name": record["name"],
+            "ph": "X",
+            "ts": record["start"] * 1e6,
+            "dur": record["wall"] * 1e6,
+            "pid": os.getpid(),
+            "tid": record["thread"],
+            "args": {
+                k: v
+                for k, v in record.items()
+                if k not in ("name", "start", "wall", "thread")
+            },
+        }
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + ",\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import collections
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class MicroBatcher:
+    """
+    Collects concurrently submitted items into micro-batches. A batch is
+    processed as soon as it has max_batch items or its first item has waited
+    max_wait seconds. At most max_queue items may wait, further submissions
+    are rejected with Overloaded.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list], list],
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+        max_queue: int = 1024,
+    ):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue(max_queue)
+        self.batch_sizes = collections.Counter()
+        self.rejected = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            self.rejected += 1
+            raise Overloaded()
+        return future
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            self.batch_sizes[len(batch)] += 1
+            try:
+                results = self.fn([item for item, _ in batch])
+            except Exception:
+                if len(batch) > 1:
+                    logger.warning(
+                        f"Batch of {len(batch)} failed, processing items one by one"
+                    )
+                self._run_items(batch)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _run_items(self, batch: list):
+        """
+        Processes the items of a failed batch separately, so that only the
+        items that fail by themselves get an exception
+        """
+        for item, future in batch:
+            try:
+                future.set_result(self.fn([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+
+
+class LatencyTracker:
+    """
+    Keeps the latest latencies of every endpoint and reports percentiles
+    """
+
+    def __init__(self, window: int = 10000):
+        self._latencies = collections.defaultdict(
+            lambda: collections.deque(maxlen=window)
+        )
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, latency: float):
+        with self._lock:
+            self._latencies[endpoint].append(latency)
+
+    @staticmethod
+    def _percentile(values: list[float], q: float) -> float:
+        return values[min(int(q * len(values)), len(values) - 1)]
+
+    def report(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            snapshot = {k: sorted(v) for k, v in self._latencies.items() if v}
+        return {
+            endpoint: {
+                "count": len(values),
+                "p50_ms": self._percentile(values, 0.5) * 1000,
+                "p99_ms": self._percentile(values, 0.99) * 1000,
+            }
+            for endpoint, values in snapshot.items()
+        }
+
+
+def _label_neural_batch(neural_labeler, requests: list[list[str]]) -> list[list[dict]]:
+    """
+    Labels the clauses of several requests in one model call
+    """
+    clauses = [clause for request in requests for clause in request]
+    labeled = neural_labeler(clauses)
+    results = []
+    position = 0
+    for request in requests:
+        results.append(labeled[position : position + len(request)])
+        position += len(request)
+    return results
+
+
+class SrlServer:
+    """
+    Local HTTP server wrapping the extractors and labelers. Every endpoint
+    takes a JSON body via POST and is served through its own MicroBatcher:
+
+        POST /clauses              {"text": ...}
+        POST /predicate-arguments  {"text": ...}
+        POST /label/rules          {"predicate_arguments": [...]}
+        POST /label/neural         {"clauses": [...]}
+        GET  /stats
+        GET  /metrics              Prometheus text format
+        GET  /health
+    """
+
+    def __init__(
+        self,
+        clause_extractor=None,
+        pa_extractor=None,
+        srl_labeler=None,
+        neural_labeler=None,
+        max_batch: int = 32,
+        max_wait: float = 0.005,
+        max_queue: int = 1024,
+        n_threads: int = 4,
+        request_timeout: float = 60.0,
+    ):
+        """
+        :param request_timeout: seconds a request may wait for its batch
+            before it is answered with 504
+        """
+        self.batchers = {}
+        self.request_timeout = request_timeout
+        self.latency = LatencyTracker()
+
+        def batcher(fn):
+            return MicroBatcher(fn, max_batch, max_wait, max_queue)
+
+        if clause_extractor is not None:
+            self.batchers["/clauses"] = batcher(
+                lambda texts: clause_extractor.extract_many(texts, n_threads)
+            )
+        if pa_extractor is not None:
+            self.batchers["/predicate-arguments"] = batcher(
+                lambda texts: pa_extractor.extract_many(texts, n_threads)
+            )
+        if srl_labeler is not None:
+            self.batchers["/label/rules"] = batcher(
+                lambda pas: [srl_labeler(x) for x in pas]
+            )
+        if neural_labeler is not None:
+            self.batchers["/label/neural"] = batcher(
+                lambda requests: _label_neural_batch(neural_labeler, requests)
+            )
+
+    @staticmethod
+    def _parse(endpoint: str, body: dict):
+        """
+        Validates the request body and returns the item to batch, raises
+        BadRequest for bodies that would fail the whole batch
+        """
+        if not isinstance(body, dict):
+            raise BadRequest("Expected a JSON object")
+        if endpoint in ("/clauses", "/predicate-arguments"):
+            if not isinstance(body.get("text"), str):
+                raise BadRequest('"text" must be a string')
+            return body["text"]
+        if endpoint == "/label/neural":
+            clauses = body.get("clauses")
+            if not isinstance(clauses, list) or not all(
+                isinstance(x, str) for x in clauses
+            ):
+                raise BadRequest('"clauses" must be a list of strings')
+            return clauses
+        pas = body.get("predicate_arguments")
+        if not isinstance(pas, list) or not all(
+            isinstance(pa, dict)
+            and isinstance(pa.get("predicate"), dict)
+            and isinstance(pa.get("arguments"), list)
+            and all(isinstance(x, dict) for x in pa["arguments"])
+            for pa in pas
+        ):
+            raise BadRequest(
+                '"predicate_arguments" must be a list of {"predicate", "arguments"}'
+            )
+        return body
+
+    def stats(self) -> dict[str, any]:
+        return {
+            "latency": self.latency.report(),
+            "queue_depth": {k: v.queue_depth for k, v in self.batchers.items()},
+            "rejected": {k: v.rejected for k, v in self.batchers.items()},
+            "batch_sizes": {
+                k: dict(sorted(v.batch_sizes.items())) for k, v in self.batchers.items()
+            },
+        }
+
+    def handle(self, endpoint: str, body: dict) -> tuple[int, any]:
+        """
+        Processes one request, returns HTTP status and response payload
+        """
+        if endpoint not in self.batchers:
+            return 404, {"error": f"Unknown endpoint {endpoint}"}
+        _t1 = time.perf_counter()
+        try:
+            item = self._parse(endpoint, body)
+        except BadRequest as e:
+            return 400, {"error": f"Malformed request: {e}"}
+        try:
+            future = self.batchers[endpoint].submit(item)
+        except Overloaded:
+            return 503, {"error": "Server is overloaded"}
+        try:
+            result = future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            logger.error(f"Request to {endpoint} timed out")
+            return 504, {"error": "Request timed out"}
+        except Exception:
+            logger.exception(f"Failed to process request to {endpoint}")
+            return 500, {"error": "Internal server error"}
+        self.latency.add(endpoint, time.perf_counter() - _t1)
+        return 200, result
+
+    def make_http_server(self, host: str = "127.0.0.1", port: int = 8080):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._reply(200, {"status": "ok"})
+                elif self.path == "/stats":
+                    self._reply(200, server.stats())
+                elif self.path == "/metrics":
+                    data = metrics.REGISTRY.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self._reply(404, {"error": f"Unknown endpoint {self.path}"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._reply(400, {"error": "Malformed JSON"})
+                    return
+                self._reply(*server.handle(self.path, body))
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 8080):
+        http_server = self.make_http_server(host, port)
+        logger.info(f"Serving on http://{host}:{port}")
+        try:
+            http_server.serve_forever()
+        finally:
+            http_server.server_close()
@@ -0,0 +1,352 @@
+"""
+Columnar on-disk store for predicate-argument structures of annotated
+corpora. A store is a directory of fixed-width tables, every string is kept
+once in a string dictionary and referenced by its id:
+
+    clauses.bin      document, text, first_predicate, n_predicates
+    predicates.bin   clause, word, first_argument, n_arguments
+    arguments.bin    predicate, word, role
+    words.bin        text, lemma, postag, morph, preposition
+    strings.bin      UTF-8 bytes of all strings
+    string_ends.bin  end offset of every string in strings.bin
+    meta.json        row counts, written last on every flush
+
+Rows are appended in batches, the reader memory-maps the tables, so columns
+such as `reader.words["lemma"]` are numpy arrays backed by the files.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Iterable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+NULL = np.iinfo(np.uint32).max
+
+CLAUSE_DTYPE = np.dtype(
+    [
+        ("document", "<u4"),
+        ("text", "<u4"),
+        ("first_predicate", "<u8"),
+        ("n_predicates", "<u4"),
+    ]
+)
+PREDICATE_DTYPE = np.dtype(
+    [
+        ("clause", "<u8"),
+        ("word", "<u8"),
+        ("first_argument", "<u8"),
+        ("n_arguments", "<u4"),
+    ]
+)
+ARGUMENT_DTYPE = np.dtype([("predicate", "<u8"), ("word", "<u8"), ("role", "<u4")])
+WORD_DTYPE = np.dtype(
+    [
+        ("text", "<u4"),
+        ("lemma", "<u4"),
+        ("postag", "<u4"),
+        ("morph", "<u4"),
+        ("preposition", "<u4"),
+    ]
+)
+TABLES = {
+    "clauses": CLAUSE_DTYPE,
+    "predicates": PREDICATE_DTYPE,
+    "arguments": ARGUMENT_DTYPE,
+    "words": WORD_DTYPE,
+}
+
+
+def _encode_morph(morph: dict[str, str] | None) -> str | None:
+    if morph is None:
+        return None
+    return "|".join(f"{key}={value}" for key, value in sorted(morph.items()))
+
+
+def _decode_morph(morph: str | None) -> dict[str, str] | None:
+    if morph is None:
+        return None
+    return dict(x.split("=", 1) for x in morph.split("|") if x)
+
+
+def _read_meta(path: str) -> dict | None:
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    if meta["version"] != VERSION:
+        raise ValueError(
+            f"Unsupported store version {meta['version']} in {path}, "
+            f"expected {VERSION}"
+        )
+    return meta
+
+
+def _memmap(path: str, name: str, dtype, count: int) -> np.ndarray:
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(
+        os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(count,)
+    )
+
+
+class StoreWriter:
+    """
+    Appends annotated clauses to a store, creating it if needed. Rows are
+    buffered and written every flush_every clauses and on close(); a store
+    reopened after a crash continues from the last complete flush.
+    """
+
+    def __init__(self, path: str, flush_every: int = 10000):
+        self.path = path
+        self.flush_every = flush_every
+        os.makedirs(path, exist_ok=True)
+        meta = _read_meta(path) or {
+            "version": VERSION,
+            "documents": 0,
+            "counts": {name: 0 for name in [*TABLES, "strings"]},
+            "string_bytes": 0,
+        }
+        self._meta = meta
+        self._truncate()
+
+        reader = StoreReader(path) if meta["counts"]["strings"] else None
+        self._strings = {reader.string(i): i for i in range(meta["counts"]["strings"])}
+        self._pending = {name: [] for name in TABLES}
+        self._pending_strings = []
+
+    def _truncate(self):
+        """
+        Drops rows written after the last meta.json, e.g. by a killed writer
+        """
+        sizes = {name: dtype.itemsize for name, dtype in TABLES.items()}
+        sizes["string_ends"] = 8
+        counts = {
+            **self._meta["counts"],
+            "string_ends": self._meta["counts"]["strings"],
+        }
+        for name, itemsize in sizes.items():
+            with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                f.truncate(counts[name] * itemsize)
+        with open(os.path.join(self.path, "strings.bin"), "ab") as f:
+            f.truncate(self._meta["string_bytes"])
+
+    def _count(self, name: str) -> int:
+        return self._meta["counts"][name] + len(self._pending[name])
+
+    def _string(self, value: str | None) -> int:
+        if value is None:
+            return NULL
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = self._strings[value] = len(self._strings)
+            self._pending_strings.append(value)
+        return string_id
+
+    def _word(self, word: dict) -> int:
+        self._pending["words"].append(
+            (
+                self._string(word["text"]),
+                self._string(word["lemma"]),
+                self._string(word["postag"]),
+                self._string(_encode_morph(word.get("morph"))),
+                self._string(word.get("preposition")),
+            )
+        )
+        return self._count("words") - 1
+
+    def add(self, clause: dict, document: int | None = None) -> int:
+        """
+        Adds a clause {"text", "predicate_arguments"} as returned by the
+        Annotator or PredicateArgumentExtractor, with structures as dicts or
+        PredicateArgument records. Labeled structures are taken from
+        "labeled" if present, so roles assigned by SrlLabeler are kept.
+        Without a document id the clause starts a new document. Returns the
+        clause id.
+        """
+        if document is None:
+            document = self._meta["documents"]
+            self._meta["documents"] += 1
+        pas = clause.get("labeled", clause.get("predicate_arguments", []))
+        clause_id = self._count("clauses")
+        self._pending["clauses"].append(
+            (
+                document,
+                self._string(clause.get("text")),
+                self._count("predicates"),
+                len(pas),
+            )
+        )
+        for pa in pas:
+            if not isinstance(pa, dict):
+                pa = pa.to_dict()
+            predicate_id = self._count("predicates")
+            self._pending["predicates"].append(
+                (
+                    clause_id,
+                    self._word(pa["predicate"]),
+                    self._count("arguments"),
+                    len(pa["arguments"]),
+                )
+            )
+            for argument in pa["arguments"]:
+                self._pending["arguments"].append(
+                    (
+                        predicate_id,
+                        self._word(argument),
+                        self._string(argument.get("role")),
+                    )
+                )
+
+        if len(self._pending["clauses"]) >= self.flush_every:
+            self.flush()
+        return clause_id
+
+    def add_document(self, result: dict) -> list[int]:
+        """
+        Adds the clauses of an Annotator result {"clauses": [...]} as one
+        document, returns their ids
+        """
+        document = self._meta["documents"]
+        self._meta["documents"] += 1
+        return [self.add(clause, document) for clause in result["clauses"]]
+
+    def extend(self, clauses: Iterable[dict]):
+        for clause in clauses:
+            self.add(clause)
+
+    def flush(self):
+        for name, dtype in TABLES.items():
+            rows = self._pending[name]
+            if not rows:
+                continue
+            with open(os.path.join(self.path, f"{name}.bin"), "ab") as f:
+                f.write(np.array(rows, dtype=dtype).tobytes())
+            self._meta["counts"][name] += len(rows)
+            rows.clear()
+
+        if self._pending_strings:
+            encoded = [x.encode("utf-8") for x in self._pending_strings]
+            ends = np.cumsum([len(x) for x in encoded], dtype="<u8")
+            ends += self._meta["string_bytes"]
+            with open(os.path.join(self.path, "strings.bin"), "ab") as f:
+                f.write(b"".join(encoded))
+            with open(os.path.join(self.path, "string_ends.bin"), "ab") as f:
+                f.write(ends.tobytes())
+            self._meta["counts"]["strings"] += len(encoded)
+            self._meta["string_bytes"] = int(ends[-1])
+            self._pending_strings.clear()
+
+        meta_path = os.path.join(self.path, "meta.json")
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(self._meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class StoreReader:
+    """
+    Memory-mapped read access to a store. The tables are exposed as numpy
+    structured arrays (clauses, predicates, arguments, words) holding string
+    ids; string() and lookup() translate between ids and strings, NULL stands
+    for None. Only rows of the last complete flush are visible.
+    """
+
+    def __init__(self, path: str):
+        meta = _read_meta(path)
+        if meta is None:
+            raise FileNotFoundError(f"No store in {path}")
+        self.path = path
+        self.n_documents = meta["documents"]
+        counts = meta["counts"]
+        self.clauses = _memmap(path, "clauses", CLAUSE_DTYPE, counts["clauses"])
+        self.predicates = _memmap(
+            path, "predicates", PREDICATE_DTYPE, counts["predicates"]
+        )
+        self.arguments = _memmap(path, "arguments", ARGUMENT_DTYPE, counts["arguments"])
+        self.words = _memmap(path, "words", WORD_DTYPE, counts["words"])
+        self._string_ends = _memmap(path, "string_ends", "<u8", counts["strings"])
+        self._string_data = _memmap(path, "strings", np.uint8, meta["string_bytes"])
+        self._string_ids = None
+
+    def __len__(self) -> int:
+        return len(self.clauses)
+
+    def string(self, string_id: int) -> str | None:
+        if string_id == NULL:
+            return None
+        start = int(self._string_ends[string_id - 1]) if string_id else 0
+        end = int(self._string_ends[string_id])
+        return self._string_data[start:end].tobytes().decode("utf-8")
+
+    def lookup(self, value: str) -> int | None:
+        """
+        Id of the string, None if the store does not contain it. The reverse
+        dictionary is built on the first call.
+        """
+        if self._string_ids is None:
+            self._string_ids = {
+                self.string(i): i for i in range(len(self._string_ends))
+            }
+        return self._string_ids.get(value)
+
+    def word(self, word_id: int) -> dict:
+        row = self.words[word_id]
+        return {
+            "text": self.string(row["text"]),
+            "lemma": self.string(row["lemma"]),
+            "postag": self.string(row["postag"]),
+            "morph": _decode_morph(self.string(row["morph"])),
+            "preposition": self.string(row["preposition"]),
+        }
+
+    def clause(self, clause_id: int) -> dict:
+        """
+        Rebuilds the clause as a dict. Arguments get a "role" key only if a
+        role was stored for them.
+        """
+        row = self.clauses[clause_id]
+        first = int(row["first_predicate"])
+        pas = []
+        for predicate in self.predicates[first : first + int(row["n_predicates"])]:
+            start = int(predicate["first_argument"])
+            arguments = []
+            for argument in self.arguments[
+                start : start + int(predicate["n_arguments"])
+            ]:
+                word = self.word(argument["word"])
+                if argument["role"] != NULL:
+                    word["role"] = self.string(argument["role"])
+                arguments.append(word)
+            pas.append(
+                {"predicate": self.word(predicate["word"]), "arguments": arguments}
+            )
+        return {
+            "document": int(row["document"]),
+            "text": self.string(row["text"]),
+            "predicate_arguments": pas,
+        }
+
+    def __getitem__(self, clause_id: int) -> dict:
+        if not 0 <= clause_id < len(self):
+            raise IndexError(clause_id)
+        return self.clause(clause_id)
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            yield self.clause(i)
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from srl_toolkit.aio import SingleFlight
+from srl_toolkit.extractor import CachedExtractor
+from srl_toolkit.labeler import NeuralLabeler
+
+
+class CountingExtractor(CachedExtractor):
+    def __init__(self, cache_dir):
+        super().__init__(cache_dir)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _extract(self, text):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.05)
+        return {"clauses": [text]}
+
+
+def test_single_flight():
+    calls = []
+
+    async def compute(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(
+            *[flight.run("a", lambda: compute(21)) for _ in range(10)]
+        )
+        return results
+
+    assert asyncio.run(main()) == [42] * 10
+    assert calls == [21]
+
+
+def test_single_flight_cancellation():
+    async def main():
+        flight = SingleFlight()
+        started = flight.start("a", lambda: asyncio.sleep(0.05, result="done"))
+        first = asyncio.ensure_future(flight.wait(started))
+        second = asyncio.ensure_future(flight.wait(started))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+        assert first.cancelled()
+
+        lonely = flight.start("b", lambda: asyncio.sleep(10))
+        waiter = asyncio.ensure_future(flight.wait(lonely))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        assert lonely.cancelled()
+
+    asyncio.run(main())
+
+
+def test_aextract(tmp_path):
+    extractor = CountingExtractor(str(tmp_path))
+
+    async def main():
+        results = await asyncio.gather(
+            *[extractor.aextract(text) for text in ["a", "b", "a", "a", "b"]]
+        )
+        cached = await extractor.aextract("a")
+        return results, cached
+
+    results, cached = asyncio.run(main())
+    assert results == [{"clauses": [x]} for x in "abaab"]
+    assert cached == {"clauses": ["a"]}
+    assert extractor.calls == 2
+
+
+class SlowNeuralLabeler(NeuralLabeler):
+    def __init__(self, cache_dir):
+        super().__init__("model", good_lemmas=None, cache_dir=cache_dir, lazy=True)
+        self.calls = []
+
+    def __call__(self, clauses):
+        self.calls.append(list(clauses))
+        time.sleep(0.1)
+        return [{"text": clause, "predictions": {}} for clause in clauses]
+
+
+def test_alabel_cancellation(tmp_path):
+    labeler = SlowNeuralLabeler(str(tmp_path))
+
+    async def main():
+        first = asyncio.ensure_future(labeler.alabel(["a", "b"]))
+        await asyncio.sleep(0.02)
+        # only waits for "b", which is labeled in the batch of the first call
+        second = asyncio.ensure_future(labeler.alabel(["b"]))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == [{"text": "b", "predictions": {}}]
+    assert labeler.calls == [["a", "b"]]
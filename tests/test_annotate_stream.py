@@ -0,0 +1,167 @@
+import gc
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from srl_toolkit import annotator
+from srl_toolkit.annotator import annotate_stream
+from srl_toolkit.cli import main
+
+fork_only = pytest.mark.skipif(
+    mp.get_start_method() != "fork", reason="workers need the patched Annotator"
+)
+
+
+class StubAnnotator:
+    calls = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def __call__(self, text):
+        StubAnnotator.calls.append(text)
+        if self.kwargs.get("jitter"):
+            time.sleep(random.random() * 0.01)
+        return {"clauses": [{"text": text.upper()}]}
+
+
+@pytest.fixture(autouse=True)
+def stub_annotator(monkeypatch):
+    monkeypatch.setattr(annotator, "Annotator", StubAnnotator)
+    StubAnnotator.calls = []
+
+
+def records(n):
+    return [{"id": i, "text": f"text {i}"} for i in range(n)]
+
+
+@pytest.mark.parametrize("processes", [0, pytest.param(2, marks=fork_only)])
+def test_input_order(processes):
+    results = list(annotate_stream(records(50), {"jitter": True}, processes=processes))
+
+    assert [x["id"] for x in results] == list(range(50))
+    assert results[7]["annotation"] == {"clauses": [{"text": "TEXT 7"}]}
+
+
+@fork_only
+def test_max_pending():
+    pulled = 0
+
+    def source():
+        nonlocal pulled
+        for record in records(30):
+            pulled += 1
+            yield record
+
+    for i, _ in enumerate(annotate_stream(source(), {}, processes=1, max_pending=3)):
+        assert pulled <= i + 3
+
+
+def run_annotate(tmp_path, *args):
+    model = tmp_path / "model"
+    model.touch()
+    result = CliRunner().invoke(
+        main,
+        [
+            "annotate",
+            str(tmp_path / "corpus.txt"),
+            str(tmp_path / "out.jsonl"),
+            "--udpipe-path",
+            str(model),
+            "--cb-path",
+            str(model),
+            "--cache-dir",
+            str(tmp_path / "cache"),
+            "-j",
+            "0",
+            *args,
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    with open(tmp_path / "out.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("a\nb\nc\n", encoding="utf-8")
+    assert [x["text"] for x in run_annotate(tmp_path, "--checkpoint-every", "2")] == [
+        "a",
+        "b",
+        "c",
+    ]
+    with open(tmp_path / "out.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"text": "partial')
+    corpus.write_text("a\nb\nc\nd\ne\n", encoding="utf-8")
+    StubAnnotator.calls = []
+
+    results = run_annotate(tmp_path)
+
+    assert [x["text"] for x in results] == ["a", "b", "c", "d", "e"]
+    assert StubAnnotator.calls == ["d", "e"]
+    with open(f"{tmp_path / 'out.jsonl'}.checkpoint") as f:
+        checkpoint = json.load(f)
+    assert checkpoint == {
+        "done": 5,
+        "offset": os.path.getsize(tmp_path / "out.jsonl"),
+    }
+
+
+def test_resume_without_output(tmp_path):
+    (tmp_path / "corpus.txt").write_text("a\nb\n", encoding="utf-8")
+    run_annotate(tmp_path)
+    os.remove(tmp_path / "out.jsonl")
+
+    results = run_annotate(tmp_path)
+
+    assert [x["text"] for x in results] == ["a", "b"]
+    assert b"\0" not in (tmp_path / "out.jsonl").read_bytes()
+
+
+class ForkAnnotator(StubAnnotator):
+    def before_fork(self):
+        self.loaded_in = os.getpid()
+
+    def after_fork(self):
+        if self.kwargs.get("slow_fork"):
+            time.sleep(10)
+
+    def __call__(self, text):
+        return {"loaded_in": self.loaded_in, "pid": os.getpid()}
+
+
+@pytest.fixture
+def fork_annotator(monkeypatch):
+    monkeypatch.setattr(annotator, "Annotator", ForkAnnotator)
+    yield
+    gc.unfreeze()
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+def test_prefork(fork_annotator):
+    results = list(annotate_stream(records(20), {}, processes=2, prefork=True))
+
+    assert [x["id"] for x in results] == list(range(20))
+    assert {x["annotation"]["loaded_in"] for x in results} == {os.getpid()}
+    assert os.getpid() not in {x["annotation"]["pid"] for x in results}
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+def test_prefork_ready_timeout(fork_annotator):
+    started = time.time()
+    with pytest.raises(RuntimeError, match="not ready"):
+        list(
+            annotate_stream(
+                records(2),
+                {"slow_fork": True},
+                processes=2,
+                prefork=True,
+                ready_timeout=0.5,
+            )
+        )
+    assert time.time() - started < 5
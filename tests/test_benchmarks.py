@@ -0,0 +1,72 @@
+from benchmarks.load import make_corpus, run_load
+from benchmarks.run import compare, measure
+from benchmarks.synthetic import StubParser, document_annotation, synthetic_conllu
+from srl_toolkit.conllu_reader import parse_conllu
+
+
+def test_synthetic_treebank():
+    data, boundaries = synthetic_conllu(5, clauses_per_sentence=2)
+    sentences = list(parse_conllu(data))
+
+    assert len(sentences) == len(boundaries) == 5
+    for sentence, starts in zip(sentences, boundaries):
+        assert sum(word["head"] == -1 for word in sentence) == 1
+        assert sentence[starts[1] - 1]["form"] == ","
+
+    document = document_annotation(sentences)
+    assert len(document["sentences"]) == 5
+    assert all(document["text"][t.begin : t.end] == t.text for t in document["tokens"])
+    parser = StubParser(sentences)
+    assert parser(sentences[0].metadata["text"])["tokens"][0].begin == 0
+
+
+def test_measure_and_compare():
+    result = measure(lambda: sum(range(100)), repeat=2, min_time=0.001)
+    assert result["number"] >= 1 and result["median"] > 0
+
+    old = {"results": {"a[1]": {"median": 1.0}, "b[1]": {"median": 1.0}}}
+    new = {"results": {"a[1]": {"median": 1.5}, "b[1]": {"median": 0.5}}}
+    assert compare(old, new, threshold=1.2) == ["a[1]"]
+
+
+class FakeTarget:
+    component = "FakeExtractor"
+
+    def __init__(self):
+        self.seen = set()
+        self.hits = 0
+
+    def __call__(self, text):
+        if text == "boom":
+            raise RuntimeError()
+        self.hits += text in self.seen
+        self.seen.add(text)
+
+    def metrics(self):
+        return (
+            f'srl_cache_requests_total{{component="FakeExtractor",result="hit"}} '
+            f"{self.hits}\n"
+            f'srl_cache_requests_total{{component="FakeExtractor",result="miss"}} '
+            f"{len(self.seen)}\n"
+        )
+
+    def clear_cache(self):
+        self.seen.clear()
+        return True
+
+
+def test_load_report():
+    target = FakeTarget()
+    texts = make_corpus(["a", "b", "boom"], 30)
+
+    closed = run_load(target, texts, concurrency=4, rss_interval=0.01)
+    opened = run_load(target, texts, qps=1000, concurrency=4, rss_interval=0.01)
+
+    for report in (closed, opened):
+        assert report["requests"] == 30
+        assert report["errors"] == texts.count("boom")
+        assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+        assert report["rss"]["max_mb"] > 0
+    n_ok = len(texts) - texts.count("boom")
+    assert closed["cache_hit_ratio"] == (n_ok - 2) / n_ok
+    assert opened["cache_hit_ratio"] == 1.0
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+from diskcache import Cache, FanoutCache
+from srl_toolkit.cache import (
+    export_snapshot,
+    import_snapshot,
+    open_cache,
+    shard_count,
+    transaction,
+)
+from srl_toolkit.cli import main
+from srl_toolkit.extractor import CachedExtractor
+
+
+class UpperExtractor(CachedExtractor):
+    def _extract(self, text):
+        return {"text": text.upper()}
+
+
+def test_open_cache(tmp_path):
+    cache = open_cache(str(tmp_path / "single"))
+    assert isinstance(cache, Cache)
+
+    cache = open_cache(
+        str(tmp_path / "sharded"),
+        shards=4,
+        size_limit=2**20,
+        eviction_policy="least-recently-used",
+    )
+    assert isinstance(cache, FanoutCache)
+    # FanoutCache splits the limit between the shards
+    assert cache.size_limit * 4 == 2**20
+    assert cache.eviction_policy == "least-recently-used"
+
+
+def test_extractor_ttl(tmp_path):
+    extractor = UpperExtractor(open_cache(str(tmp_path), shards=2), cache_ttl=60)
+    assert extractor("a") == {"text": "A"}
+    key = next(iter(extractor.cache))
+    value, expire_time = extractor.cache.get(key, expire_time=True)
+    assert value is not None
+    assert 0 < expire_time - time.time() <= 60
+
+
+def test_snapshot_roundtrip(tmp_path):
+    source = open_cache(str(tmp_path / "source"))
+    source.set("kept", {"text": "A"})
+    source.set("expiring", [1, 2], expire=60)
+    source.set("expired", "B", expire=0.01)
+    time.sleep(0.05)
+
+    snapshot = str(tmp_path / "cache.snapshot")
+    assert export_snapshot(source, snapshot) == 2
+
+    target = open_cache(str(tmp_path / "target"), shards=4)
+    assert import_snapshot(target, snapshot) == 2
+    assert target["kept"] == {"text": "A"}
+    assert target["expiring"] == [1, 2]
+    assert target.get("expired") is None
+    assert target.get("expiring", expire_time=True)[1] is not None
+
+
+def test_shard_layout_is_detected(tmp_path):
+    directory = str(tmp_path / "sharded")
+    assert shard_count(directory) is None
+    open_cache(directory, shards=4).set("a", 1)
+
+    cache = open_cache(directory)
+    assert isinstance(cache, FanoutCache)
+    assert shard_count(directory) == 4
+    assert cache["a"] == 1
+    with pytest.raises(ValueError):
+        open_cache(directory, shards=1)
+
+
+def test_transaction_does_not_lock_all_shards(tmp_path):
+    cache = open_cache(str(tmp_path), shards=4)
+    written = []
+    writer = threading.Thread(target=lambda: written.append(cache.set("b", 2)))
+    with transaction(cache):
+        cache.get("a")
+        writer.start()
+        writer.join(timeout=5)
+    assert written == [True]
+
+
+def test_cli_export_and_import(tmp_path):
+    source = open_cache(str(tmp_path / "source"), shards=4)
+    for i in range(10):
+        source.set(f"key {i}", i)
+    snapshot = str(tmp_path / "cache.snapshot")
+    runner = CliRunner()
+
+    result = runner.invoke(
+        main, ["cache", "export", snapshot, "--cache-dir", str(tmp_path / "source")]
+    )
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(
+        main,
+        [
+            "cache",
+            "import",
+            snapshot,
+            "--cache-dir",
+            str(tmp_path / "target"),
+            "--cache-ttl",
+            "60",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    target = open_cache(str(tmp_path / "target"))
+    assert isinstance(target, Cache)
+    assert sorted(target) == sorted(source)
+    value, expire_time = target.get("key 3", expire_time=True)
+    assert value == 3
+    assert 0 < expire_time - time.time() <= 60
+
+    result = runner.invoke(
+        main, ["cache", "export", snapshot, "--cache-dir", str(tmp_path / "missing")]
+    )
+    assert result.exit_code != 0
@@ -0,0 +1,117 @@
+import pytest
+from srl_toolkit.labeler import CascadeLabeler, SrlLabeler
+from srl_toolkit.ruleset import Rule, Ruleset
+
+
+class FakePAExtractor:
+    def __call__(self, text):
+        word, *rest = text.split()
+        return {
+            "predicate_arguments": [
+                {
+                    "predicate": {"text": word, "postag": "VERB", "morph": {}},
+                    "arguments": [
+                        {"text": w, "postag": "NOUN", "morph": {"Case": "Loc"}}
+                        for w in rest
+                    ],
+                }
+            ]
+        }
+
+
+class FakeNeuralLabeler:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, clauses):
+        self.calls.append(list(clauses))
+        return [
+            {
+                "text": clause,
+                "predictions": {
+                    "predicate": [{"idxs": [0], "text": "x", "score": 0.9}]
+                },
+            }
+            for clause in clauses
+        ]
+
+
+@pytest.fixture
+def labeler():
+    rulesets = [
+        Ruleset(
+            predicate_rule=Rule(pattern={"postag": "VERB"}),
+            argument_rules={"локатив": [Rule(pattern={"Case": "Loc"})]},
+        )
+    ]
+    return CascadeLabeler(FakePAExtractor(), SrlLabeler(rulesets), FakeNeuralLabeler())
+
+
+def test_cascade(labeler):
+    result = labeler(["прыгала раме", "спала", "сидела столе"])
+
+    assert [x["source"] for x in result] == ["rules", "neural", "rules"]
+    assert labeler.neural_labeler.calls == [["спала"]]
+    assert result[0]["labels"][1] == {
+        "label": "локатив",
+        "text": "раме",
+        "score": None,
+        "source": "rules",
+    }
+    assert result[1]["labels"][0]["source"] == "neural"
+    assert labeler.stats == {"clauses": 3, "rules": 2, "neural": 1, "mixed": 0}
+
+
+def test_stats_count_kept_rule_labels(labeler):
+    extract = labeler.pa_extractor
+    labeler.pa_extractor = lambda text: {
+        "predicate_arguments": [
+            *extract(text)["predicate_arguments"],
+            *extract("спала")["predicate_arguments"],
+        ]
+    }
+    labeler.neural_labeler = lambda clauses: [
+        {"text": clause, "predictions": {}} for clause in clauses
+    ]
+    labeler.min_coverage = 1.0
+    result = labeler(["прыгала раме"])
+
+    # half covered, so the clause goes to the neural labeler, which finds
+    # nothing and the rule labels are kept
+    assert result[0]["coverage"] == 0.5
+    assert result[0]["source"] == "rules"
+    assert labeler.stats == {"clauses": 1, "rules": 1, "neural": 0, "mixed": 0}
+
+
+def test_partial_coverage_is_merged(labeler):
+    extract = labeler.pa_extractor
+    labeler.pa_extractor = lambda text: {
+        "predicate_arguments": [
+            *extract("прыгала раме")["predicate_arguments"],
+            *extract("спала")["predicate_arguments"],
+        ]
+    }
+    labeler.neural_labeler = lambda clauses: [
+        {
+            "text": clause,
+            "predictions": {
+                "predicate": [
+                    {"text": "прыгала", "score": 0.9},
+                    {"text": "спала", "score": 0.8},
+                ],
+                "агенс": [{"text": "кошка", "score": 0.7}],
+            },
+        }
+        for clause in clauses
+    ]
+    labeler.min_coverage = 1.0
+    [result] = labeler(["кошка прыгала на раме и спала"])
+
+    assert result["source"] == "mixed"
+    assert [(x["label"], x["text"], x["source"]) for x in result["labels"]] == [
+        ("predicate", "прыгала", "rules"),
+        ("локатив", "раме", "rules"),
+        ("predicate", "спала", "neural"),
+        ("агенс", "кошка", "neural"),
+    ]
+    assert labeler.stats == {"clauses": 1, "rules": 0, "neural": 0, "mixed": 1}
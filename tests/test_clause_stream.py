@@ -0,0 +1,185 @@
+import re
+
+import numpy as np
+import pytest
+import razdel
+from diskcache import Cache
+from isanlp.annotation import Token
+from srl_toolkit.clause_segmenter.processor import ClauseSegmenterProcessor
+from srl_toolkit.extractor import ClauseExtractor
+
+
+class FakePipeline:
+    """Tokenizes with razdel, starts a clause at every sentence and after commas"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        tokens = [Token(t.text, t.start, t.stop) for t in razdel.tokenize(text)]
+        sentence_starts = self._sentence_starts(text)
+        numbers = [
+            i
+            for i, token in enumerate(tokens)
+            if token.begin in sentence_starts or (i and tokens[i - 1].text == ",")
+        ]
+        clauses = ClauseSegmenterProcessor._build_discourse_units(
+            None, text, tokens, np.array(numbers, dtype=int)
+        )
+        return {"tokens": tokens, "clauses": clauses}
+
+    @staticmethod
+    def _sentence_starts(text):
+        return {s.start for s in razdel.sentenize(text)}
+
+
+class OneSentencePipeline(FakePipeline):
+    """Keeps the whole text in one sentence where razdel splits it"""
+
+    @staticmethod
+    def _sentence_starts(text):
+        return {min((t.start for t in razdel.tokenize(text)), default=0)}
+
+
+class ParagraphPipeline(FakePipeline):
+    """Starts sentences only after blank lines, as UDPipe does for joined text"""
+
+    @staticmethod
+    def _sentence_starts(text):
+        starts = {0} | {m.end() for m in re.finditer("\n\n", text)}
+        tokens = [t.start for t in razdel.tokenize(text)]
+        return {min((t for t in tokens if t >= x), default=0) for x in starts}
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "sentence_cache"])
+def extractor(request, tmp_path):
+    extractor = ClauseExtractor.__new__(ClauseExtractor)
+    extractor.pipeline = FakePipeline()
+    extractor.cache = Cache(str(tmp_path))
+    extractor.morphology = "mystem"
+    extractor.sentence_cache = request.param
+    return extractor
+
+
+TEXT = (
+    "Мама мыла раму, а папа курил сигарету. Дети спали.  "
+    "Кот сидел на окне, смотрел на улицу, а собака лаяла. Конец"
+)
+
+
+@pytest.mark.parametrize("window_sentences", [1, 2, 100])
+def test_iter_clauses_matches_whole_text(extractor, window_sentences):
+    expected = extractor.pipeline(TEXT)["clauses"]
+    streamed = list(extractor.iter_clauses(TEXT, window_sentences=window_sentences))
+
+    assert [(x.id, x.start, x.end, x.text) for x in streamed] == [
+        (x.id, x.start, x.end, x.text) for x in expected
+    ]
+
+
+def test_iter_clauses_with_different_sentence_splits(extractor):
+    extractor.pipeline = OneSentencePipeline()
+    whole = extractor.pipeline(TEXT)["clauses"]
+    streamed = list(extractor.iter_clauses(TEXT, window_sentences=1))
+
+    # every razdel sentence is segmented on its own, so its first token starts
+    # a clause even where the parser would continue the previous one
+    razdel_starts = {s.start for s in razdel.sentenize(TEXT)}
+    assert [x.start for x in streamed] == sorted(
+        {x.start for x in whole} | razdel_starts
+    )
+    assert len(streamed) > len(whole)
+
+
+def test_iter_clauses_is_lazy(extractor):
+    clauses = extractor.iter_clauses(TEXT * 1000, window_sentences=1)
+    first = next(clauses)
+
+    assert first.text == "Мама мыла раму, "
+
+
+def test_sentence_cache(tmp_path):
+    extractor = ClauseExtractor.__new__(ClauseExtractor)
+    extractor.pipeline = FakePipeline()
+    extractor.cache = Cache(str(tmp_path))
+    extractor.morphology = "mystem"
+    extractor.sentence_cache = True
+    extractor.output = "text"
+
+    first = extractor(TEXT)
+    extractor.pipeline.calls.clear()
+    second = extractor("Новое предложение, вот. " + TEXT)
+
+    assert extractor.pipeline.calls == ["Новое предложение, вот."]
+    assert second["clauses"] == ["Новое предложение, ", "вот. "] + first["clauses"]
+    assert first["clauses"] == [x.text for x in FakePipeline()(TEXT)["clauses"]]
+
+
+def test_modes_do_not_share_documents(tmp_path):
+    cache = Cache(str(tmp_path))
+    extractors = []
+    for sentence_cache in (False, True):
+        extractor = ClauseExtractor.__new__(ClauseExtractor)
+        extractor.pipeline = ParagraphPipeline()
+        extractor.cache = cache
+        extractor.morphology = "mystem"
+        extractor.sentence_cache = sentence_cache
+        extractor.output = "text"
+        extractors.append(extractor)
+    whole, by_sentence = extractors
+
+    expected = [x.text for x in ParagraphPipeline()(TEXT)["clauses"]]
+    assert whole(TEXT)["clauses"] == expected
+    assert by_sentence(TEXT)["clauses"] != expected
+    assert by_sentence.pipeline.calls
+    assert whole(TEXT)["clauses"] == expected
+
+
+def test_sentence_cache_segments_misses_together(tmp_path):
+    extractor = ClauseExtractor.__new__(ClauseExtractor)
+    extractor.pipeline = FakePipeline()
+    extractor.cache = Cache(str(tmp_path))
+    extractor.morphology = "mystem"
+    sentences = [x.text for x in razdel.sentenize(TEXT)]
+    extractor._segment_sentences(sentences[:1])
+    extractor.pipeline.calls.clear()
+
+    joined = extractor._segment_sentences(sentences + sentences[1:2])
+
+    assert extractor.pipeline.calls == ["\n\n".join(sentences[1:])]
+    assert joined == [extractor._segment(x) for x in sentences + sentences[1:2]]
+
+
+def test_spans_output(tmp_path):
+    extractor = ClauseExtractor.__new__(ClauseExtractor)
+    extractor.pipeline = FakePipeline()
+    extractor.cache = Cache(str(tmp_path))
+    extractor.morphology = "mystem"
+    extractor.sentence_cache = False
+    extractor.output = "spans"
+
+    result = extractor(TEXT)
+    cached = extractor(TEXT)
+    expected = [x.text for x in FakePipeline()(TEXT)["clauses"]]
+
+    assert extractor.pipeline.calls == [TEXT]
+    assert [TEXT[begin:end] for begin, end in cached["spans"]] == expected
+    assert list(cached["clauses"]) == expected
+    assert result["clauses"][1:3] == expected[1:3]
+    assert isinstance(extractor.cache.get(extractor._cache_key(TEXT)), bytes)
+
+
+def test_clause_spans_match_discourse_units():
+    tokens = [Token(t.text, t.start, t.stop) for t in razdel.tokenize(TEXT)]
+    numbers = np.array([0, 4, 12, 20])
+    units = ClauseSegmenterProcessor._build_discourse_units(None, TEXT, tokens, numbers)
+    spans = ClauseSegmenterProcessor._clause_spans(tokens, numbers)
+
+    assert [TEXT[begin:end] for _, _, begin, end in spans] == [x.text for x in units]
+    assert [(first, last) for first, last, _, _ in spans] == [
+        (0, 4),
+        (4, 12),
+        (12, 20),
+        (20, len(tokens)),
+    ]
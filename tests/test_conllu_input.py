@@ -0,0 +1,102 @@
+import io
+
+import conllu
+import pandas as pd
+from srl_toolkit.clause_segmenter.feature_extractor import FeatureExtractor
+from srl_toolkit.clause_segmenter.processor import ClauseSegmenterProcessor
+from srl_toolkit.conllu_reader import parse_conllu, sentence_annotation
+from srl_toolkit.pa_extractor import ArgumentExtractor
+
+CONLLU = """# sent_id = 1
+# text = Мама мыла раму, а папа курил.
+1	Мама	мама	NOUN	_	Animacy=Anim|Case=Nom|Gender=Fem|Number=Sing	2	nsubj	_	_
+2	мыла	мыть	VERB	_	Aspect=Imp|Gender=Fem|Mood=Ind|Number=Sing|Tense=Past|VerbForm=Fin|Voice=Act	0	root	_	_
+3	раму	рама	NOUN	_	Animacy=Inan|Case=Acc|Gender=Fem|Number=Sing	2	obj	_	SpaceAfter=No
+4	,	,	PUNCT	_	_	7	punct	_	_
+5	а	а	CCONJ	_	_	7	cc	_	_
+6	папа	папа	NOUN	_	Animacy=Anim|Case=Nom|Gender=Masc|Number=Sing	7	nsubj	_	_
+7	курил	курить	VERB	_	Aspect=Imp|Gender=Masc|Mood=Ind|Number=Sing|Tense=Past|VerbForm=Fin|Voice=Act	2	conj	_	SpaceAfter=No
+7.1	курил	курить	VERB	_	_	_	_	6:nsubj	_
+8	.	.	PUNCT	_	_	2	punct	_	_
+
+# sent_id = 2
+1-2	Оттого	_	_	_	_	_	_	_	_
+1	От	от	ADP	_	_	2	case	_	_
+2	того	то	PRON	_	Case=Gen	3	obl	_	_
+3	спали	спать	VERB	_	Aspect=Imp|Mood=Ind|Number=Plur|Tense=Past|VerbForm=Fin	0	root	_	SpaceAfter=No
+4	.	.	PUNCT	_	_	3	punct	_	_
+
+"""
+
+
+class FakeModel:
+    """Starts a clause at the first word and after every comma"""
+
+    def predict(self, features):
+        return [
+            int(row.position == 0 or row.lemma_prev_1 == ",")
+            for row in features.itertuples()
+        ]
+
+
+def test_iter_conllu():
+    first, second = parse_conllu(CONLLU)
+
+    assert [x["id"] for x in first] == list(range(1, 9))
+    assert [x["id"] for x in second] == [1, 2, 3, 4]
+    assert first[1]["head"] == -1 and first[0]["head"] == 2
+
+
+def test_sentence_annotation():
+    first, second = map(sentence_annotation, parse_conllu(CONLLU))
+
+    assert first["text"] == "Мама мыла раму, а папа курил."
+    assert [(t.text, t.begin, t.end) for t in first["tokens"][2:4]] == [
+        ("раму", 10, 14),
+        (",", 14, 15),
+    ]
+    assert [x.parent for x in first["syntax_dep_tree"][0]] == [1, -1, 1, 6, 6, 6, 1, 1]
+    assert second["text"] == "От того спали."
+    assert second["morph"][0][1] == {"Case": "Gen"}
+
+
+def test_features_match_converted_annotation():
+    sentences = list(parse_conllu(CONLLU))
+    converted = "".join(
+        ClauseSegmenterProcessor._convert_annot(sentence_annotation(x))
+        for x in sentences
+    )
+
+    extractor = FeatureExtractor()
+    pd.testing.assert_frame_equal(
+        extractor(sentences), extractor(conllu.parse(converted))
+    )
+
+
+def test_clauses_from_conllu():
+    processor = ClauseSegmenterProcessor.__new__(ClauseSegmenterProcessor)
+    processor._feature_extractor = FeatureExtractor()
+    processor._model = FakeModel()
+
+    results = list(processor.from_conllu(io.StringIO(CONLLU), batch_size=1))
+
+    assert [[x.text for x in r["clauses"]] for r in results] == [
+        ["Мама мыла раму, ", "а папа курил."],
+        ["От того спали."],
+    ]
+
+
+def test_predicate_arguments_from_conllu(tmp_path):
+    path = tmp_path / "corpus.conllu"
+    path.write_text(CONLLU, encoding="utf-8")
+
+    first, second = ArgumentExtractor().from_conllu(str(path))
+
+    predicates = [x["predicate"]["lemma"] for x in first["predicate_arguments"]]
+    assert predicates == ["мыть", "курить"]
+    arguments = {
+        x["predicate"]["lemma"]: sorted(a["text"] for a in x["arguments"])
+        for x in first["predicate_arguments"]
+    }
+    assert arguments["мыть"] == ["Мама", "раму"]
+    assert second["predicate_arguments"][0]["arguments"][0]["preposition"] == "от"
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+import razdel
+from diskcache import Cache
+from isanlp.annotation import Token
+from srl_toolkit.clause_segmenter.processor import ClauseSegmenterProcessor
+from srl_toolkit.extractor import ClauseExtractor
+from srl_toolkit.incremental import IncrementalDocument, text_diff
+
+
+class FakePipeline:
+    """Tokenizes with razdel, starts a clause at every sentence and after commas"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        tokens = [Token(t.text, t.start, t.stop) for t in razdel.tokenize(text)]
+        sentence_starts = {s.start for s in razdel.sentenize(text)}
+        numbers = [
+            i
+            for i, token in enumerate(tokens)
+            if token.begin in sentence_starts or (i and tokens[i - 1].text == ",")
+        ]
+        clauses = ClauseSegmenterProcessor._build_discourse_units(
+            None, text, tokens, np.array(numbers, dtype=int)
+        )
+        return {"tokens": tokens, "clauses": clauses}
+
+
+class FakePAExtractor:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return {"predicate_arguments": [{"predicate": text.split()[0]}]}
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    extractor = ClauseExtractor.__new__(ClauseExtractor)
+    extractor.pipeline = FakePipeline()
+    extractor.cache = Cache(str(tmp_path))
+    extractor.morphology = "mystem"
+    extractor.sentence_cache = True
+    return extractor
+
+
+SENTENCES = [
+    "Мама мыла раму, а папа курил сигарету.",
+    "Дети спали.",
+    "Кот сидел на окне, смотрел на улицу, а собака лаяла.",
+    "Шёл дождь, и было холодно.",
+]
+
+
+def test_text_diff():
+    assert text_diff("abcdef", "abXYef") == (2, 4, "XY")
+    assert text_diff("aaa", "aaaa") == (3, 3, "a")
+    assert text_diff("same", "same") == (4, 4, "")
+
+
+def test_edits_match_full_annotation(extractor):
+    random.seed(0)
+    text = " ".join(SENTENCES * 20)
+    document = IncrementalDocument(extractor, FakePAExtractor(), text)
+
+    for _ in range(30):
+        start = random.randrange(len(document.text))
+        end = min(start + random.randrange(20), len(document.text))
+        replacement = random.choice(["", "слово, ", ". Новое", " и "])
+
+        extractor.pipeline.calls.clear()
+        result = document.edit(start, end, replacement)
+
+        expected = extractor.clauses_from_segments(
+            document.text, extractor.segment_document(document.text)
+        )
+        assert [(x["start"], x["end"], x["text"]) for x in result["clauses"]] == [
+            (x.start, x.end, x.text) for x in expected
+        ]
+        assert result["text"] == document.text
+        assert sum(len(x) for x in extractor.pipeline.calls) < 300
+
+
+def test_predicate_arguments_are_reused(extractor):
+    pa_extractor = FakePAExtractor()
+    document = IncrementalDocument(extractor, pa_extractor, " ".join(SENTENCES))
+    pa_extractor.calls.clear()
+
+    document.update(document.text.replace("Дети спали.", "Дети не спали."))
+
+    assert pa_extractor.calls == ["Дети не спали. "]
+    assert len(document.result["clauses"]) == 8
@@ -0,0 +1,63 @@
+from srl_toolkit.index import SrlIndex
+
+
+def pa(predicate, *arguments):
+    return {
+        "predicate": {"lemma": predicate},
+        "arguments": [
+            {"lemma": lemma, "role": role, "preposition": preposition}
+            for lemma, role, preposition in arguments
+        ],
+    }
+
+
+CLAUSES = [
+    # локатив and на occur in the clause, but not on the same argument
+    {
+        "labeled": [
+            pa("мыть", ("мама", "агенс", None), ("ванная", "локатив", "в")),
+            pa("стоять", ("стол", "агенс", "на")),
+        ]
+    },
+    {"labeled": [pa("мыть", ("рама", "пациенс", None), ("балкон", "локатив", "на"))]},
+    {"labeled": [pa("спать")]},
+    {
+        "text": "Мама мыла раму",
+        "predictions": {
+            "predicate": [{"text": "Мыла"}],
+            "агенс": [{"text": "Мама"}],
+        },
+    },
+]
+
+
+def test_queries():
+    index = SrlIndex()
+    index.extend(CLAUSES)
+
+    assert index.clauses(predicate="мыть", preposition="на").tolist() == [0, 1]
+    assert index.search(predicate="мыть", preposition="на").tolist() == [1]
+    assert index.search(
+        role="локатив", preposition="на", predicate="мыть"
+    ).tolist() == [1]
+    assert index.search(predicate="спать").tolist() == [2]
+    assert index.search(predicate="мыла", argument="мама").tolist() == [3]
+    assert index.search(predicate="летать").tolist() == []
+    assert len(index.clauses()) == 4
+
+
+def test_save_load_and_append(tmp_path):
+    index = SrlIndex()
+    index.extend(CLAUSES[:2])
+    index.save(str(tmp_path))
+
+    loaded = SrlIndex.load(str(tmp_path))
+    assert loaded.search(role="локатив").tolist() == [0, 1]
+    loaded.extend(CLAUSES[2:] + CLAUSES[:2])
+    assert loaded.search(role="локатив", preposition="на").tolist() == [1, 5]
+    loaded.save(str(tmp_path))
+
+    reloaded = SrlIndex.load(str(tmp_path))
+    assert len(reloaded) == 6
+    assert reloaded.n_edges == loaded.n_edges
+    assert reloaded.clauses(predicate="мыть").tolist() == [0, 1, 4, 5]
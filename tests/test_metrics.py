@@ -0,0 +1,93 @@
+import urllib.request
+
+import pytest
+from srl_toolkit import metrics, profiling
+from srl_toolkit.extractor import CachedExtractor
+from srl_toolkit.labeler import SrlLabeler
+
+
+class UpperExtractor(CachedExtractor):
+    def _extract(self, text):
+        return {"text": text.upper()}
+
+
+def test_render():
+    registry = metrics.Registry()
+    counter = registry.counter("requests_total", "Requests", ("path",))
+    counter.inc(path="/a")
+    counter.inc(2, path='/"b"')
+    histogram = registry.histogram("size", "Sizes", buckets=(1, 10))
+    for value in [0.5, 5, 50]:
+        histogram.observe(value)
+    registry.gauge("answer", "Answer").set_function(lambda: 42)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{path="/\\"b\\""} 2',
+        'requests_total{path="/a"} 1',
+        "# HELP size Sizes",
+        "# TYPE size histogram",
+        'size_bucket{le="1"} 1',
+        'size_bucket{le="10"} 2',
+        'size_bucket{le="+Inf"} 3',
+        "size_sum 55.5",
+        "size_count 3",
+        "# HELP answer Answer",
+        "# TYPE answer gauge",
+        "answer 42",
+    ]
+    assert registry.counter("requests_total", "Requests", ("path",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Requests")
+    with pytest.raises(ValueError):
+        counter.inc(method="GET")
+
+
+def test_extractors_report_cache_efficiency(tmp_path):
+    extractor = UpperExtractor(str(tmp_path))
+    hits = metrics.CACHE_REQUESTS.value(component="UpperExtractor", result="hit")
+    texts = metrics.TEXTS.value(component="UpperExtractor")
+
+    for text in ["a", "b", "a", "a"]:
+        extractor(text)
+
+    assert metrics.TEXTS.value(component="UpperExtractor") == texts + 4
+    assert (
+        metrics.CACHE_REQUESTS.value(component="UpperExtractor", result="hit")
+        == hits + 2
+    )
+    assert 0 < metrics.cache_hit_ratio("UpperExtractor") < 1
+    assert metrics.CACHE_BYTES.value(directory=extractor.cache.directory) > 0
+
+
+def test_labeler_batch_sizes_and_stage_latencies(tmp_path):
+    labeler = SrlLabeler([])
+    before = metrics.BATCH_SIZE.value(component="SrlLabeler")["count"]
+
+    metrics.record_stage_latencies()
+    try:
+        labeler({"predicate_arguments": [{}, {}]})
+    finally:
+        metrics.record_stage_latencies(False)
+
+    assert metrics.BATCH_SIZE.value(component="SrlLabeler")["count"] == before + 1
+    assert metrics.STAGE_LATENCY.value(stage="SrlLabeler")["count"] >= 1
+    assert not profiling.enabled()
+
+    path = tmp_path / "metrics.prom"
+    metrics.REGISTRY.write(str(path))
+    assert 'srl_batch_size_bucket{component="SrlLabeler",le="2"}' in path.read_text()
+
+
+def test_http_endpoint():
+    server = metrics.REGISTRY.serve(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "# TYPE srl_cache_requests_total counter" in body
@@ -0,0 +1,78 @@
+import isanlp.processor_udpipe
+import pytest
+from srl_toolkit import extractor as extractor_module
+from srl_toolkit.clause_segmenter import ClauseSegmenterProcessor
+from srl_toolkit.extractor import ClauseExtractor
+
+
+class StubUDPipe:
+    def __init__(self, path):
+        self.path = path
+
+
+class StubSegmenter:
+    pass
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    created = []
+
+    def processor_mystem():
+        created.append("mystem")
+        return object()
+
+    monkeypatch.setattr(isanlp.processor_udpipe, "ProcessorUDPipe", StubUDPipe)
+    monkeypatch.setattr(
+        ClauseSegmenterProcessor,
+        "for_pipeline",
+        staticmethod(
+            lambda model_path, output="units": (
+                StubSegmenter(),
+                ["text", "tokens", "sentences", "lemma", "morph", "postag"],
+                {0: "clauses"},
+            )
+        ),
+    )
+    monkeypatch.setattr(extractor_module, "_processor_mystem", processor_mystem)
+    return created
+
+
+def chain(extractor):
+    return [
+        (processor.name, outputs) for processor, _, outputs in extractor._processors
+    ]
+
+
+def test_udpipe_morphology(stub_models, tmp_path):
+    extractor = ClauseExtractor(
+        "model.udpipe", "model.cbm", cache_dir=str(tmp_path), morphology="udpipe"
+    )
+
+    assert [name for name, _ in chain(extractor)] == ["udpipe", "clause_segmenter"]
+    udpipe_outputs = chain(extractor)[0][1]
+    assert udpipe_outputs["postag"] == "postag"
+    assert udpipe_outputs["morph"] == "morph"
+    assert stub_models == []
+    assert extractor.cache_prefix == "ClauseExtractor:udpipe"
+
+
+def test_mystem_morphology(stub_models, tmp_path):
+    extractor = ClauseExtractor("model.udpipe", "model.cbm", cache_dir=str(tmp_path))
+
+    assert [name for name, _ in chain(extractor)] == [
+        "udpipe",
+        "mystem",
+        "mystem_to_ud",
+        "clause_segmenter",
+    ]
+    # UDPipe tags are kept aside, the segmenter gets the converted Mystem ones
+    assert chain(extractor)[0][1]["postag"] == "ud_postag"
+    assert "morph" not in chain(extractor)[0][1]
+    assert stub_models == ["mystem"]
+    assert extractor.cache_prefix == "ClauseExtractor"
+
+
+def test_unknown_morphology(tmp_path):
+    with pytest.raises(ValueError):
+        ClauseExtractor("model.udpipe", "model.cbm", morphology="pymorphy")
@@ -0,0 +1,155 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from pymystem3.constants import MYSTEM_BIN
+from srl_toolkit import mystem_pool
+from srl_toolkit.mystem_pool import MystemPool, ProcessorMystemPool
+
+
+class FakeMystem:
+    instances = []
+    crashes = 0
+
+    def __init__(self, entire_input=True):
+        self.entire_input = entire_input
+        self.started = False
+        self.closed = False
+        self.calls = 0
+        FakeMystem.instances.append(self)
+
+    def start(self):
+        self.started = True
+
+    def close(self):
+        self.closed = True
+
+    def analyze(self, text):
+        if FakeMystem.crashes:
+            FakeMystem.crashes -= 1
+            raise BrokenPipeError()
+        self.calls += 1
+        analysis = []
+        previous = None
+        for word in text.split():
+            lex = word.lower()
+            # disambiguated by the preceding word, as real Mystem does with -d
+            if lex == "стали":
+                lex = "стать" if previous == "мы" else "сталь"
+            analysis.append({"text": word, "analysis": [{"lex": lex, "gr": "X"}]})
+            if self.entire_input:
+                analysis.append({"text": " "})
+            if word != MystemPool.DELIMITER:
+                previous = word.lower()
+        return analysis
+
+
+@pytest.fixture
+def fake_mystem(monkeypatch):
+    monkeypatch.setattr(mystem_pool, "Mystem", FakeMystem)
+    FakeMystem.instances = []
+    FakeMystem.crashes = 0
+    return FakeMystem
+
+
+def test_regrouping(fake_mystem):
+    pool = MystemPool(n_workers=2, chunk_size=2)
+    texts = ["Мама мыла", "раму", "", "Папа", "Ел Кашу Ложкой"]
+
+    lemmas = pool.lemmatize_many(texts)
+
+    assert lemmas == [
+        ["мама", "мыла"],
+        ["раму"],
+        [],
+        ["папа"],
+        ["ел", "кашу", "ложкой"],
+    ]
+    stats = pool.stats()
+    assert stats["calls"] == 3 and stats["texts"] == 5
+    assert stats["idle"] == 2 and stats["busy"] == 0
+    pool.close()
+    assert all(x.closed for x in fake_mystem.instances)
+
+
+def test_restart_after_crash(fake_mystem):
+    pool = MystemPool(n_workers=1, max_retries=1)
+    crashed = fake_mystem.instances[0]
+    fake_mystem.crashes = 1
+
+    assert pool.lemmatize_many(["Раму"]) == [["раму"]]
+    assert crashed.closed
+    assert pool.stats()["restarts"] == 1
+    assert pool.stats()["idle"] == 1
+
+    fake_mystem.crashes = 2
+    with pytest.raises(BrokenPipeError):
+        pool.lemmatize_many(["Раму"])
+    # the worker goes back to the pool even when all retries failed
+    assert pool.stats()["idle"] == 1
+    assert pool.lemmatize_many(["Раму"]) == [["раму"]]
+
+
+def test_reset_after_fork(fake_mystem):
+    pool = MystemPool(n_workers=2)
+    inherited = list(fake_mystem.instances)
+
+    pool.reset()
+
+    assert len(fake_mystem.instances) == 4
+    assert not any(x.closed for x in inherited)
+    pool.lemmatize_many(["Раму"])
+    assert sum(x.calls for x in inherited) == 0
+    assert sum(x.calls for x in fake_mystem.instances[2:]) == 1
+
+
+def tokenize(text):
+    tokens = [SimpleNamespace(text=x) for x in text.split()]
+    return tokens, [SimpleNamespace(begin=0, end=len(tokens))]
+
+
+def test_joined_texts_share_context(fake_mystem):
+    pool = MystemPool(n_workers=1)
+
+    assert pool.lemmatize_many(["мы", "стали"]) == [["мы"], ["стать"]]
+    assert pool.lemmatize_many(["мы", "стали"], context=False) == [["мы"], ["сталь"]]
+
+
+def test_processor_matches_per_token_analysis(fake_mystem):
+    processor = ProcessorMystemPool(MystemPool(n_workers=2, chunk_size=2))
+    tokens, sentences = tokenize("мы стали друзьями и мы стали")
+
+    result = processor(tokens, sentences)
+
+    single = FakeMystem(entire_input=False)
+    assert result["lemma"] == [
+        [single.analyze(token.text)[0]["analysis"][0]["lex"] for token in tokens]
+    ]
+    assert result["lemma"][0][1] == "сталь"
+    # repeated tokens are analyzed once
+    assert processor.pool.stats()["texts"] == 4
+
+
+@pytest.mark.skipif(
+    not os.path.isfile(os.environ.get("MYSTEM_BIN", MYSTEM_BIN)),
+    reason="mystem binary is not installed",
+)
+def test_processor_matches_real_mystem():
+    from pymystem3 import Mystem
+
+    pool = MystemPool(n_workers=1)
+    # "стали" is a verb here, but a noun when analyzed on its own
+    tokens, sentences = tokenize("Мы стали друзьями , мама мыла раму")
+    mystem = Mystem(entire_input=False)
+
+    result = ProcessorMystemPool(pool)(tokens, sentences)
+
+    expected_lemmas, expected_postags = [], []
+    for token in tokens:
+        words = [x for x in mystem.analyze(token.text) if x.get("analysis")]
+        analysis = words[0]["analysis"][0] if words else None
+        expected_lemmas.append(analysis["lex"] if analysis else token.text.lower())
+        expected_postags.append(analysis["gr"] if analysis else "")
+    assert result == {"lemma": [expected_lemmas], "postag": [expected_postags]}
+    pool.close()
+    mystem.close()
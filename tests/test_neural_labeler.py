@@ -0,0 +1,130 @@
+import threading
+import time
+
+from srl_toolkit.labeler import NeuralLabeler
+
+
+class FakeTokenizer:
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": text.split()}
+
+    def num_special_tokens_to_add(self):
+        return 0
+
+
+class FakePipeline:
+    """Tags the first word of every text as the predicate"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        return [
+            [
+                {
+                    "entity_group": "PREDICATE",
+                    "start": 0,
+                    "end": len(text.split()[0]),
+                    "score": 0.9,
+                }
+            ]
+            for text in texts
+        ]
+
+
+class FakeMystemPool:
+    def lemmatize_many(self, texts):
+        return [text.lower().split() for text in texts]
+
+
+class FakeNeuralLabeler(NeuralLabeler):
+    def __init__(self, cache_dir, batch_size=16):
+        super().__init__(
+            "model",
+            good_lemmas=None,
+            cache_dir=cache_dir,
+            max_length=512,
+            batch_size=batch_size,
+            mystem_pool=FakeMystemPool(),
+            lazy=True,
+        )
+        self.pipeline = FakePipeline()
+        self.window_tokenizer = FakeTokenizer()
+        self._loaded = True
+
+
+def predicate(result):
+    return result["predictions"]["predicate"][0]["text"]
+
+
+def test_only_distinct_misses_reach_the_model(tmp_path):
+    labeler = FakeNeuralLabeler(str(tmp_path))
+    labeler(["мама мыла раму", "папа читал книгу"])
+
+    results = labeler(
+        ["папа читал книгу", "кот спал", "кот спал", "мама мыла раму", "дети пели"]
+    )
+
+    assert labeler.pipeline.calls == [
+        ["мама мыла раму", "папа читал книгу"],
+        ["кот спал", "дети пели"],
+    ]
+    assert [x["text"] for x in results] == [
+        "папа читал книгу",
+        "кот спал",
+        "кот спал",
+        "мама мыла раму",
+        "дети пели",
+    ]
+    assert [predicate(x) for x in results] == ["папа", "кот", "кот", "мама", "дети"]
+
+
+class TimedNeuralLabeler(FakeNeuralLabeler):
+    """
+    Records the stages of every batch. The forward pass of a batch waits
+    until the next batch is being prepared, so stream() stalls for the
+    timeout unless preparation overlaps with the model.
+    """
+
+    def __init__(self, cache_dir, n_batches):
+        super().__init__(cache_dir, batch_size=2)
+        self.n_batches = n_batches
+        self.events = []
+        self.prepared = [threading.Event() for _ in range(n_batches)]
+        self._lock = threading.Lock()
+
+    def _record(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def _prepare_batch(self, clauses):
+        n = sum(1 for stage, _ in self.events if stage == "prepare")
+        self._record(("prepare", n))
+        self.prepared[n].set()
+        return {**super()._prepare_batch(clauses), "n": n}
+
+    def _forward(self, batch):
+        self._record(("forward", batch["n"]))
+        if batch["n"] + 1 < self.n_batches:
+            self.prepared[batch["n"] + 1].wait(5)
+        time.sleep(0.01)
+        outputs = super()._forward(batch)
+        self._record(("forward_end", batch["n"]))
+        return outputs
+
+
+def test_stream(tmp_path):
+    verbs = ["мыла", "читал", "спал", "пели", "мыла", "шёл", "читал"]
+    clauses = [f"{verb} слово" for verb in verbs]
+    labeler = TimedNeuralLabeler(str(tmp_path), n_batches=4)
+
+    results = list(labeler.stream(clauses))
+
+    assert [x["text"] for x in results] == clauses
+    assert [predicate(x) for x in results] == [x.split()[0] for x in clauses]
+    for n in range(3):
+        # the next batch was prepared before the model finished this one
+        assert labeler.events.index(("prepare", n + 1)) < labeler.events.index(
+            ("forward_end", n)
+        )
@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from srl_toolkit.labeler import NeuralLabeler
+
+
+class FakeTokenizer:
+    """
+    One token per three characters of every word, two special tokens
+    """
+
+    def _ids(self, text, add_special_tokens):
+        n_tokens = sum(math.ceil(len(word) / 3) for word in text.split())
+        return list(range(n_tokens + (2 if add_special_tokens else 0)))
+
+    def __call__(self, text, add_special_tokens=True):
+        if isinstance(text, list):
+            return {"input_ids": [self._ids(x, add_special_tokens) for x in text]}
+        return {"input_ids": self._ids(text, add_special_tokens)}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+
+def make_labeler(window_length, stride):
+    labeler = NeuralLabeler.__new__(NeuralLabeler)
+    labeler.window_tokenizer = FakeTokenizer()
+    labeler._tokenizer_lock = threading.Lock()
+    labeler.window_length = window_length
+    labeler.stride = stride
+    return labeler
+
+
+def n_tokens(text):
+    return len(FakeTokenizer()(text, add_special_tokens=False)["input_ids"])
+
+
+def test_short_text_is_one_window():
+    labeler = make_labeler(window_length=12, stride=4)
+    assert labeler._plan_windows("мама мыла раму") == [(0, 14, 0, 14)]
+
+
+def test_windows_overlap_and_merge():
+    labeler = make_labeler(window_length=12, stride=4)
+    words = [f"сл{i:04d}" for i in range(20)]
+    text = " ".join(words)
+    windows = labeler._plan_windows(text)
+
+    assert len(windows) > 1
+    assert windows[0][2] == 0 and windows[-1][3] == len(text)
+    for (start, end, _, keep_end), (next_start, _, next_keep, _) in zip(
+        windows, windows[1:]
+    ):
+        assert next_start < end
+        assert keep_end == next_keep
+    for start, end, keep_start, keep_end in windows:
+        assert n_tokens(text[start:end]) <= 10
+        assert start <= keep_start < keep_end <= end
+
+    # every window predicts every word it sees, merging keeps each word once
+    owners = [
+        (0, start, keep_start, keep_end) for start, end, keep_start, keep_end in windows
+    ]
+    outputs = []
+    for start, end, _, _ in windows:
+        output = []
+        position = 0
+        for word in text[start:end].split(" "):
+            output.append(
+                {"start": position, "end": position + len(word), "word": word}
+            )
+            position += len(word) + 1
+        outputs.append(output)
+    [merged] = NeuralLabeler._merge_windows(1, owners, outputs)
+
+    assert [x["word"] for x in merged] == words
+    assert all(text[x["start"] : x["end"]] == x["word"] for x in merged)
+
+
+def test_long_word_is_split():
+    labeler = make_labeler(window_length=12, stride=4)
+    text = "аб " + "ж" * 60 + " вг"
+    windows = labeler._plan_windows(text)
+
+    covered = set()
+    for start, end, _, _ in windows:
+        assert n_tokens(text[start:end]) <= 10
+        covered.update(range(start, end))
+    assert covered >= set(range(3, 63))
+
+
+def test_window_settings_are_part_of_the_cache_key():
+    keys = []
+    for max_length, stride in [(None, 32), (128, 32), (128, 16)]:
+        labeler = make_labeler(window_length=max_length, stride=stride)
+        labeler.max_length = max_length
+        labeler.model_name, labeler.revision, labeler.good_lemmas = "m", None, []
+        keys.append(labeler._cache_keys(["мама мыла раму"])[0])
+    assert len(set(keys)) == 3
+
+
+class ExclusiveTokenizer(FakeTokenizer):
+    """
+    Fails like a fast tokenizer used from two threads at once
+    """
+
+    def __init__(self):
+        self.busy = False
+
+    def __call__(self, text, add_special_tokens=True):
+        if self.busy:
+            raise RuntimeError("Already borrowed")
+        self.busy = True
+        try:
+            time.sleep(0.001)
+            return super().__call__(text, add_special_tokens)
+        finally:
+            self.busy = False
+
+
+def test_concurrent_window_planning():
+    labeler = make_labeler(window_length=12, stride=4)
+    labeler.window_tokenizer = ExclusiveTokenizer()
+    text = " ".join(f"сл{i:04d}" for i in range(20))
+    with ThreadPoolExecutor(4) as executor:
+        windows = list(executor.map(labeler._plan_windows, [text] * 16))
+    assert all(x == windows[0] for x in windows)
@@ -0,0 +1,84 @@
+import json
+import logging
+
+from srl_toolkit import profiling
+from srl_toolkit.extractor import CachedExtractor
+
+
+class UpperExtractor(CachedExtractor):
+    def _extract(self, text):
+        return {"text": text.upper()}
+
+
+def test_disabled_spans_are_shared_noops():
+    assert not profiling.enabled()
+    assert profiling.span("a") is profiling.span("b", size=1)
+
+
+def test_aggregating_sink(tmp_path):
+    extractor = UpperExtractor(str(tmp_path))
+    with profiling.collect(profiling.AggregatingSink()) as sink:
+        for text in ["a", "b", "a"]:
+            extractor(text)
+
+    report = sink.report()
+    assert report["UpperExtractor.cache_get"]["count"] == 3
+    assert report["UpperExtractor.extract"]["count"] == 2
+    assert report["UpperExtractor.cache_set"]["count"] == 2
+    assert not profiling.enabled()
+
+
+def test_nested_spans_and_memory():
+    records = []
+    profiling.trace_memory()
+    try:
+        with profiling.collect(records.append):
+            with profiling.span("outer") as outer:
+                with profiling.span("inner"):
+                    data = [bytearray(1024) for _ in range(1024)]
+                del data
+                outer.set(items=3)
+    finally:
+        profiling.trace_memory(False)
+
+    inner, outer = records
+    assert (inner["name"], inner["depth"]) == ("inner", 1)
+    assert (outer["name"], outer["depth"], outer["items"]) == ("outer", 0, 3)
+    assert inner["peak_memory"] > 1024 * 1024
+    assert outer["peak_memory"] >= inner["peak_memory"]
+    assert outer["wall"] >= inner["wall"]
+
+
+def test_json_trace_and_log_sinks(tmp_path, caplog):
+    trace = profiling.JsonTraceSink(str(tmp_path / "trace.json"))
+    processor = profiling.ProfiledProcessor(lambda text: {"n": len(text)}, "length")
+
+    @profiling.profiled()
+    def failing():
+        raise ValueError()
+
+    with caplog.at_level(logging.DEBUG, logger="srl_toolkit.profiling"):
+        with profiling.collect(trace, profiling.LogSink()):
+            assert processor("abc") == {"n": 3}
+            try:
+                failing()
+            except ValueError:
+                pass
+    trace.close()
+
+    events = json.loads((tmp_path / "trace.json").read_text().rstrip(",\n") + "]")
+    assert [(e["name"], e["ph"], e["args"]["error"]) for e in events] == [
+        ("length", "X", False),
+        ("test_json_trace_and_log_sinks.<locals>.failing", "X", True),
+    ]
+    assert "length: wall" in caplog.text
+
+
+def test_failing_sink_does_not_break_spans():
+    def broken(record):
+        raise RuntimeError()
+
+    with profiling.collect(broken):
+        with profiling.span("a"):
+            result = 1
+    assert result == 1
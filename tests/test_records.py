@@ -0,0 +1,73 @@
+import pickle
+
+from benchmarks.synthetic import synthetic_conllu
+from srl_toolkit.conllu_reader import parse_conllu, sentence_annotation
+from srl_toolkit.index import SrlIndex
+from srl_toolkit.labeler import SrlLabeler
+from srl_toolkit.pa_extractor import ArgumentExtractor, PredicateArgument
+from srl_toolkit.ruleset import Rule, Ruleset
+from srl_toolkit.store import StoreReader, StoreWriter
+
+
+def records_and_dicts():
+    data, _ = synthetic_conllu(20, seed=3)
+    extractor = ArgumentExtractor()
+    for sentence in parse_conllu(data):
+        annotation = sentence_annotation(sentence)
+        args = (
+            annotation["tokens"],
+            annotation["postag"][0],
+            annotation["morph"][0],
+            annotation["lemma"][0],
+            annotation["syntax_dep_tree"][0],
+        )
+        yield extractor.predicate_argument_records(
+            *args
+        ), extractor.predicate_arguments(*args)
+
+
+def test_records_match_dicts():
+    for records, dicts in records_and_dicts():
+        assert records.to_dicts() == dicts
+        assert [x.lemma for x in records] == [x["predicate"]["lemma"] for x in dicts]
+        assert isinstance(records[0], PredicateArgument)
+        assert records.table.morphs[records[0].predicate].startswith("Aspect=Imp|")
+
+        restored = pickle.loads(pickle.dumps(records))
+        assert restored.to_dicts() == dicts
+        assert len(pickle.dumps(records)) < len(pickle.dumps(dicts))
+
+
+def test_labeler_accepts_records():
+    labeler = SrlLabeler(
+        [
+            Ruleset(
+                predicate_rule=Rule(pattern={"lemma": "мыть"}),
+                argument_rules={"агенс": [Rule(pattern={"Case": "Nom"})]},
+            )
+        ]
+    )
+    for records, dicts in records_and_dicts():
+        assert labeler({"predicate_arguments": records}) == labeler(
+            {"predicate_arguments": dicts}
+        )
+
+
+def test_store_and_index_records(tmp_path):
+    pairs = list(records_and_dicts())
+    for name, i in [("records", 0), ("dicts", 1)]:
+        with StoreWriter(str(tmp_path / name)) as writer:
+            for pair in pairs:
+                writer.add({"text": "", "predicate_arguments": pair[i]})
+
+    from_records = StoreReader(str(tmp_path / "records"))
+    from_dicts = StoreReader(str(tmp_path / "dicts"))
+    assert list(from_records) == list(from_dicts)
+
+    index = SrlIndex()
+    index.extend({"predicate_arguments": records} for records, _ in pairs)
+    expected = SrlIndex.from_store(from_dicts)
+    lemma = pairs[0][1][0]["predicate"]["lemma"]
+    assert len(index.search(predicate=lemma)) > 0
+    assert list(index.search(predicate=lemma)) == list(expected.search(predicate=lemma))
+    assert index.n_edges == expected.n_edges
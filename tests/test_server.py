@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from srl_toolkit.server import MicroBatcher, Overloaded, SrlServer
+
+
+class FakeExtractor:
+    def __init__(self):
+        self.batches = []
+
+    def extract_many(self, texts, n_threads=4):
+        self.batches.append(list(texts))
+        time.sleep(0.01)
+        return [{"clauses": [text]} for text in texts]
+
+
+@pytest.fixture
+def server():
+    extractor = FakeExtractor()
+    srl_server = SrlServer(clause_extractor=extractor, max_batch=8, max_wait=0.02)
+    http_server = srl_server.make_http_server(port=0)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield srl_server, extractor, http_server.server_address[1]
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def post(port, path, payload):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_micro_batching(server):
+    srl_server, extractor, port = server
+    texts = [f"текст {i}" for i in range(16)]
+
+    with ThreadPoolExecutor(16) as executor:
+        results = list(
+            executor.map(lambda t: post(port, "/clauses", {"text": t}), texts)
+        )
+
+    assert results == [{"clauses": [text]} for text in texts]
+    assert len(extractor.batches) < len(texts)
+    assert max(len(batch) for batch in extractor.batches) <= 8
+
+    stats = srl_server.stats()
+    assert stats["latency"]["/clauses"]["count"] == 16
+    assert (
+        stats["latency"]["/clauses"]["p50_ms"] <= stats["latency"]["/clauses"]["p99_ms"]
+    )
+
+
+def test_admission_control():
+    release = threading.Event()
+    batcher = MicroBatcher(
+        lambda items: release.wait() and items, max_batch=1, max_queue=2
+    )
+    futures = [batcher.submit(1)]
+    time.sleep(0.05)
+    futures += [batcher.submit(2), batcher.submit(3)]
+
+    with pytest.raises(Overloaded):
+        batcher.submit(4)
+    assert batcher.rejected == 1
+
+    release.set()
+    assert [future.result(timeout=1) for future in futures] == [1, 2, 3]
+
+
+def test_bad_requests_are_rejected():
+    srl_server = SrlServer(clause_extractor=FakeExtractor(), srl_labeler=lambda x: x)
+
+    assert srl_server.handle("/clauses", {"text": 1})[0] == 400
+    assert srl_server.handle("/clauses", [])[0] == 400
+    assert srl_server.handle("/label/rules", {})[0] == 400
+    assert srl_server.handle("/label/rules", {"predicate_arguments": [{}]})[0] == 400
+    assert srl_server.handle("/clauses", {"text": "a"}) == (200, {"clauses": ["a"]})
+
+
+def test_failed_batch_falls_back_to_items():
+    def fn(items):
+        if "boom" in items:
+            raise ValueError("boom")
+        return [x.upper() for x in items]
+
+    batcher = MicroBatcher(fn, max_batch=8, max_wait=0.05)
+    futures = [batcher.submit(x) for x in ["a", "boom", "b"]]
+
+    assert futures[0].result(timeout=1) == "A"
+    assert futures[2].result(timeout=1) == "B"
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=1)
+
+
+def test_errors_and_timeouts():
+    class BrokenExtractor:
+        def extract_many(self, texts, n_threads=4):
+            if texts == ["slow"]:
+                time.sleep(0.5)
+                return [{}]
+            raise RuntimeError("/secret/path/model.bin is missing")
+
+    srl_server = SrlServer(clause_extractor=BrokenExtractor(), request_timeout=0.1)
+
+    assert srl_server.handle("/clauses", {"text": "a"}) == (
+        500,
+        {"error": "Internal server error"},
+    )
+    assert srl_server.handle("/clauses", {"text": "slow"}) == (
+        504,
+        {"error": "Request timed out"},
+    )
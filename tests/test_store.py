@@ -0,0 +1,81 @@
+import numpy as np
+
+from srl_toolkit.store import NULL, StoreReader, StoreWriter
+
+
+def word(text, lemma, postag, preposition=None, **morph):
+    return {
+        "text": text,
+        "lemma": lemma,
+        "postag": postag,
+        "morph": morph,
+        "preposition": preposition,
+    }
+
+
+CLAUSES = [
+    {
+        "text": "Мама мыла раму в ванной, ",
+        "labeled": [
+            {
+                "predicate": word("мыла", "мыть", "VERB", Tense="Past"),
+                "arguments": [
+                    {**word("Мама", "мама", "NOUN", Case="Nom"), "role": "агенс"},
+                    {**word("раму", "рама", "NOUN", Case="Acc"), "role": None},
+                    {**word("ванной", "ванная", "NOUN", "в", Case="Loc")},
+                ],
+            }
+        ],
+    },
+    {"text": "а папа спал.", "predicate_arguments": []},
+]
+
+
+def test_roundtrip(tmp_path):
+    with StoreWriter(str(tmp_path)) as writer:
+        assert writer.add_document({"clauses": CLAUSES}) == [0, 1]
+        writer.add({"text": "Кот спал.", "predicate_arguments": []})
+
+    reader = StoreReader(str(tmp_path))
+    assert len(reader) == 3
+    assert reader.n_documents == 2
+    assert list(reader.clauses["document"]) == [0, 0, 1]
+
+    first = reader[0]
+    assert first["text"] == CLAUSES[0]["text"]
+    arguments = first["predicate_arguments"][0]["arguments"]
+    assert [x.get("role") for x in arguments] == ["агенс", None, None]
+    assert arguments[2]["preposition"] == "в"
+    assert arguments[0]["morph"] == {"Case": "Nom"}
+    assert first["predicate_arguments"][0]["predicate"]["lemma"] == "мыть"
+    assert reader[1]["predicate_arguments"] == []
+
+    nominative = reader.lookup("Case=Nom")
+    assert np.flatnonzero(reader.words["morph"] == nominative).tolist() == [1]
+    assert reader.lookup("собака") is None
+    assert reader.arguments["role"][1] == NULL
+
+
+def test_append_after_interrupted_flush(tmp_path):
+    with StoreWriter(str(tmp_path)) as writer:
+        writer.add(CLAUSES[0])
+
+    writer = StoreWriter(str(tmp_path), flush_every=1)
+    writer.add(CLAUSES[1])
+    # a flush killed before meta.json was replaced leaves extra rows behind
+    with open(tmp_path / "clauses.bin", "ab") as f:
+        f.write(b"\0" * 7)
+    with open(tmp_path / "strings.bin", "ab") as f:
+        f.write("мусор".encode("utf-8"))
+
+    with StoreWriter(str(tmp_path)) as writer:
+        writer.add({"text": "Мама мыла раму в ванной, ", "predicate_arguments": []})
+
+    reader = StoreReader(str(tmp_path))
+    assert [x["text"] for x in reader] == [
+        CLAUSES[0]["text"],
+        CLAUSES[1]["text"],
+        CLAUSES[0]["text"],
+    ]
+    assert reader.clauses["text"][0] == reader.clauses["text"][2]
+    assert reader.n_documents == 3
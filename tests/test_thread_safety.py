@@ -0,0 +1,83 @@
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import conllu
+import pytest
+from srl_toolkit.clause_segmenter.feature_extractor import FeatureExtractor
+from srl_toolkit.extractor import CachedExtractor, SerializedProcessor
+
+
+def make_document(doc_id, n_sentences=5):
+    lines = []
+    for s in range(n_sentences):
+        length = 3 + (doc_id + s) % 7
+        for i in range(length):
+            head = -1 if i == 0 else 1
+            upos = "VERB" if i == 0 else "NOUN"
+            lines.append(
+                f"{i + 1}\tслово{doc_id}_{i}\tслово{i}\t{upos}\t_\tCase=Nom\t{head}\tnsubj\t_\t_"
+            )
+        lines.append("")
+    return conllu.parse("\n".join(lines) + "\n")
+
+
+class OverlappingExtractor(CachedExtractor):
+    """
+    Two serialized stages, like UDPipe and CatBoost. With wait_for_overlap
+    the segment stage holds its lock until a parse runs at the same time, so
+    the run stalls for the timeout unless the stages overlap.
+    """
+
+    def __init__(self, cache_dir, wait_for_overlap=False):
+        super().__init__(cache_dir)
+        self.wait_for_overlap = wait_for_overlap
+        self.overlapped = threading.Event()
+        self.active = collections.Counter()
+        self.max_active = collections.Counter()
+        self._lock = threading.Lock()
+        self.parse = SerializedProcessor(lambda text: self._stage("parse", text))
+        self.segment = SerializedProcessor(lambda text: self._stage("segment", text))
+
+    def _stage(self, name, text):
+        with self._lock:
+            self.active[name] += 1
+            self.max_active[name] = max(self.max_active[name], self.active[name])
+            if self.active["parse"] and self.active["segment"]:
+                self.overlapped.set()
+        if self.wait_for_overlap and name == "segment":
+            self.overlapped.wait(5)
+        with self._lock:
+            self.active[name] -= 1
+        return text
+
+    def _extract(self, text):
+        return {"clauses": [self.segment(self.parse(text))]}
+
+
+def test_feature_extractor_concurrent():
+    extractor = FeatureExtractor()
+    documents = [make_document(i, n_sentences=3) for i in range(8)]
+    serial = [extractor(doc) for doc in documents]
+
+    with ThreadPoolExecutor(8) as executor:
+        concurrent = list(executor.map(extractor, documents * 2))
+
+    for i, features in enumerate(concurrent):
+        assert features.equals(serial[i % len(documents)])
+
+
+def test_extract_many(tmp_path):
+    texts = [f"текст {i}" for i in range(40)]
+    serial = OverlappingExtractor(str(tmp_path / "serial")).extract_many(
+        texts, n_threads=1
+    )
+
+    extractor = OverlappingExtractor(str(tmp_path / "concurrent"), True)
+    concurrent = extractor.extract_many(texts, n_threads=4)
+
+    assert concurrent == serial
+    assert concurrent == [{"clauses": [text]} for text in texts]
+    # different stages ran at the same time, each stage one text at a time
+    assert extractor.overlapped.is_set()
+    assert extractor.max_active == {"parse": 1, "segment": 1}
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import threading
+import time
+
+from srl_toolkit.extractor import CachedExtractor
+
+
+class SlowExtractor(CachedExtractor):
+    def __init__(self, cache_dir, lazy=True):
+        super().__init__(cache_dir)
+        self.loads = 0
+        self._loaded = False
+        if not lazy:
+            self.warmup()
+
+    def _load(self):
+        time.sleep(0.05)
+        self.loads += 1
+
+    def _extract(self, text):
+        assert self.loads == 1
+        return {"text": text.upper()}
+
+
+def test_models_load_on_first_miss(tmp_path):
+    SlowExtractor(str(tmp_path), lazy=False)("a")
+
+    extractor = SlowExtractor(str(tmp_path))
+    assert extractor("a") == {"text": "A"}
+    assert extractor.loads == 0
+
+    threads = [threading.Thread(target=extractor, args=(x,)) for x in "bcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert extractor.loads == 1
+
+
+def test_background_warmup(tmp_path):
+    extractor = SlowExtractor(str(tmp_path))
+    thread = extractor.warmup(background=True)
+    assert extractor("b") == {"text": "B"}
+    thread.join()
+    assert extractor.warmup() is None
+    assert extractor.loads == 1
+
+
+def test_heavy_modules_are_not_imported():
+    code = (
+        "import sys, srl_toolkit.annotator, srl_toolkit.cli; "
+        "print(sorted({'catboost', 'pandas', 'transformers'} & set(sys.modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"